@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Decode + resize benchmark for image.load_image_rgb.
+
+    python3 benchmarks/bench_decode.py [photo.jpg] [--repeat 5]
+
+Without a photo a synthetic 4000x3000 (12 MP) JPEG is generated. Each
+quality mode is timed against the same input and compared with the
+original full-decode LANCZOS path ('exact') by PSNR.
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts_tcp.image import load_image_rgb
+
+
+def synthetic_photo(path, size=(4000, 3000)):
+    # Gradientes + ruido: algo parecido a una foto para el codificador JPEG
+    w, h = size
+    x = np.linspace(0, 255, w, dtype=np.float32)
+    y = np.linspace(0, 255, h, dtype=np.float32)[:, None]
+    rng = np.random.default_rng(0)
+    rgb = np.stack([np.broadcast_to(x, (h, w)), np.broadcast_to(y, (h, w)), (x + y) / 2], axis=-1)
+    rgb = np.clip(rgb + rng.normal(0, 12, rgb.shape), 0, 255).astype(np.uint8)
+    Image.fromarray(rgb).save(path, quality=90)
+    return path
+
+
+def psnr(a, b):
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("photo", nargs="?")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = None
+    path = args.photo
+    if path is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".jpg", delete=False)
+        tmp.close()
+        path = synthetic_photo(tmp.name)
+
+    try:
+        with Image.open(path) as img:
+            print(f"Input: {path} {img.size[0]}x{img.size[1]} {img.format}")
+        reference = load_image_rgb(path, quality="exact")
+        baseline = None
+        for quality in ("exact", "high", "fast"):
+            times = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                out = load_image_rgb(path, quality=quality)
+                times.append(time.perf_counter() - t0)
+            best = min(times)
+            baseline = baseline or best
+            print(f"{quality:>6}: {best*1000:8.1f} ms  ({baseline/best:4.1f}x)  "
+                  f"PSNR vs exact {psnr(out, reference):6.2f} dB")
+    finally:
+        if tmp is not None:
+            os.remove(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+RGB888 -> RGB565 conversion benchmark on 320x640 frames.
+
+    python3 benchmarks/bench_rgb565.py [--repeat 500]
+
+Times the original shift-based converter (three uint16 temporaries per call)
+against rgb565.rgb888_to_rgb565 with a fresh and with a preallocated output,
+plus the gamma / dither / big-endian variants, and checks that the plain
+conversion is bit-identical to the original.
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts_tcp.rgb565 import rgb888_to_rgb565
+
+
+def legacy_rgb888_to_rgb565(image_array):
+    # Versión original de image.py / image_to_text.py
+    r = image_array[:, :, 0].astype(np.uint16) >> 3
+    g = image_array[:, :, 1].astype(np.uint16) >> 2
+    b = image_array[:, :, 2].astype(np.uint16) >> 3
+    return (r << 11) | (g << 5) | b
+
+
+def timeit(fn, frame, repeat):
+    fn(frame)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(frame)
+    return (time.perf_counter() - t0) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the RGB565 converters.")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    rng   = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (640, 320, 3), dtype=np.uint8)
+    out   = np.empty((640, 320), dtype="<u2")
+
+    assert np.array_equal(legacy_rgb888_to_rgb565(frame), rgb888_to_rgb565(frame)), "output differs"
+
+    cases = [
+        ("legacy shifts",          legacy_rgb888_to_rgb565),
+        ("rgb565",                 rgb888_to_rgb565),
+        ("rgb565 (out=)",          lambda f: rgb888_to_rgb565(f, out=out)),
+        ("rgb565 big-endian",      lambda f: rgb888_to_rgb565(f, byteorder="big")),
+        ("rgb565 gamma 2.2",       lambda f: rgb888_to_rgb565(f, out=out, gamma=2.2)),
+        ("rgb565 Bayer dither",    lambda f: rgb888_to_rgb565(f, out=out, dither=True)),
+    ]
+    base = None
+    for label, fn in cases:
+        secs = timeit(fn, frame, args.repeat)
+        base = base or secs
+        print(f"{label:<22} {secs * 1000:7.3f} ms/frame  ({base / secs:4.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
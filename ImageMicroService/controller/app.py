@@ -5,17 +5,13 @@ import threading
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from controller.shared_state import clients  # Importar la lista de clientes
+from controller.shared_state import dispatcher, wall  # Único dueño de los sockets de los paneles
+from scripts_tcp import blob_store
 from flask import Flask
 from flask_restx import Api
 from extensions import db  # Importar db desde extensions.py
 from controller.routes.image_routes import ns as image_ns  # Importa el namespace de rutas
 
-# Locks and shared state
-ACK_LOCK = threading.Lock()
-ACKED_INDICES = set()
-
-
 # Configuración
 BASE_DIR    = os.path.dirname(os.path.abspath(__file__))
 DB_PATH     = os.path.join(BASE_DIR, "../controller/instance/image_service.db")
@@ -30,20 +26,18 @@ SEGMENT_ORDER = {
 }
 
 
-def prune_dead_clients(clients):
-    alive = []
-    for conn, addr in clients:
-        try:
-            conn.sendall(b"")  # zero-byte check
-            alive.append((conn, addr))
-        except:
-            print(f"[S] Removing dead client {addr}")
-            try: conn.close()
-            except: pass
-    return alive
-
-
 def tcp_server():
+    """
+    Accepts panel connections and hands them to the dispatcher, which owns
+    the sockets from then on. A panel that reconnects replaces its old
+    connection, so the loop keeps accepting after the wall is complete.
+    With WISE_ASYNC_TRANSPORT=1 the asyncio wall accepts and serves the
+    panels on its event loop instead.
+    """
+    if wall is not None:
+        wall.serve()
+        return
+
     server_sock = socket.socket()
     server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     server_sock.bind(("", PORT))
@@ -51,21 +45,16 @@ def tcp_server():
     print(f"[S] Listening on port {PORT} for {NUM_CLIENTS} clients…")
     
     try:
-       clients = prune_dead_clients(clients)
-       while len(clients) < NUM_CLIENTS:
+       dispatcher.prune().result()
+       while True:
            conn, addr = server_sock.accept()
            print(f"[S] Client connected: {addr}")
-           clients.append((conn, addr))
-
-       print("[S] Ready. Commands: LIST | LOAD <name> | SEND <name> | SHOW <name> | INCREASE | DECREASE | TEXT <message>")
+           if dispatcher.add_client(conn, addr).result() == NUM_CLIENTS:
+               print("[S] Ready. Commands: LIST | LOAD <name> | SEND <name> | SHOW <name> | INCREASE | DECREASE | TEXT <message>")
     except KeyboardInterrupt:
        print("\n[S] Interrupt received. Shutting down…")
     finally:
-       for conn, _ in clients:
-           try:
-               conn.close()
-           except:
-               pass
+       dispatcher.close_all()
        server_sock.close()
        print("[S] Server closed.")
 
@@ -76,6 +65,8 @@ app = Flask(__name__)
 # Configuración de la base de datos (SQLite)
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///image_service.db'  # Base de datos en el directorio raíz del proyecto
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Límite de las subidas a /api/image/upload
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv("WISE_MAX_UPLOAD_MB", "64")) * 1024 * 1024
 
 # Inicializar SQLAlchemy con la app
 db.init_app(app)
@@ -86,6 +77,12 @@ from models.models import User, Image
 # Crear la base de datos y las tablas dentro del contexto de la aplicación
 with app.app_context():
     db.create_all()
+    # Bases de datos antiguas: añade images.blob_hash y mueve los BLOBs a image_blobs
+    raw = db.engine.raw_connection()
+    try:
+        blob_store.migrate(raw.driver_connection)
+    finally:
+        raw.close()
 
 # Configurar la API con Flask-RESTX
 api = Api(
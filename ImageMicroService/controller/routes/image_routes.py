@@ -1,6 +1,16 @@
+import os
+from flask import request
 from flask_restx import Namespace, Resource, fields
+from werkzeug.datastructures import FileStorage
 from service.image_service import ImageService
+from service.jobs import JOBS, get_job
+from scripts_tcp.image import QUALITY_MODES
 from models.models import User, Image  # Import the User and Image models
+from scripts_tcp.frame_cache import FRAME_CACHE
+from scripts_tcp.panel_workers import PANEL_WORKERS
+from scripts_tcp.barrier import BARRIER_STATS
+from scripts_tcp.catalog import PANEL_CATALOG
+from controller.shared_state import dispatcher
 
 # Namespace for image-related operations
 ns = Namespace(
@@ -26,6 +36,9 @@ response_model = ns.model('Response', {
     'result': fields.String(
         description='Result of the operation',
         example='Brightness increased successfully'
+    ),
+    'job_id': fields.String(
+        description='Background job sending the command to the panels (see /jobs/<job_id>)'
     )
 })
 
@@ -86,6 +99,19 @@ adjust_brightness_model = ns.model('AdjustBrightness', {
     )
 })
 
+upload_parser = ns.parser()
+upload_parser.add_argument('file', location='files', type=FileStorage,
+                           help='Image file (multipart); or send the raw bytes as the request body')
+upload_parser.add_argument('user_id', location='args', type=int, required=True, help='ID of the user')
+upload_parser.add_argument('image_name', location='args', help='Name of the image (default: file name)')
+upload_parser.add_argument('brightness_level', location='args', type=float, default=1.0)
+upload_parser.add_argument('quality', location='args', choices=sorted(QUALITY_MODES), default='high')
+
+job_model = ns.model('Job', {
+    'job_id': fields.String(description='ID to poll at /api/image/jobs/<job_id>'),
+    'status': fields.String(description='queued, running, done or failed', example='queued')
+})
+
 error_model = ns.model('Error', {
     'error': fields.String(
         description='Error description',
@@ -101,6 +127,10 @@ screen_model = ns.model('Screen', {
     )
 })
 
+def _response(result, job):
+    """Body for operations whose panel commands run as a background job."""
+    return {"result": result, "job_id": job.id if job else None}
+
 @ns.route('/test')
 class TestResource(Resource):
     @ns.doc(
@@ -139,10 +169,10 @@ class UserResource(Resource):
         
         username = data["username"]
         email = data["email"]
-        result = image_service.create_user(username, email)
+        result, job = image_service.create_user(username, email)
         if "error" in result.lower():
             return ns.marshal({"error": result}, error_model), 400
-        return ns.marshal({"result": result}, response_model), 201
+        return ns.marshal(_response(result, job), response_model), 201
 
     @ns.doc(
         'get_users',
@@ -186,13 +216,71 @@ class SaveImageResource(Resource):
             data['image_path'], data['user_id'], data['image_name'], data.get('brightness_level', 1.0)
         )
 
+@ns.route('/upload')
+class UploadImageResource(Resource):
+    @ns.doc(
+        'upload_image',
+        description='Streams an image to a temp file and converts it in the background. '
+                    'Returns a job id right away.',
+        responses={
+            202: 'Upload accepted, conversion queued',
+            400: 'Missing or empty file, wrong Content-Type or missing parameters'
+        }
+    )
+    @ns.expect(upload_parser)
+    def post(self):
+        """Uploads an image (multipart field 'file' or raw body)"""
+        args = upload_parser.parse_args()
+        upload = request.files.get('file')
+        if upload is not None:
+            # Werkzeug ya vuelca a disco los ficheros grandes; se copia por bloques
+            name = args['image_name'] or os.path.basename(upload.filename or '')
+            path = image_service.spool_upload(upload.stream)
+        elif request.content_length:
+            # Con otro Content-Type (p. ej. form-urlencoded) Werkzeug ya ha consumido el stream
+            if request.mimetype != 'application/octet-stream':
+                return ns.marshal({"error": "Raw uploads must be sent as application/octet-stream"},
+                                  error_model), 400
+            name = args['image_name']
+            path = image_service.spool_upload(request.stream)
+        else:
+            return ns.marshal({"error": "No file uploaded"}, error_model), 400
+        if os.path.getsize(path) == 0:
+            os.remove(path)
+            return ns.marshal({"error": "Uploaded file is empty"}, error_model), 400
+        if not name:
+            os.remove(path)
+            return ns.marshal({"error": "image_name is required"}, error_model), 400
+
+        job = JOBS.submit('upload', image_service.save_upload, path, args['user_id'], name,
+                          args['brightness_level'], args['quality'])
+        return ns.marshal({"job_id": job.id, "status": job.status}, job_model), 202
+
+@ns.route('/jobs/<string:job_id>')
+class JobResource(Resource):
+    @ns.doc(
+        'get_job',
+        description='Returns the status and result of a background job.',
+        responses={
+            200: 'Job found',
+            404: 'Unknown job id'
+        }
+    )
+    def get(self, job_id):
+        """Returns a background job"""
+        job = get_job(job_id)
+        if job is None:
+            return ns.marshal({"error": "Job not found"}, error_model), 404
+        return job.to_dict(), 200
+
 @ns.route('/adjust-brightness')
 class AdjustBrightnessResource(Resource):
     @ns.expect(adjust_brightness_model, validate=True)
     def post(self):
         """Adjusts the brightness of an image."""
         data = ns.payload
-        return image_service.adjust_brightness(data['image_id'], data['adjustment'])
+        result, job = image_service.adjust_brightness(data['image_id'], data['adjustment'])
+        return ns.marshal(_response(result, job), response_model), 200
 
 @ns.route('/command')
 class CommandResource(Resource):
@@ -201,7 +289,7 @@ class CommandResource(Resource):
         """Processes a command to adjust the image"""
         data = ns.payload
         command = data["command"]
-        result = image_service.gesture_adjust(command)
+        result, job = image_service.gesture_adjust(command)
 
         # Maneja el caso en el que result sea None
         if result is None:
@@ -212,7 +300,7 @@ class CommandResource(Resource):
             return ns.marshal({"error": result}, error_model), 400
 
         # Devuelve el resultado exitoso
-        return ns.marshal({"result": result}, response_model), 200
+        return ns.marshal(_response(result, job), response_model), 200
 
 @ns.route('/change-image')
 class ChangeImageResource(Resource):
@@ -228,8 +316,8 @@ class ChangeImageResource(Resource):
     def post(self):
         """Changes the current image"""
         data = ns.payload
-        result = image_service.change_image(data['image_name'])
-        return ns.marshal({"result": result}, response_model), 200
+        result, job = image_service.change_image(data['image_name'])
+        return ns.marshal(_response(result, job), response_model), 200
 
 
 @ns.route('/images')
@@ -251,7 +339,8 @@ class ImagesResource(Resource):
                     "id": image.id,
                     "user_id": image.user_id,
                     "image_name": image.image_name,
-                    "brightness_level": image.brightness_level
+                    "brightness_level": image.brightness_level,
+                    "blob_hash": image.blob_hash
                 }
                 for image in images
             ]
@@ -259,6 +348,52 @@ class ImagesResource(Resource):
         except Exception as e:
             return {"error": str(e)}, 500
 
+@ns.route('/images/<string:image_name>')
+class ImageResource(Resource):
+    @ns.doc(
+        'delete_image',
+        description='Deletes an image; its data is removed once no other image shares it.',
+        responses={
+            200: 'Image deleted successfully',
+            404: 'Image not found'
+        }
+    )
+    def delete(self, image_name):
+        """Deletes an image by name"""
+        result = image_service.delete_image(image_name)
+        if result == "Image not found":
+            return ns.marshal({"error": result}, error_model), 404
+        return ns.marshal({"result": result}, response_model), 200
+
+@ns.route('/frame-cache')
+class FrameCacheResource(Resource):
+    @ns.doc(
+        'frame_cache_stats',
+        description='Returns hit/miss counters and size of the decoded frame cache.',
+        responses={
+            200: 'Cache statistics retrieved successfully'
+        }
+    )
+    def get(self):
+        """Returns the decoded frame cache statistics"""
+        return FRAME_CACHE.stats(), 200
+
+@ns.route('/panels')
+class PanelsResource(Resource):
+    @ns.doc(
+        'panel_stats',
+        description='Returns the dispatcher counters, per panel the queue depth and '
+                    'service time of its sender thread, the READY/GO barrier latency and '
+                    'the catalog of images known to be on each panel.',
+        responses={
+            200: 'Panel statistics retrieved successfully'
+        }
+    )
+    def get(self):
+        """Returns the panel sender statistics"""
+        return {"dispatcher": dispatcher.stats(), "panels": PANEL_WORKERS.stats(),
+                "barrier": BARRIER_STATS.stats(), "catalog": PANEL_CATALOG.to_dict()}, 200
+
 def gesture_adjust(self, command):
     """Processes a gesture command to adjust the image."""
     valid_commands = ["fist", "palm", "finger_up", "finger_down"]
@@ -286,8 +421,8 @@ class ScreenResource(Resource):
         command = data["command"]
 
         # Llama a la función del servicio
-        result = image_service.control_screen(command)
+        result, job = image_service.control_screen(command)
         if "error" in result.lower():
             return ns.marshal({"error": result}, error_model), 400
 
-        return ns.marshal({"result": result}, response_model), 200
\ No newline at end of file
+        return ns.marshal(_response(result, job), response_model), 200
\ No newline at end of file
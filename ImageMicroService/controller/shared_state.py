@@ -1,2 +1,14 @@
 # controller/shared_state.py
-clients = []
\ No newline at end of file
+import os
+from scripts_tcp.dispatcher import PanelDispatcher
+
+# WISE_ASYNC_TRANSPORT=1: accept y envíos en un único event loop (async_server.py)
+ASYNC_TRANSPORT = os.getenv("WISE_ASYNC_TRANSPORT", "0") == "1"
+
+clients = []
+wall = None
+if ASYNC_TRANSPORT:
+    from scripts_tcp.async_server import AsyncWall
+    wall = AsyncWall()
+# Único hilo que escribe en los sockets de los paneles (o que entrega las órdenes al loop)
+dispatcher = PanelDispatcher(clients, runner=wall.call if wall else None)
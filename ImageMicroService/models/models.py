@@ -1,3 +1,5 @@
+from sqlalchemy import update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from extensions import db
 
 class User(db.Model):
@@ -11,17 +13,60 @@ class User(db.Model):
     def __repr__(self):
         return f"<User(username='{self.username}', email='{self.email}')>"
 
+class ImageBlob(db.Model):
+    __tablename__ = 'image_blobs'
+    hash = db.Column(db.String(64), primary_key=True)  # SHA-256 del contenido
+    data = db.Column(db.LargeBinary, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ImageBlob(hash='{self.hash[:12]}', size={self.size}, refcount={self.refcount})>"
+
 class Image(db.Model):
     __tablename__ = 'images'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     image_name = db.Column(db.String(120), nullable=False)
     brightness_level = db.Column(db.Float, default=1.0)
-    image_data = db.Column(db.LargeBinary, nullable=True)  # Campo para almacenar la imagen
+    image_data = db.Column(db.LargeBinary, nullable=True)  # Solo filas antiguas; el contenido vive en image_blobs
+    blob_hash = db.Column(db.String(64), db.ForeignKey('image_blobs.hash'), nullable=True)
+
+    blob = db.relationship('ImageBlob', lazy=True)
+
+    @property
+    def data(self):
+        return self.blob.data if self.blob else self.image_data
 
     def __repr__(self):
         return f"<Image(image_name='{self.image_name}', brightness_level={self.brightness_level})>"
 
+def acquire_blob(data):
+    """Returns the ImageBlob holding `data` (creating it) with one more reference."""
+    from scripts_tcp.blob_store import content_hash
+
+    digest = content_hash(data)
+    # INSERT OR IGNORE + UPDATE atómico, como blob_store.put_blob: dos subidas
+    # iguales en paralelo (JOBS) no chocan en la clave ni pierden referencias
+    db.session.execute(
+        sqlite_insert(ImageBlob)
+        .values(hash=digest, data=data, size=len(data), refcount=0)
+        .on_conflict_do_nothing(index_elements=["hash"])
+    )
+    db.session.execute(
+        update(ImageBlob).where(ImageBlob.hash == digest).values(refcount=ImageBlob.refcount + 1)
+    )
+    return db.session.get(ImageBlob, digest)
+
+def release_blob(digest):
+    """Drops one reference to the blob `digest`, deleting it when unused."""
+    blob = db.session.get(ImageBlob, digest) if digest else None
+    if blob is None:
+        return
+    blob.refcount -= 1
+    if blob.refcount <= 0:
+        db.session.delete(blob)
+
 def save_image_to_db(image_path, user_id, image_name, brightness_level=1.0):
     from models.models import Image
     from controller.app import db
@@ -30,12 +75,12 @@ def save_image_to_db(image_path, user_id, image_name, brightness_level=1.0):
     with open(image_path, 'rb') as file:
         image_binary = file.read()
 
-    # Crear un nuevo registro de imagen
+    # Crear un nuevo registro de imagen (el contenido se guarda una sola vez)
     new_image = Image(
         user_id=user_id,
         image_name=image_name,
         brightness_level=brightness_level,
-        image_data=image_binary
+        blob_hash=acquire_blob(image_binary).hash
     )
 
     # Guardar en la base de datos
@@ -48,10 +93,10 @@ def retrieve_image_from_db(image_id, output_path):
 
     # Consultar la imagen por ID
     image = Image.query.get(image_id)
-    if image and image.image_data:
+    if image and image.data:
         # Guardar la imagen en un archivo
         with open(output_path, 'wb') as file:
-            file.write(image.image_data)
+            file.write(image.data)
         print(f"Imagen guardada en '{output_path}'.")
     else:
         print("Imagen no encontrada o no tiene datos.")
\ No newline at end of file
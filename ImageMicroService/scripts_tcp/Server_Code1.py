@@ -3,21 +3,32 @@ import socket
 import threading
 import os
 import time
-import numpy as np
 import sqlite3
-import sys
-from subprocess import run, CalledProcessError
-from scripts_tcp.fake_clients import FakeConnection  # Si lo usas para tests
+from scripts_tcp.frame_format import is_frame, decode_frame
+from scripts_tcp.legacy_matrix import parse_legacy_matrix
+from scripts_tcp.frame_cache import FRAME_CACHE
+from scripts_tcp.blob_store import DB_PATH  # misma base de datos que batch_ingest / migrate_legacy
+from scripts_tcp.frame_store import FRAME_STORE, frame_bytes, holding, payload_view
+from scripts_tcp.segment_cache import segment_table_for, segments_for
+from scripts_tcp.delta import DELTA_ENABLED, DELTA_MAX_RATIO, DELTA_TRACKER, diff_runs, encode_delta
+from scripts_tcp.text_cache import TEXT_FRAME_CACHE
+from scripts_tcp.codec import RAW, LAST_SEND_STATS, SendStats, encode_segment, encodings_for, negotiate_encodings
+from scripts_tcp.panel_workers import PANEL_WORKERS
+from scripts_tcp.wire import read_reply, send_message, wait_ack
+from scripts_tcp.barrier import ready_go_barrier
+from scripts_tcp.catalog import PANEL_CATALOG
+from scripts_tcp.brightness import SOFT_BRIGHTNESS, BRIGHTNESS_VARIANTS_CACHE, clamp_level, step_level
 
 
 # Locks and shared state
 ACK_LOCK = threading.Lock()
 ACKED_INDICES = set()
 
+# Última imagen cargada/mostrada y su brillo (para INCREASE/DECREASE por software)
+CURRENT_IMAGE = {"name": None, "level": None}
+
 
 # Configuración
-BASE_DIR    = os.path.dirname(os.path.abspath(__file__))
-DB_PATH     = os.path.join(BASE_DIR, "../controller/instance/image_service.db")
 NUM_CLIENTS = 10
 PORT        = 5000
 
@@ -31,159 +42,300 @@ SEGMENT_ORDER = {
 
 
 
+def segment_index(addr):
+   """Índice de segmento del panel según el último octeto de su IP (None si no es del muro)."""
+   try:
+       return SEGMENT_ORDER.get(int(addr[0].split('.')[-1]))
+   except (ValueError, IndexError):
+       return None
+
+
+
+
 def load_matrix_from_db(image_name):
    """
-   1) Lee el BLOB (texto de un .py) que define `image_matrix = [[...], ...]`
-   2) Ejecuta ese texto para extraer la lista anidada
-   3) Devuelve un ndarray(uint16) con la forma original
+   1) Consulta la versión (hash del contenido) de la imagen
+   2) Si el frame decodificado ya está en FRAME_CACHE con esa versión, lo devuelve
+   3) Si no, lee el BLOB: si es un frame binario (ver frame_format.py) lo mapea
+      con np.frombuffer; si es el formato antiguo (texto de un .py que define
+      `image_matrix = [[...], ...]`) lo convierte con legacy_matrix.py
+   4) Devuelve un ndarray(uint16) de solo lectura con la forma original
    """
    if not os.path.exists(DB_PATH):
        raise FileNotFoundError(f"No se encontró la base de datos en {DB_PATH}")
 
 
    conn   = sqlite3.connect(DB_PATH)
-   cursor = conn.cursor()
-   cursor.execute("SELECT image_data FROM images WHERE image_name = ?", (image_name,))
-   row = cursor.fetchone()
-   conn.close()
+   try:
+       cursor = conn.cursor()
+       image_id, version = _image_version(cursor, image_name)
+       mat = FRAME_CACHE.get(image_name, version)
+       if mat is not None:
+           return mat
+
+       cursor.execute(
+           "SELECT COALESCE(b.data, i.image_data) FROM images i "
+           "LEFT JOIN image_blobs b ON b.hash = i.blob_hash WHERE i.id = ?", (image_id,))
+       blob = cursor.fetchone()[0]
+   finally:
+       conn.close()
+
+
+   mat = decode_image_blob(blob)
+   alto, ancho = mat.shape
+   print(f"[DEBUG] Matriz '{image_name}' cargada: shape = ({alto}, {ancho})")
+   return FRAME_CACHE.put(image_name, version, mat)
 
 
+def _image_version(cursor, image_name):
+   """
+   Devuelve (id, versión) de la imagen sin leer el BLOB. La versión es el
+   hash del contenido (image_blobs); filas antiguas usan id:tamaño.
+   """
+   cursor.execute("SELECT id, blob_hash, length(image_data) FROM images WHERE image_name = ?", (image_name,))
+   row = cursor.fetchone()
    if not row:
        raise ValueError(f"No se encontró una imagen con nombre '{image_name}'")
+   return row[0], row[1] or f"{row[0]}:{row[2]}"
 
 
-   blob = row[0]
-   # Si vino como bytes, lo decodificamos; si ya es str, lo usamos tal cual
-   text = blob.decode('utf-8') if isinstance(blob, (bytes, bytearray)) else blob
-
+def load_frame_view(image_name):
+   """
+   Devuelve un FrameView (mmap del frame en controller/instance/frames) listo
+   para enviar sin copias; si no está en disco lo decodifica y lo guarda.
+   """
+   if not os.path.exists(DB_PATH):
+       raise FileNotFoundError(f"No se encontró la base de datos en {DB_PATH}")
 
-   # Ejecutamos el código en un namespace aislado
-   namespace = {}
-   exec(text, {}, namespace)
+   conn = sqlite3.connect(DB_PATH)
+   try:
+       _, version = _image_version(conn.cursor(), image_name)
+   finally:
+       conn.close()
 
+   view = FRAME_STORE.open(image_name, version)
+   if view is None:
+       view = FRAME_STORE.put(image_name, version, load_matrix_from_db(image_name))
+   return view
 
-   if 'image_matrix' not in namespace:
-       raise ValueError("El BLOB no define la variable 'image_matrix'")
 
+def ingest_image(image_name):
+   """
+   Prepara una imagen recién guardada para el muro: la escribe en el frame
+   store y precalcula los segmentos por panel del layout actual.
+   """
+   view  = load_frame_view(image_name)
+   table = segment_table_for(view, NUM_CLIENTS)
+   print(f"[S] Ingested '{image_name}': {len(view)}B, layout {table.layout}")
+   return table
 
-   mat = np.array(namespace['image_matrix'], dtype=np.uint16)
-   alto, ancho = mat.shape
-   print(f"[DEBUG] Matriz '{image_name}' cargada: shape = ({alto}, {ancho})")
-   return mat
 
+def _stored_brightness(cursor, image_name):
+   cursor.execute("SELECT brightness_level FROM images WHERE image_name = ?", (image_name,))
+   row = cursor.fetchone()
+   return clamp_level(row[0]) if row and row[0] is not None else 1.0
 
 
+def load_brightness_frame(image_name, level=None):
+   """
+   Devuelve (nivel, matriz) de la imagen con el brillo aplicado a los píxeles.
+   Sin `level` usa images.brightness_level; las variantes más usadas de cada
+   imagen salen de BRIGHTNESS_VARIANTS_CACHE sin recalcular.
+   """
+   conn = sqlite3.connect(DB_PATH)
+   try:
+       cursor = conn.cursor()
+       _, version = _image_version(cursor, image_name)
+       level = clamp_level(level) if level is not None else _stored_brightness(cursor, image_name)
+   finally:
+       conn.close()
+
+   mat = load_matrix_from_db(image_name)
+   return level, BRIGHTNESS_VARIANTS_CACHE.get(image_name, version, mat, level)
+
+
+def current_brightness(image_name):
+   """Nivel guardado en images.brightness_level (1.0 si no hay)."""
+   conn = sqlite3.connect(DB_PATH)
+   try:
+       return _stored_brightness(conn.cursor(), image_name)
+   finally:
+       conn.close()
+
+
+def store_brightness(image_name, level):
+   conn = sqlite3.connect(DB_PATH)
+   try:
+       with conn:
+           conn.execute("UPDATE images SET brightness_level = ? WHERE image_name = ?", (level, image_name))
+   finally:
+       conn.close()
+
+
+def send_brightness(clients, image_name, level=None):
+   """Envía a los paneles el frame de `image_name` ya atenuado (paneles sin dimming)."""
+   level, frame = load_brightness_frame(image_name, level)
+   data = frame_bytes(frame)
+   print(f"[S] Brightness '{image_name}' → {level:.1f} ({len(data)}B)")
+   send_segmented(clients, data)
+   CURRENT_IMAGE.update(name=image_name, level=level)
+   return level
+
+
+def step_brightness(clients, steps):
+   """INCREASE/DECREASE por software sobre la imagen actual."""
+   name = CURRENT_IMAGE["name"]
+   current = CURRENT_IMAGE["level"]
+   if current is None:
+       current = current_brightness(name)
+   level = step_level(current, steps)
+   if level == current:
+       print(f"[S] Brightness '{name}' already at {level:.1f}")
+       return level
+   store_brightness(name, level)
+   return send_brightness(clients, name, level)
+
+
+def decode_image_blob(blob):
+   """Convierte un BLOB de `images.image_data` (frame binario o .py antiguo) en ndarray."""
+   if is_frame(blob):
+       return decode_frame(blob)
+
+   # Formato antiguo (`image_matrix = [[...]]`): se parsea, nunca se ejecuta
+   return parse_legacy_matrix(blob)
+
+
+
+
+def send_encoded(conn, data, offset, length, raw_header, z_prefix, stats=None):
+    """
+    Envía data[offset:offset+length] con la codificación más pequeña que haya
+    negociado el panel (ver codec.py); sin negociación va en RAW como siempre.
+    Devuelve (codificación, bytes enviados, seq del mensaje; None sin framing).
+    """
+    allowed = encodings_for(conn)
+    enc, secs = RAW, 0.0
+    if allowed:
+        enc, payload, secs = encode_segment(payload_view(data)[offset:offset+length], allowed)
+
+    if enc == RAW:
+        seq  = send_message(conn, raw_header, data, offset, length)
+        wire = length
+    else:
+        seq  = send_message(conn, f"{z_prefix}:{enc}:{len(payload)}\n".encode(), payload)
+        wire = len(payload)
 
-def calculate_segments(data_len, parts=10):
-   base = data_len // parts
-   rem  = data_len % parts
-   segs = []
-   off  = 0
-   for i in range(parts):
-       ln = base + (1 if i < rem else 0)
-       segs.append((off, ln))
-       off += ln
-   return segs
+    if stats is not None:
+        stats.record(enc, length, wire, secs)
+    return enc, wire, seq
 
 
-def handle_segment_direct(conn, addr, idx, offset, length, data):
+def handle_segment_direct(conn, addr, idx, offset, length, data, delta=False, stats=None):
     global ACKED_INDICES
+    segment = payload_view(data)[offset:offset+length]
+    acked   = False
     try:
-        header = f"SEGMENT:{offset}:{length}\n".encode()
-        conn.sendall(header)
+        runs = None
+        if delta:
+            previous = DELTA_TRACKER.previous(idx, conn, offset, length)
+            if previous is not None:
+                runs = diff_runs(previous, segment)
+                if sum(ln for _, ln in runs) > length * DELTA_MAX_RATIO:
+                    runs = None
+
         t0 = time.time()
-        conn.sendall(data[offset:offset+length])
+        if runs is not None:
+            header, payload = encode_delta(offset, length, runs, segment)
+            seq  = send_message(conn, header, payload)
+            sent = len(payload)
+            kind = f"DELTA {len(runs)} runs"
+            if stats is not None:
+                stats.record("DELTA", length, sent, 0.0)
+        else:
+            header = f"SEGMENT:{offset}:{length}\n".encode()
+            kind, sent, seq = send_encoded(conn, data, offset, length, header,
+                                           f"SEGMENT_Z:{offset}:{length}", stats)
         t1 = time.time()
-        bps = (length*8)/(t1-t0)
-        print(f"[S]→{addr} idx={idx} {length}B in {t1-t0:.2f}s → {bps/1e6:.2f}Mbps")
+        bps = (sent*8)/max(t1-t0, 1e-6)
+        print(f"[S]→{addr} idx={idx} {kind} {sent}/{length}B in {t1-t0:.2f}s → {bps/1e6:.2f}Mbps")
 
-        conn.settimeout(10.0)
         try:
-            ack = conn.recv(1024).decode().strip()
+            ack = wait_ack(conn, seq, 10.0)
             print(f"[S] ACK from {addr} idx={idx}: {ack}")
             if ack == "ACK":
+                acked = True
                 with ACK_LOCK:
                     ACKED_INDICES.add(idx)
         except socket.timeout:
             print(f"[S] No ACK (timeout) from {addr} idx={idx}")
-        finally:
-            conn.settimeout(None)
 
     except Exception as e:
         print(f"[S] Error sending segment to {addr} idx={idx}: {e}")
+    finally:
+        # Solo se usa como base para el próximo delta lo que el panel confirmó
+        # (sin delta no se copia el segmento; la base anterior deja de valer)
+        if delta and acked:
+            DELTA_TRACKER.acked(idx, conn, offset, segment)
+        else:
+            DELTA_TRACKER.forget(idx)
 
 
 
 
-def send_segmented(clients, data):
+def send_segmented(clients, data, delta=DELTA_ENABLED):
     global ACKED_INDICES
     ACKED_INDICES.clear()
+    stats = SendStats("SEGMENTED")
 
-    segments        = calculate_segments(len(data), NUM_CLIENTS)
-    ordered_clients = [None]*NUM_CLIENTS
-    for conn, addr in clients:
-        last = int(addr[0].split('.')[-1])
-        if last in SEGMENT_ORDER:
-            ordered_clients[SEGMENT_ORDER[last]] = (conn, addr)
-
-    # 1) initial send
-    threads = []
-    for idx, cli in enumerate(ordered_clients):
-        if cli:
-            conn, addr = cli
-            off, ln = segments[idx]
-            t = threading.Thread(
-                target=handle_segment_direct,
-                args=(conn, addr, idx, off, ln, data)
-            )
-            t.start()
-            threads.append(t)
-        else:
-            print(f"[S] No client for idx={idx}")
-    for t in threads: t.join()
-
-    # 2) up to 2 retries
-    for retry in range(2):
-        with ACK_LOCK:
-            missing = [i for i in range(NUM_CLIENTS) if i not in ACKED_INDICES]
-        if not missing:
-            break
-        print(f"[S] Retry {retry+1} for missing: {missing}")
-        threads = []
-        for idx in missing:
-            cli = ordered_clients[idx]
+    # La vista del frame sigue abierta mientras haya envíos en curso (ver frame_store.py)
+    with holding(data):
+        segments        = segments_for(data, NUM_CLIENTS)
+        ordered_clients = [None]*NUM_CLIENTS
+        for conn, addr in clients:
+            last = int(addr[0].split('.')[-1])
+            if last in SEGMENT_ORDER:
+                ordered_clients[SEGMENT_ORDER[last]] = (conn, addr)
+
+        # 1) initial send (en el hilo emisor de cada panel, ver panel_workers.py)
+        jobs = []
+        for idx, cli in enumerate(ordered_clients):
             if cli:
                 conn, addr = cli
                 off, ln = segments[idx]
-                t = threading.Thread(
-                    target=handle_segment_direct,
-                    args=(conn, addr, idx, off, ln, data)
-                )
-                t.start()
-                threads.append(t)
-        for t in threads: t.join()
+                jobs.append(PANEL_WORKERS.submit(conn, addr, handle_segment_direct,
+                                                 conn, addr, idx, off, ln, data, delta, stats))
+            else:
+                print(f"[S] No client for idx={idx}")
+        PANEL_WORKERS.wait(jobs)
+
+        # 2) up to 2 retries
+        for retry in range(2):
+            with ACK_LOCK:
+                missing = [i for i in range(NUM_CLIENTS) if i not in ACKED_INDICES]
+            if not missing:
+                break
+            print(f"[S] Retry {retry+1} for missing: {missing}")
+            jobs = []
+            for idx in missing:
+                cli = ordered_clients[idx]
+                if cli:
+                    conn, addr = cli
+                    off, ln = segments[idx]
+                    jobs.append(PANEL_WORKERS.submit(conn, addr, handle_segment_direct,
+                                                     conn, addr, idx, off, ln, data, delta, stats))
+            PANEL_WORKERS.wait(jobs)
+
+    stats.report()
+    LAST_SEND_STATS["SEGMENTED"] = stats
 
     # 3) READY/GO handshake
     print("[S] Broadcast READY")
+    t_ready = time.monotonic()
     for conn, addr in clients:
-        try: conn.sendall(b"READY\n")
+        try: send_message(conn, b"READY\n")
         except: pass
 
-    go_set = set()
-    deadline = time.time() + 5
-    while time.time() < deadline and len(go_set) < NUM_CLIENTS:
-        for conn, addr in clients:
-            conn.settimeout(1.0)
-            try:
-                line = conn.recv(64).decode().strip()
-                if line == "GO":
-                    last = int(addr[0].split('.')[-1])
-                    if last in SEGMENT_ORDER:
-                        go_set.add(SEGMENT_ORDER[last])
-                        print(f"[S] GO from {addr}")
-            except:
-                pass
-        time.sleep(0.1)
+    go_set = ready_go_barrier(clients, segment_index, range(NUM_CLIENTS), t0=t_ready)
 
     if len(go_set) == NUM_CLIENTS:
         print("[S] All GO received.")
@@ -193,99 +345,138 @@ def send_segmented(clients, data):
     # 4) SHOW_TEMP & CLEAR_BUFFER
     print("[S] Broadcast SHOW_TEMP")
     for conn, addr in clients:
-        try: conn.sendall(b"SHOW_TEMP\n")
+        try: send_message(conn, b"SHOW_TEMP\n")
         except: pass
 
     print("[S] Broadcast CLEAR_BUFFER")
     for conn, addr in clients:
-        try: conn.sendall(b"CLEAR_BUFFER\n")
+        try: send_message(conn, b"CLEAR_BUFFER\n")
         except: pass
 
 
-def handle_full_load_segment(conn, addr, idx, name, offset, length, data_bytes):
+def handle_full_load_segment(conn, addr, idx, name, offset, length, data_bytes, stats=None):
     try:
-        segment = data_bytes[offset:offset+length]
         header  = f"LOAD_IMAGE:{name}:{length}\n".encode()
-        conn.sendall(header)
         t0 = time.time()
-        conn.sendall(segment)
+        enc, sent, seq = send_encoded(conn, data_bytes, offset, length, header,
+                                      f"LOAD_IMAGE_Z:{name}:{length}", stats)
         t1 = time.time()
-        bps = (length*8)/(t1-t0)
-        print(f"[S]→{addr} LOAD idx={idx} {length}B in {t1-t0:.2f}s → {bps/1e6:.2f}Mbps")
-        conn.settimeout(10.0)
+        bps = (sent*8)/max(t1-t0, 1e-6)
+        print(f"[S]→{addr} LOAD idx={idx} {enc} {sent}/{length}B in {t1-t0:.2f}s → {bps/1e6:.2f}Mbps")
         try:
-            ack = conn.recv(1024).decode().strip()
+            ack = wait_ack(conn, seq, 10.0)
             print(f"[S] ACK from {addr} idx={idx}: {ack}")
+            if ack == "ACK":
+                PANEL_CATALOG.add(addr[0], name)
         except socket.timeout:
             print(f"[S] No ACK (timeout) from {addr} idx={idx}")
-        finally:
-            conn.settimeout(None)
     except Exception as e:
         print(f"[S] Error during LOAD for {addr} idx={idx}: {e}")
 
 
 def send_full(clients, name, data):
-    segments        = calculate_segments(len(data), NUM_CLIENTS)
-    ordered_clients = [None]*NUM_CLIENTS
-    for conn, addr in clients:
-        last = int(addr[0].split('.')[-1])
-        if last in SEGMENT_ORDER:
-            ordered_clients[SEGMENT_ORDER[last]] = (conn, addr)
-
-    threads = []
-    for idx, cli in enumerate(ordered_clients):
-        if cli:
-            conn, addr = cli
-            off, ln = segments[idx]
-            t = threading.Thread(
-                target=handle_full_load_segment,
-                args=(conn, addr, idx, name, off, ln, data)
-            )
-            t.start()
-            threads.append(t)
-        else:
-            print(f"[S] No client for LOAD idx={idx}")
-    for t in threads: t.join()
+    stats           = SendStats(f"LOAD {name}")
+    with holding(data):
+        segments        = segments_for(data, NUM_CLIENTS)
+        ordered_clients = [None]*NUM_CLIENTS
+        for conn, addr in clients:
+            last = int(addr[0].split('.')[-1])
+            if last in SEGMENT_ORDER:
+                ordered_clients[SEGMENT_ORDER[last]] = (conn, addr)
+
+        jobs = []
+        for idx, cli in enumerate(ordered_clients):
+            if cli:
+                conn, addr = cli
+                off, ln = segments[idx]
+                jobs.append(PANEL_WORKERS.submit(conn, addr, handle_full_load_segment,
+                                                 conn, addr, idx, name, off, ln, data, stats))
+            else:
+                print(f"[S] No client for LOAD idx={idx}")
+        PANEL_WORKERS.wait(jobs)
+    stats.report()
+    LAST_SEND_STATS["LOAD"] = stats
 
 
 def broadcast(clients, cmd):
     for conn, addr in clients:
         try:
-            conn.sendall((cmd+"\n").encode())
+            send_message(conn, (cmd+"\n").encode())
             print(f"[S]→{addr}: {cmd}")
         except Exception as e:
             print(f"[S] Error sending '{cmd}' to {addr}: {e}")
 
             
 def receive_list_from_client(conn, timeout=5.0):
+    """Nombres del panel, o None si no respondió con una lista completa a tiempo."""
     names = set()
-    conn.settimeout(timeout)
+    deadline = time.monotonic() + timeout
     try:
-        fp = conn.makefile("r")
-        line = fp.readline().strip()
+        line, _ = read_reply(conn, timeout)
         if line != "IMAGES:":
-            return names
+            return None
         while True:
-            line = fp.readline().strip()
+            line, _ = read_reply(conn, max(deadline - time.monotonic(), 0))
             if line == "END_IMAGES": break
-            if line: names.add(line)
-    except:
-        pass
-    finally:
-        conn.settimeout(None)
+            names.add(line)
+    except (socket.timeout, OSError):
+        return None
     return names
 
 
-def list_images_from_all_clients(clients):
+def list_images_from_all_clients(clients, refresh=False):
+    """
+    Imágenes comunes a todos los paneles. Sale del catálogo en memoria si ya
+    conoce a todos; si no (o con refresh) pregunta a los paneles a la vez,
+    cada uno en su hilo emisor, y actualiza el catálogo.
+    """
+    ips = [addr[0] for _, addr in clients]
+    if not refresh:
+        common = PANEL_CATALOG.common(ips)
+        if common is not None:
+            print(f"[S] LIST from catalog ({len(ips)} panels)")
+            return common
+
     broadcast(clients, "LIST_IMAGES")
+    jobs = [(addr, PANEL_WORKERS.submit(conn, addr, receive_list_from_client, conn))
+            for conn, addr in clients]
+    PANEL_WORKERS.wait([job for _, job in jobs])
     common = None
-    for conn, addr in clients:
-        s = receive_list_from_client(conn)
-        print(f"[S] {addr} has {s}")
+    for addr, job in jobs:
+        s = job.result()
+        print(f"[S] {addr} has {s if s is not None else '(no reply)'}")
+        if s is None:
+            PANEL_CATALOG.forget(addr[0])
+            s = set()
+        else:
+            PANEL_CATALOG.replace(addr[0], s)
         common = s if common is None else (common & s)
     return common or set()
 
 
+def prepare_load(name):
+   """Bytes del frame de `name` listos para LOAD (con el brillo por software si está activo)."""
+   data = load_frame_view(name)
+   if SOFT_BRIGHTNESS:
+       level, frame = load_brightness_frame(name)
+       if level < 1.0:
+           data = frame_bytes(frame)
+       CURRENT_IMAGE.update(name=name, level=level)
+   return data
+
+
+def show_image(clients, name):
+   """SHOW_IMAGE en todos; antes carga la imagen en los paneles que el catálogo sabe que no la tienen."""
+   lacking = set(PANEL_CATALOG.lacking([addr[0] for _, addr in clients], name))
+   if lacking:
+       print(f"[S] '{name}' missing on {sorted(lacking)}, loading it first")
+       try:
+           send_full([c for c in clients if c[1][0] in lacking], name, prepare_load(name))
+       except Exception as e:
+           print(f"[S] Load error: {e}")
+   broadcast(clients, f"SHOW_IMAGE:{name}")
+
+
 def main(clients, inputString):
 
     while True:
@@ -296,43 +487,57 @@ def main(clients, inputString):
 
 
         if cmd == "LIST":
-            common = list_images_from_all_clients(clients)
+            refresh = len(parts) > 1 and parts[1].lower() == "refresh"
+            common = list_images_from_all_clients(clients, refresh)
             print("[S] Common:", common or "(none)")
-            break
+            return common
 
 
         elif cmd == "LOAD" and len(parts) == 2:
             name = parts[1]
             try:
-                mat = load_matrix_from_db(name)
+                data = prepare_load(name)
             except Exception as e:
                 print(f"[S] Load error: {e}")
-                continue
-            data = mat.tobytes()
+                break
             print(f"[S] Load & distribute '{name}' → {len(data)}B")
             send_full(clients, name, data)
             break
 
 
         elif cmd == "SHOW" and len(parts) == 2:
-            broadcast(clients, f"SHOW_IMAGE:{parts[1]}")
+            show_image(clients, parts[1])
+            CURRENT_IMAGE.update(name=parts[1], level=None)
             break
 
 
-        elif cmd == "INCREASE":
-            broadcast(clients, "increase")
+        elif cmd in ("INCREASE", "DECREASE"):
+            # INCREASE/DECREASE [n]: n pasos netos (ráfagas ya fusionadas por el dispatcher)
+            steps = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+            if SOFT_BRIGHTNESS and CURRENT_IMAGE["name"]:
+                try:
+                    step_brightness(clients, steps if cmd == "INCREASE" else -steps)
+                except Exception as e:
+                    print(f"[S] Brightness error: {e}")
+            else:
+                for _ in range(steps):
+                    broadcast(clients, cmd.lower())
             break
 
 
-        elif cmd == "DECREASE":
-            broadcast(clients, "decrease")
+        elif cmd == "BRIGHTNESS" and len(parts) == 3:
+            try:
+                send_brightness(clients, parts[1], float(parts[2]))
+            except Exception as e:
+                print(f"[S] Brightness error: {e}")
             break
 
 
         elif cmd == "TEXT" and len(parts) >= 2:
             if len(parts) > 2 and parts[2] == "off":
-                print(f"[S] Generating image for text: '{message}'")
-                for conn, _ in clients:
+                for conn, addr in clients:
+                    PANEL_WORKERS.retire(conn)
+                    PANEL_CATALOG.forget(addr[0])
                     try:
                         conn.close()
                     except Exception as e:
@@ -350,6 +555,7 @@ def main(clients, inputString):
                     while len(clients) < NUM_CLIENTS:
                         conn, addr = server_sock.accept()
                         print(f"[S] Client connected: {addr}")
+                        negotiate_encodings(conn, addr)
                         clients.append((conn, addr))
                 finally:
                     break
@@ -357,19 +563,16 @@ def main(clients, inputString):
                 message = " ".join(parts[1:])
                 print(f"[S] Generating image for text: '{message}'")
                 try:
-                    run(["python3", "text_to_image.py", message], check=True)
-                    mat = load_matrix_from_db('text')
-                    data = mat.tobytes()
+                    mat = TEXT_FRAME_CACHE.render(message)
+                    data = frame_bytes(mat)
                     print(f"[S] Segment send 'text' → {len(data)}B")
                     send_segmented(clients, data)
-                except CalledProcessError as e:
-                    print(f"[S] text_to_image.py error: {e}")
                 except Exception as e:
                     print(f"[S] Error sending text image: {e}")
                 break
 
         else:
-            print("Usage: LIST | LOAD <name> | SEND <name> | SHOW <name> | INCREASE | DECREASE | TEXT <message>")
+            print("Usage: LIST [refresh] | LOAD <name> | SEND <name> | SHOW <name> | INCREASE [n] | DECREASE [n] | BRIGHTNESS <name> <level> | TEXT <message>")
 
 
 
@@ -0,0 +1,601 @@
+"""
+asyncio transport for the wall.
+
+The threaded path (Server_Code1 + dispatcher) blocks on `accept` in its own
+thread and starts one OS thread per panel for every SEGMENT/LOAD send, then
+joins them. AsyncWall does the same work on a single event loop: accepting
+panels, encoding negotiation, segment sends and their ACKs, the READY/GO
+barrier, LIST and broadcasts. Every panel read has its own timeout
+(WISE_PANEL_*_TIMEOUT), so one silent panel only delays its own coroutine.
+
+The command surface is the one of Server_Code1.main:
+
+    LIST [refresh] | LOAD <name> | SHOW <name> | INCREASE [n] | DECREASE [n]
+    BRIGHTNESS <name> <level> | TEXT <message>
+
+Commands run one at a time (asyncio.Lock); inside a command all panels are
+served concurrently. Other threads use `submit()` / `call()`, which hand the
+command to the loop with run_coroutine_threadsafe. With
+WISE_ASYNC_TRANSPORT=1 the Flask app (controller/shared_state.py) plugs it
+under the dispatcher, so coalescing and debouncing still apply.
+
+Frame loading (SQLite, decoding) runs in asyncio.to_thread to keep the loop
+free; segment encoding is a few ms of numpy and runs on the loop.
+"""
+import os
+import time
+import asyncio
+import threading
+
+from scripts_tcp.Server_Code1 import (
+    NUM_CLIENTS, PORT, SEGMENT_ORDER, CURRENT_IMAGE,
+    load_brightness_frame, store_brightness, current_brightness, prepare_load,
+)
+from scripts_tcp.frame_store import frame_bytes, holding, payload_view
+from scripts_tcp.segment_cache import segments_for
+from scripts_tcp.delta import DELTA_ENABLED, DELTA_MAX_RATIO, DELTA_TRACKER, diff_runs, encode_delta
+from scripts_tcp.text_cache import TEXT_FRAME_CACHE
+from scripts_tcp.codec import NEGOTIATE, RAW, LAST_SEND_STATS, SendStats, encode_segment, parse_capabilities
+from scripts_tcp.wire import VERSION, DATA, PanelLink, frame_header, message_parts, start_transfer
+from scripts_tcp.window import CHUNK_SIZE, WindowTransfer
+from scripts_tcp.barrier import BARRIER_STATS, GO_TIMEOUT
+from scripts_tcp.catalog import PANEL_CATALOG
+from scripts_tcp.brightness import SOFT_BRIGHTNESS, step_level
+
+ACK_TIMEOUT       = float(os.getenv("WISE_PANEL_ACK_TIMEOUT", "10"))
+LIST_TIMEOUT      = float(os.getenv("WISE_PANEL_LIST_TIMEOUT", "5"))
+NEGOTIATE_TIMEOUT = 1.0
+SEND_RETRIES      = 2
+
+USAGE = ("Usage: LIST [refresh] | LOAD <name> | SHOW <name> | INCREASE [n] | DECREASE [n] | "
+         "BRIGHTNESS <name> <level> | TEXT <message>")
+
+
+class AsyncPanel:
+    """One connected panel: its streams, segment index and negotiated encodings."""
+
+    def __init__(self, reader, writer, segment_order=SEGMENT_ORDER):
+        self.reader    = reader
+        self.writer    = writer
+        self.addr      = writer.get_extra_info("peername")[:2]
+        self.index     = _segment_index(self.addr, segment_order)
+        self.encodings = set()
+        self.link      = PanelLink()   # framing, seq y respuestas pendientes (wire.py)
+
+    async def send(self, *chunks, timeout=ACK_TIMEOUT):
+        if self.writer.is_closing():
+            raise ConnectionError("connection closed")
+        for chunk in chunks:
+            self.writer.write(chunk)
+        await asyncio.wait_for(self.writer.drain(), timeout)
+
+    async def send_message(self, header, body=b"", timeout=ACK_TIMEOUT):
+        """
+        Header line + body, framed if the panel negotiated it; returns the seq
+        (or None), or the WindowTransfer that wait_ack() completes.
+        """
+        transfer = start_transfer(self.link, header, body)
+        if transfer is not None:
+            await self._pump(transfer, timeout)
+            return transfer
+        prefix, seq = message_parts(self.link, header, body)
+        await self.send(prefix + header, body, timeout=timeout)
+        return seq
+
+    async def _pump(self, transfer, timeout=ACK_TIMEOUT):
+        for i in transfer.due(time.monotonic()):
+            line, body = transfer.chunk(i)
+            await self.send(frame_header(DATA, transfer.xfer, line, body) + line, body, timeout=timeout)
+
+    async def _finish(self, transfer, timeout):
+        """Same as wire.finish_transfer, on the loop."""
+        deadline = time.monotonic() + timeout
+        while not transfer.done:
+            now = time.monotonic()
+            if now >= deadline:
+                raise asyncio.TimeoutError()
+            await self._pump(transfer)
+            try:
+                text, rseq = await self.read_reply(min(max(transfer.next_timeout(now), 0.001), deadline - now))
+            except asyncio.TimeoutError:
+                continue
+            if rseq == transfer.xfer and text.startswith("SACK:"):
+                transfer.on_sack(bytes.fromhex(text[5:]))
+        if transfer.retransmits:
+            print(f"[S] Transfer {transfer.xfer} to {self.addr}: {transfer.count} chunks, "
+                  f"{transfer.retransmits} resent")
+        return "ACK"
+
+    async def read_reply(self, timeout):
+        """Next (text, seq) reply, whatever way TCP split or merged it."""
+        loop     = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            reply = self.link.pop()
+            if reply is not None:
+                return reply
+            chunk = await asyncio.wait_for(self.reader.read(4096), max(deadline - loop.time(), 0))
+            if not chunk:
+                raise ConnectionError("panel closed the connection")
+            self.link.feed(chunk)
+
+    async def reply(self, timeout):
+        text, _ = await self.read_reply(timeout)
+        return text
+
+    async def wait_ack(self, seq, timeout):
+        """Same rules as wire.wait_ack."""
+        if isinstance(seq, WindowTransfer):
+            return await self._finish(seq, timeout)
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            text, rseq = await self.read_reply(max(deadline - asyncio.get_running_loop().time(), 0))
+            if seq is None or (text in ("ACK", "NAK") and rseq == seq):
+                return text
+
+    def close(self):
+        self.writer.close()
+
+
+def _segment_index(addr, segment_order):
+    try:
+        return segment_order.get(int(addr[0].split('.')[-1]))
+    except ValueError:
+        return None
+
+
+class AsyncWall:
+    def __init__(self, host="", port=PORT, num_clients=NUM_CLIENTS, segment_order=SEGMENT_ORDER):
+        self.host          = host
+        self.port          = port
+        self.num_clients   = num_clients
+        self.segment_order = segment_order
+        self.panels        = []
+        self._loop         = None
+        self._lock         = None   # asyncio.Lock, creado dentro del loop
+        self._stopping     = None
+        self._ready        = threading.Event()
+        self._thread       = None
+        self._start_lock   = threading.Lock()
+        self._error        = None
+
+    # --- API para otros hilos ---
+
+    def start(self):
+        """Runs the loop on a background thread (only once); returns once it is listening."""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._ready.clear()
+                self._error  = None
+                self._thread = threading.Thread(target=self._run_loop, name="wise-asyncio", daemon=True)
+                self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def serve(self):
+        """Starts the loop if it is not running yet and blocks until stop()."""
+        self.start()
+        self._thread.join()
+
+    def _run_loop(self):
+        try:
+            asyncio.run(self._serve())
+        except BaseException as e:
+            # p. ej. EADDRINUSE en el bind: start() lo relanza en vez de esperar para siempre
+            self._error = e
+        finally:
+            self._ready.set()
+
+    def submit(self, command):
+        """Queues a command on the loop; returns a concurrent Future with its result."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self.run_command(command), self._loop)
+
+    def call(self, command, timeout=None):
+        return self.submit(command).result(timeout)
+
+    def count(self):
+        return len(self.panels)
+
+    def stop(self):
+        if self._loop is not None and self._stopping is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(5)
+
+    # --- Event loop ---
+
+    async def _serve(self):
+        self._loop     = asyncio.get_running_loop()
+        self._lock     = asyncio.Lock()
+        self._stopping = asyncio.Event()
+        server = await asyncio.start_server(self._accept, self.host, self.port,
+                                            backlog=max(self.num_clients, 16))
+        self.port = server.sockets[0].getsockname()[1]
+        print(f"[S] Listening (asyncio) on port {self.port} for {self.num_clients} clients…")
+        self._ready.set()
+        try:
+            await self._stopping.wait()
+        finally:
+            server.close()
+            self._close_all()
+            await server.wait_closed()
+            print("[S] Server closed.")
+
+    async def _accept(self, reader, writer):
+        panel = AsyncPanel(reader, writer, self.segment_order)
+        print(f"[S] Client connected: {panel.addr}")
+        await self._negotiate(panel)
+        PANEL_CATALOG.forget(panel.addr[0])
+        async with self._lock:
+            # Un panel que se reconecta sustituye a su conexión anterior
+            for old in [p for p in self.panels if p.addr[0] == panel.addr[0]]:
+                self._drop(old)
+            self.panels.append(panel)
+        if len(self.panels) == self.num_clients:
+            print("[S] Ready. Commands: LIST | LOAD <name> | SHOW <name> | INCREASE | DECREASE | TEXT <message>")
+
+    async def _negotiate(self, panel):
+        framing = 0
+        if not NEGOTIATE:
+            return
+        try:
+            await panel.send(b"ENCODINGS?\n", timeout=NEGOTIATE_TIMEOUT)
+            reply = await asyncio.wait_for(panel.reader.read(256), NEGOTIATE_TIMEOUT)
+            reply = reply.decode(errors="ignore").strip()
+            if reply.startswith("ENCODINGS:"):
+                caps = parse_capabilities(reply)
+                panel.encodings, framing = caps["ENCODINGS"], caps["FRAMING"]
+            if framing == VERSION:
+                await panel.send(f"FRAMING:{VERSION}\n".encode(), timeout=NEGOTIATE_TIMEOUT)
+                link = panel.link
+                link.framed, link.window, link.chunk_size = True, caps["WINDOW"], caps["CHUNK"] or CHUNK_SIZE
+        except (asyncio.TimeoutError, OSError):
+            pass
+        print(f"[S] {panel.addr} encodings: {', '.join(sorted(panel.encodings)) or RAW}"
+              + (f", framing v{framing}" if panel.link.framed else ""))
+
+    def _drop(self, panel):
+        if panel in self.panels:
+            self.panels.remove(panel)
+            PANEL_CATALOG.forget(panel.addr[0])
+        DELTA_TRACKER.forget(panel.index)
+        panel.close()
+
+    def _close_all(self):
+        for panel in list(self.panels):
+            self._drop(panel)
+
+    def _ordered(self):
+        ordered = [None] * self.num_clients
+        for panel in self.panels:
+            if panel.index is not None and panel.index < self.num_clients:
+                ordered[panel.index] = panel
+        return ordered
+
+    # --- Comandos (misma sintaxis que Server_Code1.main) ---
+
+    async def run_command(self, command):
+        async with self._lock:
+            return await self._run(command)
+
+    async def _run(self, command):
+        parts = command.strip().split()
+        if not parts:
+            return None
+        cmd = parts[0].upper()
+
+        if cmd == "LIST":
+            common = await self.list_images(refresh=len(parts) > 1 and parts[1].lower() == "refresh")
+            print("[S] Common:", common or "(none)")
+            return common
+
+        if cmd == "LOAD" and len(parts) == 2:
+            name = parts[1]
+            try:
+                data = await asyncio.to_thread(prepare_load, name)
+            except Exception as e:
+                print(f"[S] Load error: {e}")
+                return None
+            print(f"[S] Load & distribute '{name}' → {len(data)}B")
+            await self.send_full(name, data)
+            return None
+
+        if cmd == "SHOW" and len(parts) == 2:
+            await self.show_image(parts[1])
+            CURRENT_IMAGE.update(name=parts[1], level=None)
+            return None
+
+        if cmd in ("INCREASE", "DECREASE"):
+            steps = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+            if SOFT_BRIGHTNESS and CURRENT_IMAGE["name"]:
+                try:
+                    return await self.step_brightness(steps if cmd == "INCREASE" else -steps)
+                except Exception as e:
+                    print(f"[S] Brightness error: {e}")
+                    return None
+            for _ in range(steps):
+                await self.broadcast(cmd.lower())
+            return None
+
+        if cmd == "BRIGHTNESS" and len(parts) == 3:
+            try:
+                return await self.send_brightness(parts[1], float(parts[2]))
+            except Exception as e:
+                print(f"[S] Brightness error: {e}")
+            return None
+
+        if cmd == "TEXT" and len(parts) >= 2:
+            if len(parts) > 2 and parts[2] == "off":
+                self._close_all()
+                print("[S] Todas las conexiones han sido cerradas.")
+            elif len(parts) > 2 and parts[2] == "on":
+                # El loop acepta paneles siempre; no hace falta reabrir el socket
+                print(f"[S] Accepting panels on port {self.port} ({len(self.panels)}/{self.num_clients})")
+            else:
+                message = " ".join(parts[1:])
+                print(f"[S] Generating image for text: '{message}'")
+                try:
+                    mat  = await asyncio.to_thread(TEXT_FRAME_CACHE.render, message)
+                    data = frame_bytes(mat)
+                    print(f"[S] Segment send 'text' → {len(data)}B")
+                    await self.send_segmented(data)
+                except Exception as e:
+                    print(f"[S] Error sending text image: {e}")
+            return None
+
+        print(USAGE)
+        return None
+
+    # --- Envíos ---
+
+    async def broadcast(self, cmd):
+        async def one(panel):
+            try:
+                await panel.send_message((cmd + "\n").encode())
+                print(f"[S]→{panel.addr}: {cmd}")
+            except (asyncio.TimeoutError, OSError) as e:
+                print(f"[S] Error sending '{cmd}' to {panel.addr}: {e}")
+                self._drop(panel)
+        await asyncio.gather(*(one(p) for p in list(self.panels)))
+
+    async def _send_encoded(self, panel, segment, raw_header, z_prefix, stats):
+        enc, secs = RAW, 0.0
+        if panel.encodings:
+            enc, payload, secs = encode_segment(segment, panel.encodings)
+        if enc == RAW:
+            seq  = await panel.send_message(raw_header, segment)
+            wire = len(segment)
+        else:
+            seq  = await panel.send_message(f"{z_prefix}:{enc}:{len(payload)}\n".encode(), payload)
+            wire = len(payload)
+        stats.record(enc, len(segment), wire, secs)
+        return enc, wire, seq
+
+    async def _send_segment(self, panel, idx, offset, length, data, delta, stats):
+        segment = payload_view(data)[offset:offset+length]
+        acked   = False
+        try:
+            runs = None
+            if delta:
+                previous = DELTA_TRACKER.previous(idx, panel, offset, length)
+                if previous is not None:
+                    runs = diff_runs(previous, segment)
+                    if sum(ln for _, ln in runs) > length * DELTA_MAX_RATIO:
+                        runs = None
+
+            t0 = time.time()
+            if runs is not None:
+                header, payload = encode_delta(offset, length, runs, segment)
+                seq = await panel.send_message(header, payload)
+                kind, sent = f"DELTA {len(runs)} runs", len(payload)
+                stats.record("DELTA", length, sent, 0.0)
+            else:
+                kind, sent, seq = await self._send_encoded(panel, segment, f"SEGMENT:{offset}:{length}\n".encode(),
+                                                           f"SEGMENT_Z:{offset}:{length}", stats)
+            t1 = time.time()
+            print(f"[S]→{panel.addr} idx={idx} {kind} {sent}/{length}B in {t1-t0:.2f}s "
+                  f"→ {(sent*8)/max(t1-t0, 1e-6)/1e6:.2f}Mbps")
+
+            ack = await panel.wait_ack(seq, ACK_TIMEOUT)
+            print(f"[S] ACK from {panel.addr} idx={idx}: {ack}")
+            acked = ack == "ACK"
+        except asyncio.TimeoutError:
+            print(f"[S] No ACK (timeout) from {panel.addr} idx={idx}")
+        except OSError as e:
+            print(f"[S] Error sending segment to {panel.addr} idx={idx}: {e}")
+            self._drop(panel)
+        finally:
+            # Solo se usa como base para el próximo delta lo que el panel confirmó
+            # (sin delta no se copia el segmento; la base anterior deja de valer)
+            if delta and acked:
+                DELTA_TRACKER.acked(idx, panel, offset, segment)
+            else:
+                DELTA_TRACKER.forget(idx)
+        return acked
+
+    async def send_segmented(self, data, delta=DELTA_ENABLED):
+        stats    = SendStats("SEGMENTED")
+        with holding(data):
+            segments = segments_for(data, self.num_clients)
+            ordered  = self._ordered()
+            for idx in range(self.num_clients):
+                if ordered[idx] is None:
+                    print(f"[S] No client for idx={idx}")
+
+            # 1) envío inicial + hasta SEND_RETRIES reintentos de los que no confirmaron
+            pending = [i for i in range(self.num_clients) if ordered[i] is not None]
+            for attempt in range(SEND_RETRIES + 1):
+                if attempt:
+                    print(f"[S] Retry {attempt} for missing: {pending}")
+                results = await asyncio.gather(*(
+                    self._send_segment(ordered[i], i, *segments[i], data, delta, stats) for i in pending))
+                pending = [i for i, ok in zip(pending, results) if not ok and ordered[i] in self.panels]
+                if not pending:
+                    break
+        stats.report()
+        LAST_SEND_STATS["SEGMENTED"] = stats
+
+        # 2) READY/GO, 3) SHOW_TEMP & CLEAR_BUFFER
+        await self.ready_go()
+        await self.broadcast("SHOW_TEMP")
+        await self.broadcast("CLEAR_BUFFER")
+
+    async def ready_go(self):
+        """
+        Sends READY and waits (GO_TIMEOUT) for the GO of every panel with a
+        segment index; returns the indices that answered, as soon as all of
+        them did. Latencies go to BARRIER_STATS like in the threaded path.
+        """
+        t0 = time.monotonic()
+        for panel in self.panels:
+            panel.link.late_go = False
+        await self.broadcast("READY")
+        expected = set(range(self.num_clients))
+        panels   = [p for p in self.panels if p.index in expected]
+        go       = {}
+        all_go   = asyncio.Event()
+
+        async def wait_go(panel):
+            try:
+                while await panel.reply(max(t0 + GO_TIMEOUT - time.monotonic(), 0)) != "GO":
+                    pass
+            except (asyncio.TimeoutError, OSError):
+                return
+            go[panel.index] = time.monotonic() - t0
+            print(f"[S] GO from {panel.addr}")
+            if expected <= set(go):
+                all_go.set()
+
+        waiters = [asyncio.create_task(wait_go(p)) for p in panels]
+        if waiters:
+            # Termina con el último GO esperado, o cuando todos respondieron o vencieron
+            done_all = asyncio.create_task(all_go.wait())
+            await asyncio.wait([asyncio.gather(*waiters), done_all], return_when=asyncio.FIRST_COMPLETED)
+            for task in (*waiters, done_all):
+                task.cancel()
+        # GOs sin leer o que lleguen tarde no deben pasar por el ACK del próximo envío
+        for panel in self.panels:
+            panel.link.end_barrier(panel.index in go)
+        go_set  = set(go)
+        missing = expected - go_set
+        BARRIER_STATS.record(time.monotonic() - t0, go, missing)
+        if not missing:
+            print("[S] All GO received.")
+        else:
+            print(f"[S] Missing GOs: {missing}")
+        return go_set
+
+    async def _load_segment(self, panel, idx, name, offset, length, data, stats):
+        try:
+            t0 = time.time()
+            enc, sent, seq = await self._send_encoded(panel, payload_view(data)[offset:offset+length],
+                                                 f"LOAD_IMAGE:{name}:{length}\n".encode(),
+                                                 f"LOAD_IMAGE_Z:{name}:{length}", stats)
+            t1 = time.time()
+            print(f"[S]→{panel.addr} LOAD idx={idx} {enc} {sent}/{length}B in {t1-t0:.2f}s "
+                  f"→ {(sent*8)/max(t1-t0, 1e-6)/1e6:.2f}Mbps")
+            ack = await panel.wait_ack(seq, ACK_TIMEOUT)
+            print(f"[S] ACK from {panel.addr} idx={idx}: {ack}")
+            if ack == "ACK":
+                PANEL_CATALOG.add(panel.addr[0], name)
+            return ack == "ACK"
+        except asyncio.TimeoutError:
+            print(f"[S] No ACK (timeout) from {panel.addr} idx={idx}")
+        except OSError as e:
+            print(f"[S] Error during LOAD for {panel.addr} idx={idx}: {e}")
+            self._drop(panel)
+        return False
+
+    async def send_full(self, name, data, only=None):
+        """LOAD en todos los paneles, o solo en los de IP en `only`."""
+        stats    = SendStats(f"LOAD {name}")
+        with holding(data):
+            segments = segments_for(data, self.num_clients)
+            jobs     = []
+            for idx, panel in enumerate(self._ordered()):
+                if only is not None and (panel is None or panel.addr[0] not in only):
+                    continue
+                if panel is None:
+                    print(f"[S] No client for LOAD idx={idx}")
+                else:
+                    jobs.append(self._load_segment(panel, idx, name, *segments[idx], data, stats))
+            results = await asyncio.gather(*jobs)
+        stats.report()
+        LAST_SEND_STATS["LOAD"] = stats
+        return sum(results)
+
+    async def _receive_list(self, panel):
+        """The panel's images, or None if it did not send a full list in time."""
+        try:
+            return await asyncio.wait_for(self._read_list(panel), LIST_TIMEOUT)
+        except (asyncio.TimeoutError, OSError):
+            return None
+
+    async def _read_list(self, panel):
+        if await panel.reply(LIST_TIMEOUT) != "IMAGES:":
+            return None
+        names = set()
+        while True:
+            line = await panel.reply(LIST_TIMEOUT)
+            if line == "END_IMAGES":
+                return names
+            names.add(line)
+
+    async def list_images(self, refresh=False):
+        """Same as Server_Code1.list_images_from_all_clients: catalog first, then the panels."""
+        panels = list(self.panels)
+        if not refresh:
+            common = PANEL_CATALOG.common([p.addr[0] for p in panels])
+            if common is not None:
+                print(f"[S] LIST from catalog ({len(panels)} panels)")
+                return common
+
+        await self.broadcast("LIST_IMAGES")
+        results = await asyncio.gather(*(self._receive_list(p) for p in panels))
+        common  = None
+        for panel, names in zip(panels, results):
+            print(f"[S] {panel.addr} has {names if names is not None else '(no reply)'}")
+            if names is None:
+                PANEL_CATALOG.forget(panel.addr[0])
+                names = set()
+            else:
+                PANEL_CATALOG.replace(panel.addr[0], names)
+            common = names if common is None else (common & names)
+        return common or set()
+
+    async def show_image(self, name):
+        """SHOW_IMAGE to all; panels the catalog knows lack `name` get it loaded first."""
+        lacking = set(PANEL_CATALOG.lacking([p.addr[0] for p in self.panels], name))
+        if lacking:
+            print(f"[S] '{name}' missing on {sorted(lacking)}, loading it first")
+            try:
+                data = await asyncio.to_thread(prepare_load, name)
+                await self.send_full(name, data, only=lacking)
+            except Exception as e:
+                print(f"[S] Load error: {e}")
+        await self.broadcast(f"SHOW_IMAGE:{name}")
+
+    # --- Brillo por software ---
+
+    async def send_brightness(self, name, level=None):
+        level, frame = await asyncio.to_thread(load_brightness_frame, name, level)
+        data = frame_bytes(frame)
+        print(f"[S] Brightness '{name}' → {level:.1f} ({len(data)}B)")
+        await self.send_segmented(data)
+        CURRENT_IMAGE.update(name=name, level=level)
+        return level
+
+    async def step_brightness(self, steps):
+        name    = CURRENT_IMAGE["name"]
+        current = CURRENT_IMAGE["level"]
+        if current is None:
+            current = await asyncio.to_thread(current_brightness, name)
+        level = step_level(current, steps)
+        if level == current:
+            print(f"[S] Brightness '{name}' already at {level:.1f}")
+            return level
+        await asyncio.to_thread(store_brightness, name, level)
+        return await self.send_brightness(name, level)
@@ -0,0 +1,131 @@
+"""
+READY/GO barrier over all panel sockets at once.
+
+The old loop polled the panels one by one with settimeout(1.0) + recv(64)
+and slept 0.1 s per round, so one silent panel delayed everybody else's GO
+by a second per round. ready_go_barrier() waits on every socket with one
+selector (epoll on Linux) and returns as soon as the last expected GO is in,
+or at GO_TIMEOUT. Replies go through the per-socket buffer of wire.py, so a
+GO that arrived together with the ACK is not lost; GOs left unread when the
+barrier ends (late, or from panels without an index) are discarded there.
+
+Each barrier is recorded in BARRIER_STATS (latency of the whole barrier and
+of each panel's GO), see GET /api/image/panels.
+"""
+import os
+import time
+import selectors
+import threading
+from collections import deque
+
+from scripts_tcp.wire import link_for
+
+GO_TIMEOUT      = float(os.getenv("WISE_PANEL_GO_TIMEOUT", "5"))
+BARRIER_HISTORY = 100
+
+
+class BarrierStats:
+    def __init__(self, history=BARRIER_HISTORY):
+        self.count    = 0
+        self.complete = 0
+        self.last     = None
+        self._latency = deque(maxlen=history)   # segundos por barrera
+        self._lock    = threading.Lock()
+
+    def record(self, latency, per_panel, missing):
+        with self._lock:
+            self.count    += 1
+            self.complete += not missing
+            self._latency.append(latency)
+            self.last = {
+                "latency_ms": round(latency * 1000, 2),
+                "go_ms": {str(k): round(v * 1000, 2) for k, v in sorted(per_panel.items())},
+                "missing": sorted(missing),
+            }
+
+    def stats(self):
+        with self._lock:
+            lat = sorted(self._latency)
+        pct = lambda p: round(lat[min(int(p * len(lat)), len(lat) - 1)] * 1000, 2) if lat else 0.0
+        return {
+            "barriers": self.count,
+            "complete": self.complete,
+            "latency_ms_avg": round(sum(lat) / len(lat) * 1000, 2) if lat else 0.0,
+            "latency_ms_p50": pct(0.50),
+            "latency_ms_p95": pct(0.95),
+            "latency_ms_max": round(lat[-1] * 1000, 2) if lat else 0.0,
+            "last": self.last,
+        }
+
+
+BARRIER_STATS = BarrierStats()
+
+
+def ready_go_barrier(clients, index_of, expected, timeout=GO_TIMEOUT, t0=None):
+    """
+    Waits for GO from the panels in `clients` ([(conn, addr)]); `index_of(addr)`
+    gives the segment index (None to ignore the panel). Returns the set of
+    indices that answered once all of `expected` did, or at `timeout`.
+    `t0` is when READY went out (default: now).
+    """
+    t0       = time.monotonic() if t0 is None else t0
+    deadline = t0 + timeout
+    go       = {}                       # índice -> latencia del GO
+    waiting  = {}                       # socket -> (addr, índice)
+    for conn, addr in clients:
+        link_for(conn).late_go = False   # READY ya salió: el próximo GO es de esta barrera
+        idx = index_of(addr)
+        if idx is not None:
+            waiting[conn] = (addr, idx)
+
+    def drain(conn):
+        addr, idx = waiting[conn]
+        link = link_for(conn)
+        reply = link.pop()
+        while reply is not None:
+            if reply[0] == "GO":
+                go[idx] = time.monotonic() - t0
+                print(f"[S] GO from {addr}")
+                return True
+            reply = link.pop()
+        return False
+
+    sel = selectors.DefaultSelector()
+    try:
+        for conn in list(waiting):
+            if drain(conn):
+                del waiting[conn]
+                continue
+            try:
+                sel.register(conn, selectors.EVENT_READ)
+            except (ValueError, OSError, AttributeError):
+                del waiting[conn]          # socket cerrado o conexión falsa
+
+        while waiting and not set(expected) <= set(go):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for key, _ in sel.select(remaining):
+                conn = key.fileobj
+                try:
+                    chunk = conn.recv(4096)
+                except (BlockingIOError, InterruptedError):
+                    continue
+                except OSError:
+                    chunk = b""
+                if chunk:
+                    link_for(conn).feed(chunk)
+                if not chunk or drain(conn):
+                    sel.unregister(conn)
+                    del waiting[conn]
+    finally:
+        sel.close()
+        # GOs sin leer o que lleguen tarde no deben pasar por el ACK del próximo envío
+        for conn, addr in clients:
+            idx = index_of(addr)
+            link_for(conn).end_barrier(idx is not None and idx in go)
+
+    latency = time.monotonic() - t0
+    missing = set(expected) - set(go)
+    BARRIER_STATS.record(latency, go, missing)
+    return set(go)
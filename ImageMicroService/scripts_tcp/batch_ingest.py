@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Bulk image ingestion into the image database.
+
+    python3 scripts_tcp/batch_ingest.py ~/slides/ "~/photos/*.jpg" --user-id 1
+
+Decoding, resizing to 320x640 and RGB565 conversion run in a process pool;
+the parent writes each frame (frame_format) into `images` as soon as it
+arrives, all within a single transaction, and reports the throughput in
+images/second. At most PENDING_PER_WORKER frames per process are queued at
+a time, so memory does not grow with the batch. Frames go through
+blob_store, so re-ingesting the same pictures does not duplicate the data.
+"""
+import os
+import sys
+import glob
+import time
+import sqlite3
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts_tcp.image import image_to_rgb565, QUALITY_MODES
+from scripts_tcp.frame_format import encode_frame
+from scripts_tcp import blob_store
+from scripts_tcp.blob_store import DB_PATH
+
+# Frames convertidos que pueden esperar a ser escritos, por proceso
+PENDING_PER_WORKER = 4
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp", ".tif", ".tiff")
+
+
+def collect_inputs(sources):
+    """Expands directories and glob patterns into a sorted list of image files."""
+    paths = set()
+    for source in sources:
+        source = os.path.expanduser(source)
+        if os.path.isdir(source):
+            for entry in os.listdir(source):
+                if entry.lower().endswith(IMAGE_EXTS):
+                    paths.add(os.path.join(source, entry))
+        else:
+            paths.update(p for p in glob.glob(source) if os.path.isfile(p))
+    return sorted(paths)
+
+
+def convert_one(path, quality="high"):
+    """Worker: returns (image_name, frame blob, error message)."""
+    name = os.path.basename(path)
+    try:
+        return name, encode_frame(image_to_rgb565(path, quality=quality)), None
+    except Exception as e:
+        return name, None, str(e)
+
+
+def _convert_all(pool, paths, quality, max_pending):
+    """convert_one over `paths`, in order, with at most `max_pending` frames queued or waiting to be stored."""
+    pending = deque()
+    for path in paths:
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+        pending.append(pool.submit(convert_one, path, quality))
+    while pending:
+        yield pending.popleft().result()
+
+
+def ingest(paths, user_id=1, db_path=DB_PATH, workers=None, replace=False, brightness_level=1.0,
+           quality="high"):
+    """Converts `paths` in parallel and stores them; returns (stored, failed, seconds)."""
+    t0 = time.perf_counter()
+    stored, failed, replaced = 0, [], set()
+    workers = workers or os.cpu_count() or 1
+    conn = sqlite3.connect(db_path)
+    try:
+        blob_store.migrate(conn)
+        with conn, ProcessPoolExecutor(max_workers=workers) as pool:
+            for name, blob, error in _convert_all(pool, paths, quality, workers * PENDING_PER_WORKER):
+                if error:
+                    print(f"[I] Skipping {name}: {error}")
+                    failed.append(name)
+                    continue
+                if replace and name not in replaced:
+                    for (digest,) in conn.execute("SELECT blob_hash FROM images WHERE image_name = ?", (name,)).fetchall():
+                        blob_store.release_blob(conn, digest)
+                    conn.execute("DELETE FROM images WHERE image_name = ?", (name,))
+                    replaced.add(name)
+                conn.execute(
+                    "INSERT INTO images (user_id, image_name, brightness_level, blob_hash) VALUES (?, ?, ?, ?)",
+                    (user_id, name, brightness_level, blob_store.put_blob(conn, blob))
+                )
+                stored += 1
+    finally:
+        conn.close()
+    return stored, failed, time.perf_counter() - t0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-ingest images into the WISE image database.")
+    parser.add_argument("sources", nargs="+", help="Directories or glob patterns with images")
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database (default: controller/instance)")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: CPU count)")
+    parser.add_argument("--replace", action="store_true", help="Replace rows with the same image name")
+    parser.add_argument("--quality", choices=sorted(QUALITY_MODES), default="high",
+                        help="Decode/resample quality (JPEG draft mode unless 'exact')")
+    args = parser.parse_args(argv)
+
+    paths = collect_inputs(args.sources)
+    if not paths:
+        print("[I] No images found.")
+        return 1
+
+    print(f"[I] Ingesting {len(paths)} images into {os.path.abspath(args.db)}…")
+    stored, failed, secs = ingest(paths, args.user_id, args.db, args.workers, args.replace,
+                                  quality=args.quality)
+    print(f"[I] Stored {stored} images in {secs:.2f}s → {stored / secs:.1f} images/s"
+          + (f" ({len(failed)} failed)" if failed else ""))
+    return 0 if not failed else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
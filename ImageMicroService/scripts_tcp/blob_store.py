@@ -0,0 +1,71 @@
+"""
+Content-addressed storage of image blobs.
+
+Every distinct `image_data` payload is stored once in `image_blobs`, keyed by
+its SHA-256. Rows of `images` point at it through `images.blob_hash` and the
+blob keeps a reference count, so uploading the same file again (under any
+name) only adds a row to `images`, and the blob is deleted when the last
+image that uses it goes away. The hash is also the image version used by the
+frame caches and as the ETag of the image.
+
+These helpers work on plain sqlite3 connections (TCP server, batch tools);
+the REST service does the same through the ImageBlob model.
+"""
+import os
+import hashlib
+
+# Base de datos que comparten el servidor TCP y las herramientas por lotes
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../controller/instance/image_service.db")
+
+BLOB_TABLE = """
+CREATE TABLE IF NOT EXISTS image_blobs (
+    hash     VARCHAR(64) NOT NULL PRIMARY KEY,
+    data     BLOB NOT NULL,
+    size     INTEGER NOT NULL,
+    refcount INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def put_blob(conn, data):
+    """Stores `data` if new and takes one reference; returns its hash."""
+    digest = content_hash(data)
+    conn.execute("INSERT OR IGNORE INTO image_blobs (hash, data, size, refcount) VALUES (?, ?, ?, 0)",
+                 (digest, data, len(data)))
+    conn.execute("UPDATE image_blobs SET refcount = refcount + 1 WHERE hash = ?", (digest,))
+    return digest
+
+
+def release_blob(conn, digest):
+    """Drops one reference to `digest`; deletes the blob when none are left."""
+    if not digest:
+        return
+    conn.execute("UPDATE image_blobs SET refcount = refcount - 1 WHERE hash = ?", (digest,))
+    conn.execute("DELETE FROM image_blobs WHERE hash = ? AND refcount <= 0", (digest,))
+
+
+def migrate(conn):
+    """
+    Adds image_blobs / images.blob_hash to an existing database and moves the
+    inline image_data BLOBs into it (one copy per distinct content). Safe to
+    run on every start: rows that already have a blob_hash are skipped.
+    """
+    with conn:
+        conn.execute(BLOB_TABLE)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(images)")]
+        if "blob_hash" not in columns:
+            conn.execute("ALTER TABLE images ADD COLUMN blob_hash VARCHAR(64) REFERENCES image_blobs (hash)")
+        rows = conn.execute(
+            "SELECT id FROM images WHERE blob_hash IS NULL AND image_data IS NOT NULL"
+        ).fetchall()
+        for (image_id,) in rows:
+            data = conn.execute("SELECT image_data FROM images WHERE id = ?", (image_id,)).fetchone()[0]
+            digest = put_blob(conn, bytes(data))
+            conn.execute("UPDATE images SET blob_hash = ?, image_data = NULL WHERE id = ?", (digest, image_id))
+    if rows:
+        print(f"[S] Moved {len(rows)} image BLOBs into image_blobs")
+    return len(rows)
@@ -0,0 +1,146 @@
+"""
+Server-side brightness for RGB565 frames.
+
+A brightness level (0.1 .. 1.0, in BRIGHTNESS_STEP steps) maps to a 64K-entry
+lookup table that takes every possible RGB565 pixel to its scaled value, so
+dimming a 320x640 frame is a single `np.take` instead of unpacking, scaling
+and repacking three channels.
+
+Dimmed frames are kept per image by BrightnessVariants: every request counts
+one use of (image, level) and only the BRIGHTNESS_VARIANTS most used levels of
+each image stay in memory, so the levels a user keeps going back to with the
+finger up / finger down gestures are swapped in without recomputing. Used
+with WISE_SOFT_BRIGHTNESS=true for panels that have no hardware dimming.
+"""
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+
+SOFT_BRIGHTNESS     = os.getenv("WISE_SOFT_BRIGHTNESS", "false").lower() == "true"
+BRIGHTNESS_STEP     = 0.1
+BRIGHTNESS_MIN      = 0.1
+BRIGHTNESS_MAX      = 1.0
+BRIGHTNESS_VARIANTS = int(os.getenv("WISE_BRIGHTNESS_VARIANTS", "4"))
+BRIGHTNESS_CACHE_BYTES = int(os.getenv("WISE_BRIGHTNESS_CACHE_MB", "16")) * 1024 * 1024
+
+
+def clamp_level(level):
+    """Rounds `level` to the BRIGHTNESS_STEP grid inside [MIN, MAX]."""
+    steps = round(float(level) / BRIGHTNESS_STEP)
+    return round(min(max(steps * BRIGHTNESS_STEP, BRIGHTNESS_MIN), BRIGHTNESS_MAX), 2)
+
+
+def step_level(level, steps):
+    """Level after `steps` gestures (positive brighter, negative darker)."""
+    return clamp_level((level if level is not None else BRIGHTNESS_MAX) + steps * BRIGHTNESS_STEP)
+
+
+@lru_cache(maxsize=32)
+def brightness_lut(level):
+    """uint16[65536]: RGB565 pixel -> the same pixel scaled by `level`."""
+    px = np.arange(1 << 16, dtype=np.uint32)
+    r  = np.minimum(np.rint(((px >> 11) & 0x1F) * level), 0x1F).astype(np.uint16)
+    g  = np.minimum(np.rint(((px >> 5) & 0x3F) * level), 0x3F).astype(np.uint16)
+    b  = np.minimum(np.rint((px & 0x1F) * level), 0x1F).astype(np.uint16)
+    lut = (r << 11) | (g << 5) | b
+    lut.setflags(write=False)
+    return lut
+
+
+def apply_brightness(matrix, level, out=None):
+    """Returns `matrix` (RGB565 uint16) scaled by `level`; level 1.0 returns it as is."""
+    level = clamp_level(level)
+    if level >= BRIGHTNESS_MAX:
+        return matrix
+    src = np.asarray(matrix)
+    if src.dtype.byteorder == ">":
+        src = src.astype(np.uint16)
+    return np.take(brightness_lut(level), src, out=out)
+
+
+class BrightnessVariants:
+    """Per-image cache of the most used brightness levels of each frame."""
+
+    def __init__(self, per_image=BRIGHTNESS_VARIANTS, max_bytes=BRIGHTNESS_CACHE_BYTES):
+        self.per_image  = per_image
+        self.max_bytes  = max_bytes
+        self.size_bytes = 0
+        self.hits       = 0
+        self.misses     = 0
+        self._images    = OrderedDict()  # name -> {"version", "uses": {level: n}, "frames": {level: matrix}}
+        self._lock      = threading.Lock()
+
+    def get(self, name, version, matrix, level):
+        """Frame of `name` at `level`, computed from `matrix` only on a miss."""
+        level = clamp_level(level)
+        if level >= BRIGHTNESS_MAX:
+            return matrix
+
+        with self._lock:
+            entry = self._entry(name, version)
+            entry["uses"][level] = entry["uses"].get(level, 0) + 1
+            frame = entry["frames"].get(level)
+            if frame is not None:
+                self.hits += 1
+                return frame
+            self.misses += 1
+
+        frame = apply_brightness(matrix, level)
+        frame.setflags(write=False)
+        with self._lock:
+            entry = self._entry(name, version)
+            if self._keep(entry, level):
+                entry["frames"][level] = frame
+                self.size_bytes += frame.nbytes
+                self._shrink()
+        return frame
+
+    def invalidate(self, name):
+        with self._lock:
+            entry = self._images.pop(name, None)
+            if entry:
+                self.size_bytes -= sum(f.nbytes for f in entry["frames"].values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "images": len(self._images),
+                "variants": sum(len(e["frames"]) for e in self._images.values()),
+                "size_bytes": self.size_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _entry(self, name, version):
+        entry = self._images.get(name)
+        if entry is None or entry["version"] != version:
+            if entry:
+                self.size_bytes -= sum(f.nbytes for f in entry["frames"].values())
+            entry = {"version": version, "uses": {}, "frames": {}}
+            self._images[name] = entry
+        self._images.move_to_end(name)
+        return entry
+
+    def _keep(self, entry, level):
+        # Se queda si entra entre los `per_image` niveles más usados de la imagen
+        frames = entry["frames"]
+        if len(frames) < self.per_image:
+            return True
+        uses   = entry["uses"]
+        victim = min(frames, key=lambda l: uses.get(l, 0))
+        if uses.get(victim, 0) >= uses[level]:
+            return False
+        self.size_bytes -= frames.pop(victim).nbytes
+        return True
+
+    def _shrink(self):
+        # Presupuesto global: se vacían primero las imágenes usadas hace más tiempo
+        while self.size_bytes > self.max_bytes and self._images:
+            _, entry = self._images.popitem(last=False)
+            self.size_bytes -= sum(f.nbytes for f in entry["frames"].values())
+
+
+# Instancia compartida por el servidor TCP
+BRIGHTNESS_VARIANTS_CACHE = BrightnessVariants()
@@ -0,0 +1,63 @@
+"""
+In-memory catalog of the images stored on each panel.
+
+Panels are identified by IP, which is what survives a reconnect. A panel's
+set becomes known from its LIST_IMAGES reply and then grows with every
+LOAD_IMAGE it ACKs, so after the first LIST:
+
+    LIST        answered from memory (LIST refresh asks the panels again)
+    SHOW name   panels known to lack `name` get it loaded first
+
+A panel that reconnects, or does not answer a LIST, is unknown again until
+the next LIST; with unknown panels the server behaves as before.
+"""
+import threading
+
+
+class PanelCatalog:
+    def __init__(self):
+        self._images = {}   # ip -> set de nombres (solo paneles conocidos)
+        self._lock   = threading.Lock()
+
+    def replace(self, ip, names):
+        """Full inventory from a LIST_IMAGES reply."""
+        with self._lock:
+            self._images[ip] = set(names)
+
+    def add(self, ip, name):
+        """A LOAD_IMAGE the panel ACKed (ignored while the panel is unknown)."""
+        with self._lock:
+            if ip in self._images:
+                self._images[ip].add(name)
+
+    def forget(self, ip):
+        with self._lock:
+            self._images.pop(ip, None)
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+
+    def has(self, ip, name):
+        """True/False, or None when the panel's inventory is unknown."""
+        with self._lock:
+            names = self._images.get(ip)
+            return None if names is None else name in names
+
+    def common(self, ips):
+        """Images on every panel in `ips`, or None if any of them is unknown."""
+        with self._lock:
+            if not ips or any(ip not in self._images for ip in ips):
+                return None
+            return set.intersection(*(self._images[ip] for ip in ips))
+
+    def lacking(self, ips, name):
+        """The panels in `ips` known not to have `name`."""
+        return [ip for ip in ips if self.has(ip, name) is False]
+
+    def to_dict(self):
+        with self._lock:
+            return {ip: sorted(names) for ip, names in sorted(self._images.items())}
+
+
+PANEL_CATALOG = PanelCatalog()
@@ -0,0 +1,74 @@
+"""
+Coalescing of panel commands waiting in the dispatcher queue.
+
+Gestures can arrive many times per second, and every INCREASE or SHOW
+costs a broadcast (or a whole frame with software brightness). Before the
+dispatcher runs the next command it merges what is still queued behind it:
+
+    INCREASE, INCREASE, DECREASE, INCREASE   ->  INCREASE 2
+    INCREASE, DECREASE                       ->  (nothing)
+    SHOW a, SHOW b, SHOW c                   ->  SHOW c
+    BRIGHTNESS a 0.5, BRIGHTNESS a 0.7       ->  BRIGHTNESS a 0.7
+
+Only adjacent commands are merged, so the order of different kinds of
+commands never changes. Each command class also has a minimum interval
+between two sends (MIN_INTERVALS, WISE_MIN_INTERVAL_<CLASS>_MS); while the
+head of the queue waits for it, newer commands keep merging into it, so
+the wall always gets the latest intent instead of a backlog.
+"""
+import os
+
+STEP_COMMANDS = ("INCREASE", "DECREASE")
+
+COMMAND_CLASSES = {
+    "INCREASE": "brightness",
+    "DECREASE": "brightness",
+    "BRIGHTNESS": "brightness",
+    "SHOW": "show",
+}
+
+MIN_INTERVALS = {
+    "brightness": int(os.getenv("WISE_MIN_INTERVAL_BRIGHTNESS_MS", "150")) / 1000.0,
+    "show": int(os.getenv("WISE_MIN_INTERVAL_SHOW_MS", "300")) / 1000.0,
+}
+
+
+def command_class(command):
+    """'brightness', 'show' or None for commands that are never debounced."""
+    parts = command.split() if command else []
+    return COMMAND_CLASSES.get(parts[0].upper()) if parts else None
+
+
+def brightness_steps(command):
+    """Signed number of steps of an INCREASE [n] / DECREASE [n] command, else None."""
+    parts = command.split() if command else []
+    if not parts or parts[0].upper() not in STEP_COMMANDS:
+        return None
+    count = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+    return count if parts[0].upper() == "INCREASE" else -count
+
+
+def step_command(steps):
+    """Command for a net number of steps (None when they cancel out)."""
+    if steps == 0:
+        return None
+    word = "INCREASE" if steps > 0 else "DECREASE"
+    return word if abs(steps) == 1 else f"{word} {abs(steps)}"
+
+
+def merge(prev, command):
+    """
+    Returns the command that replaces `prev` followed by `command`, "" when
+    both cancel out, or None if they cannot be merged.
+    """
+    if not prev or not command:
+        return None
+    a, b = brightness_steps(prev), brightness_steps(command)
+    if a is not None and b is not None:
+        return step_command(a + b) or ""
+    p, c = prev.split(), command.split()
+    if p[0].upper() == c[0].upper() == "SHOW":
+        return command
+    if p[0].upper() == c[0].upper() == "BRIGHTNESS" and len(p) == len(c) == 3 and p[1] == c[1]:
+        return command
+    return None
@@ -0,0 +1,188 @@
+"""
+Optional compressed payloads for SEGMENT and LOAD_IMAGE messages.
+
+Each panel announces what it can decode in reply to `ENCODINGS?`:
+
+    ENCODINGS:RLE,PAL\n
+
+The question is only asked with WISE_NEGOTIATE=true: older firmware never
+answers, and waiting for it would hold the dispatcher thread at every
+(re)connect. Without negotiation, or without an answer, panels only ever
+get RAW payloads. For
+every segment the server tries the encodings the panel supports and keeps
+the smallest one:
+
+    RLE  repeated <u16 count><u16 pixel> pairs (pixel bytes as stored)
+    PAL  <u16 n_colours><n_colours x u16 pixel><u8 index per pixel>
+
+Compressed payloads go out as `SEGMENT_Z:{offset}:{length}:{enc}:{payload_len}`
+or `LOAD_IMAGE_Z:{name}:{length}:{enc}:{payload_len}`; RAW keeps the
+original headers.
+
+The same reply carries the other capabilities, separated by ';': binary
+framing (wire.py) and, on top of it, windowed chunk transfers (window.py):
+
+    ENCODINGS:RLE,PAL;FRAMING:1;WINDOW:8;CHUNK:4096\n
+"""
+import os
+import time
+import socket
+import threading
+import weakref
+import numpy as np
+
+from scripts_tcp.wire import VERSION, enable_framing
+from scripts_tcp.window import CHUNK_SIZE
+
+NEGOTIATE = os.getenv("WISE_NEGOTIATE", "false").lower() == "true"
+
+RAW = "RAW"
+RLE = "RLE"
+PAL = "PAL"
+ENCODINGS = (RLE, PAL)
+
+_RLE_DTYPE = np.dtype([("count", "<u2"), ("pixel", "<u2")])
+_MAX_RUN   = 0xFFFF
+
+# Codificaciones negociadas por conexión; se olvidan al cerrar el socket
+CLIENT_ENCODINGS = weakref.WeakKeyDictionary()
+_NEGOTIATE_LOCK  = threading.Lock()
+
+
+def encode_rle(segment):
+    """Run-length encodes the 16-bit pixels of `segment`."""
+    px = np.frombuffer(segment, dtype="<u2")
+    if px.size == 0:
+        return b""
+    starts  = np.flatnonzero(np.concatenate(([True], px[1:] != px[:-1])))
+    lengths = np.diff(np.append(starts, px.size))
+    values  = px[starts]
+
+    # Runs de más de 65535 píxeles se parten en varios
+    if lengths.max() > _MAX_RUN:
+        pieces  = -(-lengths // _MAX_RUN)
+        values  = np.repeat(values, pieces)
+        counts  = np.full(values.size, _MAX_RUN, dtype=np.int64)
+        last    = np.cumsum(pieces) - 1
+        counts[last] = lengths - (pieces - 1) * _MAX_RUN
+        lengths = counts
+
+    out = np.empty(values.size, dtype=_RLE_DTYPE)
+    out["count"] = lengths
+    out["pixel"] = values
+    return out.tobytes()
+
+
+def encode_palette(segment):
+    """Indexed-palette encoding, or None if the segment has over 256 colours."""
+    px = np.frombuffer(segment, dtype="<u2")
+    palette, indices = np.unique(px, return_inverse=True)
+    if palette.size > 256:
+        return None
+    header = np.array([palette.size], dtype="<u2").tobytes()
+    return header + palette.astype("<u2").tobytes() + indices.astype(np.uint8).tobytes()
+
+
+_ENCODERS = {RLE: encode_rle, PAL: encode_palette}
+
+
+def encode_segment(segment, allowed):
+    """
+    Returns (encoding, payload, encode_seconds) with the smallest payload among
+    RAW and the `allowed` encodings. RAW payloads are returned as-is.
+    """
+    t0   = time.perf_counter()
+    best = (RAW, segment)
+    if len(segment) % 2 == 0:
+        for name in ENCODINGS:
+            if name not in allowed:
+                continue
+            payload = _ENCODERS[name](segment)
+            if payload is not None and len(payload) < len(best[1]):
+                best = (name, payload)
+    return best[0], best[1], time.perf_counter() - t0
+
+
+def parse_capabilities(reply):
+    """
+    Capabilities announced in an ENCODINGS reply:
+    {"ENCODINGS": set, "FRAMING": version, "WINDOW": chunks, "CHUNK": bytes} (0 = absent).
+    """
+    caps = {"ENCODINGS": set(), "FRAMING": 0, "WINDOW": 0, "CHUNK": 0}
+    for part in reply.strip().split(";"):
+        key, _, value = part.partition(":")
+        key = key.strip().upper()
+        if key == "ENCODINGS":
+            caps[key] = {e.strip().upper() for e in value.split(",")} & set(ENCODINGS)
+        elif key in caps and value.strip().isdigit():
+            caps[key] = int(value)
+    return caps
+
+
+def negotiate_encodings(conn, addr, timeout=1.0):
+    """Asks a freshly connected panel which encodings (and framing) it supports."""
+    supported, framing = set(), 0
+    if not NEGOTIATE:
+        with _NEGOTIATE_LOCK:
+            CLIENT_ENCODINGS[conn] = supported
+        return supported
+    try:
+        conn.sendall(b"ENCODINGS?\n")
+        conn.settimeout(timeout)
+        reply = conn.recv(256).decode(errors="ignore").strip()
+        if reply.startswith("ENCODINGS:"):
+            caps = parse_capabilities(reply)
+            supported, framing = caps["ENCODINGS"], caps["FRAMING"]
+            if framing == VERSION:
+                enable_framing(conn, caps["WINDOW"], caps["CHUNK"] or CHUNK_SIZE)
+    except (socket.timeout, OSError):
+        pass
+    finally:
+        try:
+            conn.settimeout(None)
+        except OSError:
+            pass
+    with _NEGOTIATE_LOCK:
+        CLIENT_ENCODINGS[conn] = supported
+    print(f"[S] {addr} encodings: {', '.join(sorted(supported)) or RAW}"
+          + (f", framing v{framing}" if framing == VERSION else ""))
+    return supported
+
+
+def encodings_for(conn):
+    with _NEGOTIATE_LOCK:
+        try:
+            return CLIENT_ENCODINGS.get(conn, set())
+        except TypeError:
+            return set()
+
+
+class SendStats:
+    """Bytes on the wire and encode time of every segment of one send."""
+
+    def __init__(self, label):
+        self.label       = label
+        self.raw_bytes   = 0
+        self.wire_bytes  = 0
+        self.encode_secs = 0.0
+        self.by_encoding = {}
+        self._lock       = threading.Lock()
+
+    def record(self, encoding, raw, wire, secs):
+        with self._lock:
+            self.raw_bytes   += raw
+            self.wire_bytes  += wire
+            self.encode_secs += secs
+            self.by_encoding[encoding] = self.by_encoding.get(encoding, 0) + 1
+
+    @property
+    def ratio(self):
+        return (self.raw_bytes / self.wire_bytes) if self.wire_bytes else 1.0
+
+    def report(self):
+        encs = ", ".join(f"{k}x{v}" for k, v in sorted(self.by_encoding.items()))
+        print(f"[S] {self.label}: {self.raw_bytes}B raw → {self.wire_bytes}B on wire "
+              f"(ratio {self.ratio:.1f}x, encode {self.encode_secs*1000:.1f}ms, {encs})")
+
+
+LAST_SEND_STATS = {}
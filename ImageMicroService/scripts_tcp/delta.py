@@ -0,0 +1,95 @@
+"""
+Delta frames for `send_segmented`: only the rows that changed go on the wire.
+
+The server remembers, per panel index, the segment that panel last ACKed.
+For the next frame the segment is compared in blocks of DELTA_BLOCK bytes
+(one 320-pixel RGB565 row) and the dirty blocks are merged into runs. The
+panel receives
+
+    DELTA:{offset}:{length}:{runs}:{payload_len}\n
+    payload_len bytes: for each run <u32 rel_offset><u32 run_len><run bytes>
+
+and patches the runs into the segment it ACKed last, then ACKs as usual.
+When more than DELTA_MAX_RATIO of the segment changed, a normal SEGMENT is
+sent instead.
+"""
+import os
+import struct
+import threading
+import numpy as np
+
+DELTA_ENABLED   = os.getenv("WISE_DELTA", "false").lower() == "true"
+DELTA_BLOCK     = 640
+DELTA_MAX_RATIO = 0.5
+
+RUN_HEADER = struct.Struct("<II")
+
+
+def diff_runs(old, new, block=DELTA_BLOCK):
+    """(rel_offset, length) runs of the `block`-sized chunks that differ."""
+    a = np.frombuffer(old, dtype=np.uint8)
+    b = np.frombuffer(new, dtype=np.uint8)
+    if a.size != b.size:
+        raise ValueError("Segments have different sizes")
+    n_full  = a.size // block
+    changed = (a[:n_full * block] != b[:n_full * block]).reshape(n_full, block).any(axis=1)
+    if a.size % block:
+        changed = np.append(changed, np.any(a[n_full * block:] != b[n_full * block:]))
+    dirty = np.flatnonzero(changed)
+    if dirty.size == 0:
+        return []
+
+    # Agrupa bloques consecutivos en runs
+    breaks = np.flatnonzero(np.diff(dirty) != 1) + 1
+    runs = []
+    for group in np.split(dirty, breaks):
+        start = int(group[0]) * block
+        end   = min((int(group[-1]) + 1) * block, a.size)
+        runs.append((start, end - start))
+    return runs
+
+
+def encode_delta(offset, length, runs, new):
+    """Builds the DELTA header and payload for `runs` of the new segment."""
+    buf   = memoryview(new)
+    parts = []
+    for rel, ln in runs:
+        parts.append(RUN_HEADER.pack(rel, ln))
+        parts.append(buf[rel:rel + ln])
+    payload = b"".join(parts)
+    header  = f"DELTA:{offset}:{length}:{len(runs)}:{len(payload)}\n".encode()
+    return header, payload
+
+
+class DeltaTracker:
+    """Last segment ACKed by each panel, as seen by the server."""
+
+    def __init__(self):
+        self._last = {}  # idx -> (conn, offset, bytes)
+        self._lock = threading.Lock()
+
+    def previous(self, idx, conn, offset, length):
+        """The segment the panel holds for this range, or None if unknown."""
+        with self._lock:
+            entry = self._last.get(idx)
+        if entry is None:
+            return None
+        last_conn, last_off, last_data = entry
+        if last_conn is not conn or last_off != offset or len(last_data) != length:
+            return None
+        return last_data
+
+    def acked(self, idx, conn, offset, segment):
+        with self._lock:
+            self._last[idx] = (conn, offset, bytes(segment))
+
+    def forget(self, idx):
+        with self._lock:
+            self._last.pop(idx, None)
+
+    def clear(self):
+        with self._lock:
+            self._last.clear()
+
+
+DELTA_TRACKER = DeltaTracker()
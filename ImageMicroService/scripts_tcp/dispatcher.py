@@ -0,0 +1,220 @@
+"""
+Single owner of the panel sockets.
+
+Every operation on the `clients` list (adding a freshly accepted panel,
+pruning dead ones, running a Server_Code1.main command) is put on one
+thread-safe queue and executed, in order, by the dispatcher thread. Nothing
+else writes to the sockets, so two REST calls can no longer interleave bytes
+on the same panel. Inside a command the per-panel work fans out to each
+panel's long-lived sender thread (panel_workers.py) and is waited for before
+the next command starts: commands are serialized per panel, panels run in
+parallel.
+With a `runner` (e.g. AsyncWall.call, see async_server.py) commands go to
+that transport instead of Server_Code1.main.
+
+Commands still waiting are coalesced (see coalesce.py) and each command
+class is spaced by its minimum interval; the Futures of merged or dropped
+commands resolve together with the command that replaced them.
+
+    dispatcher.call("SHOW image_matrix_red.py")   # waits for the result
+    dispatcher.submit("INCREASE")                 # returns a Future
+"""
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+from scripts_tcp.codec import negotiate_encodings
+from scripts_tcp.panel_workers import PANEL_WORKERS
+from scripts_tcp.catalog import PANEL_CATALOG
+from scripts_tcp.coalesce import MIN_INTERVALS, command_class, merge
+
+
+class _Entry:
+    """One queued operation; `command` is set only for main() commands."""
+
+    def __init__(self, fn, args, command=None):
+        self.fn      = fn
+        self.args    = args
+        self.command = command
+        self.futures = [Future()]
+
+
+class PanelDispatcher:
+    def __init__(self, clients, min_intervals=MIN_INTERVALS, runner=None):
+        self.clients   = clients
+        self.runner    = runner
+        self.min_intervals = dict(min_intervals)
+        self.executed  = 0
+        self.coalesced = 0
+        self._queue    = queue.Queue()
+        self._backlog  = []          # solo lo toca el hilo del dispatcher
+        self._last_run = {}          # clase de comando -> time.monotonic()
+        self._thread   = None
+        self._lock     = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="wise-panels", daemon=True)
+                self._thread.start()
+
+    def submit(self, command):
+        """Queues a Server_Code1.main command; returns a Future with its result."""
+        return self._put(self._run, command, command=command)
+
+    def call(self, command, timeout=None):
+        return self.submit(command).result(timeout)
+
+    def add_client(self, conn, addr):
+        """Hands a newly accepted panel socket over to the dispatcher."""
+        return self._put(self._add, conn, addr)
+
+    def prune(self):
+        return self._put(self._prune)
+
+    def close_all(self):
+        return self._put(self._close_all)
+
+    def count(self):
+        return len(self.clients)
+
+    def pending(self):
+        return self._queue.qsize() + len(self._backlog)
+
+    def stats(self):
+        return {"clients": self.count(), "pending": self.pending(),
+                "executed": self.executed, "coalesced": self.coalesced}
+
+    def stop(self):
+        self._queue.put(None)
+
+    def _put(self, fn, *args, command=None):
+        self.start()
+        entry = _Entry(fn, args, command)
+        self._queue.put(entry)
+        return entry.futures[0]
+
+    def _loop(self):
+        backlog = self._backlog
+        while True:
+            try:
+                if not backlog:
+                    backlog.append(self._queue.get())
+                while True:
+                    backlog.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if None in backlog:
+                break
+            self._coalesce(backlog)
+            if not backlog:
+                continue
+
+            wait = self._wait_for(backlog[0])
+            if wait > 0:
+                # Debounce: lo que llegue mientras tanto se fusiona con la cabeza
+                try:
+                    backlog.append(self._queue.get(timeout=wait))
+                except queue.Empty:
+                    pass
+                continue
+            self._execute(backlog.pop(0))
+
+    def _coalesce(self, backlog):
+        merged = [backlog[0]]
+        for entry in backlog[1:]:
+            if not merged:
+                # La cabeza se anuló con la orden siguiente: esta empieza de nuevo
+                merged.append(entry)
+                continue
+            prev = merged[-1]
+            command = merge(prev.command, entry.command)
+            if command is None:
+                merged.append(entry)
+                continue
+            self.coalesced += 1
+            prev.futures += entry.futures
+            if command:
+                prev.command, prev.args = command, (command,)
+            else:
+                # Se anulan (p. ej. INCREASE + DECREASE): no se envía nada
+                merged.pop()
+                for future in prev.futures:
+                    if not future.done() and future.set_running_or_notify_cancel():
+                        future.set_result(None)
+        backlog[:] = merged
+
+    def _wait_for(self, entry):
+        cls = command_class(entry.command)
+        if cls not in self._last_run:
+            return 0
+        return self._last_run[cls] + self.min_intervals.get(cls, 0) - time.monotonic()
+
+    def _execute(self, entry):
+        futures = [f for f in entry.futures if not f.done() and f.set_running_or_notify_cancel()]
+        if not futures:
+            return
+        try:
+            result = entry.fn(*entry.args)
+        except Exception as e:
+            print(f"[S] Dispatcher error: {e}")
+            for future in futures:
+                future.set_exception(e)
+        else:
+            for future in futures:
+                future.set_result(result)
+        finally:
+            self.executed += 1
+            cls = command_class(entry.command)
+            if cls:
+                self._last_run[cls] = time.monotonic()
+
+    # --- Solo se ejecutan en el hilo del dispatcher ---
+
+    def _run(self, command):
+        if self.runner is not None:
+            return self.runner(command)
+        from scripts_tcp.Server_Code1 import main
+        return main(self.clients, inputString=command)
+
+    def _add(self, conn, addr):
+        negotiate_encodings(conn, addr)
+        # Lo que tenga guardado el panel se sabrá en el próximo LIST
+        PANEL_CATALOG.forget(addr[0])
+        # Un panel que se reconecta sustituye a su conexión anterior
+        for old in [c for c in self.clients if c[1][0] == addr[0]]:
+            self.clients.remove(old)
+            PANEL_WORKERS.retire(old[0])
+            try:
+                old[0].close()
+            except OSError:
+                pass
+        self.clients.append((conn, addr))
+        return len(self.clients)
+
+    def _prune(self):
+        alive = []
+        for conn, addr in self.clients:
+            try:
+                conn.sendall(b"")  # zero-byte check
+                alive.append((conn, addr))
+            except OSError:
+                print(f"[S] Removing dead client {addr}")
+                PANEL_WORKERS.retire(conn)
+                PANEL_CATALOG.forget(addr[0])
+                try:
+                    conn.close()
+                except OSError:
+                    pass
+        self.clients[:] = alive
+        return len(alive)
+
+    def _close_all(self):
+        PANEL_WORKERS.retire_all()
+        for conn, _ in self.clients:
+            try:
+                conn.close()
+            except OSError:
+                pass
+        self.clients.clear()
@@ -0,0 +1,87 @@
+"""
+In-process LRU cache of decoded frames, shared by LOAD, TEXT and SHOW.
+
+Entries are keyed by image name and carry a content version; a lookup with a
+different version counts as a miss and drops the stale entry. The cache is
+bounded by the total `nbytes` of the stored matrices.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = int(os.getenv("WISE_FRAME_CACHE_MB", "32")) * 1024 * 1024
+
+
+class FrameCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes   = max_bytes
+        self.size_bytes  = 0
+        self.hits        = 0
+        self.misses      = 0
+        self.evictions   = 0
+        self._entries    = OrderedDict()  # name -> (version, matrix)
+        self._lock       = threading.Lock()
+
+    def get(self, name, version):
+        """Returns the cached matrix for (name, version) or None."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != version:
+                self._drop(name)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, name, version, matrix):
+        """Stores a matrix, evicting least recently used frames over budget."""
+        if matrix.nbytes > self.max_bytes:
+            return matrix
+        # Los frames cacheados se comparten entre hilos: solo lectura
+        matrix.setflags(write=False)
+        with self._lock:
+            if name in self._entries:
+                self._drop(name)
+            self._entries[name] = (version, matrix)
+            self.size_bytes += matrix.nbytes
+            while self.size_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+        return matrix
+
+    def invalidate(self, name):
+        """Forgets any cached frame for `name` (e.g. after a new upload)."""
+        with self._lock:
+            if name in self._entries:
+                self._drop(name)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def _drop(self, name):
+        _, matrix = self._entries.pop(name)
+        self.size_bytes -= matrix.nbytes
+
+
+# Instancia compartida por el servidor TCP y el servicio REST
+FRAME_CACHE = FrameCache()
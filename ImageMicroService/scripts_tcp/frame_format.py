@@ -0,0 +1,103 @@
+"""
+Binary frame format for the images stored in `images.image_data`.
+
+Layout (16-byte header, always little-endian, followed by the raw pixels):
+
+    offset  size  field
+    0       4     magic b"WFRM"
+    4       1     version (1)
+    5       1     pixel format (1 = RGB565)
+    6       1     byte order of the payload (0 = little, 1 = big)
+    7       1     reserved (0)
+    8       2     width in pixels
+    10      2     height in pixels
+    12      4     payload length in bytes (width * height * 2)
+
+The payload is the row-major RGB565 matrix exactly as it goes out to the
+panels, so decoding is a single `np.frombuffer` with no parsing at all.
+"""
+import struct
+import numpy as np
+
+MAGIC          = b"WFRM"
+VERSION        = 1
+PIXFMT_RGB565  = 1
+HEADER         = struct.Struct("<4sBBBBHHI")
+HEADER_SIZE    = HEADER.size
+FRAME_EXT      = ".bin"
+
+BYTE_ORDERS = {"little": 0, "big": 1}
+_DTYPES     = {0: np.dtype("<u2"), 1: np.dtype(">u2")}
+
+
+def is_frame(blob):
+    """True if `blob` starts with a binary frame header."""
+    return blob is not None and len(blob) >= HEADER_SIZE and bytes(blob[:4]) == MAGIC
+
+
+def encode_frame(matrix, byteorder="little"):
+    """
+    Packs a (height, width) RGB565 matrix into a frame blob.
+    `byteorder` selects how each 16-bit pixel is laid out in the payload.
+    """
+    if byteorder not in BYTE_ORDERS:
+        raise ValueError(f"Unknown byte order '{byteorder}'")
+    order = BYTE_ORDERS[byteorder]
+    mat = np.ascontiguousarray(matrix, dtype=_DTYPES[order])
+    if mat.ndim != 2:
+        raise ValueError(f"Expected a 2D matrix, got shape {mat.shape}")
+    height, width = mat.shape
+    header = HEADER.pack(MAGIC, VERSION, PIXFMT_RGB565, order, 0, width, height, mat.nbytes)
+    return header + mat.tobytes()
+
+
+def parse_header(header):
+    """Validates a frame header and returns (width, height, byteorder, payload_len)."""
+    if not is_frame(header):
+        raise ValueError("Blob is not a binary frame")
+    magic, version, pixfmt, order, _, width, height, length = HEADER.unpack_from(header, 0)
+    if version != VERSION:
+        raise ValueError(f"Unsupported frame version {version}")
+    if pixfmt != PIXFMT_RGB565:
+        raise ValueError(f"Unsupported pixel format {pixfmt}")
+    if order not in _DTYPES:
+        raise ValueError(f"Unsupported byte order {order}")
+    if length != width * height * 2:
+        raise ValueError("Frame payload length does not match its dimensions")
+    return width, height, order, length
+
+
+def decode_header(blob):
+    """Like parse_header, also checking that the whole payload is present."""
+    width, height, order, length = parse_header(blob)
+    if len(blob) < HEADER_SIZE + length:
+        raise ValueError("Frame payload is truncated")
+    return width, height, order, length
+
+
+def payload_dtype(byteorder):
+    """numpy dtype of the pixels for a header byte order code."""
+    return _DTYPES[byteorder]
+
+
+def decode_frame(blob):
+    """
+    Returns the frame as a read-only (height, width) ndarray that shares
+    memory with `blob`; the dtype carries the stored byte order.
+    """
+    width, height, order, length = decode_header(blob)
+    mat = np.frombuffer(blob, dtype=_DTYPES[order], count=width * height, offset=HEADER_SIZE)
+    return mat.reshape(height, width)
+
+
+def write_frame_file(path, matrix, byteorder="little"):
+    """Writes a matrix to `path` in the frame format."""
+    with open(path, "wb") as f:
+        f.write(encode_frame(matrix, byteorder))
+    return path
+
+
+def read_frame_file(path):
+    """Reads a frame file written by `write_frame_file`."""
+    with open(path, "rb") as f:
+        return decode_frame(f.read())
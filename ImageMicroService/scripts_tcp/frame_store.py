@@ -0,0 +1,207 @@
+"""
+On-disk store of ready-to-send frames, memory-mapped for the TCP fan-out.
+
+Each image is kept as `<name>.<version>.frame` under controller/instance/frames:
+the first page holds the frame_format header, the RGB565 payload starts at the
+next page boundary and the file is padded to a whole number of pages. Senders
+get a FrameView whose slices are memoryviews over the mmap (no copies), and
+real sockets are served with `socket.sendfile` straight from the page cache.
+
+A view that is replaced or invalidated while a send still holds it (see
+`holding`) stays open until that send releases it.
+"""
+import os
+import re
+import mmap
+import socket
+import threading
+import contextlib
+import numpy as np
+
+from scripts_tcp.frame_format import encode_frame, parse_header, payload_dtype, HEADER_SIZE
+
+BASE_DIR   = os.path.dirname(os.path.abspath(__file__))
+FRAMES_DIR = os.path.join(BASE_DIR, "../controller/instance/frames")
+PAGE_SIZE  = mmap.PAGESIZE
+
+
+def _safe(text):
+    return re.sub(r"[^A-Za-z0-9._-]", "_", str(text))
+
+
+def _pad(length):
+    return (-length) % PAGE_SIZE
+
+
+class FrameView:
+    """Read-only mmap of one stored frame; behaves like the payload bytes."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        width, height, order, length = parse_header(self._map[:HEADER_SIZE])
+        if len(self._map) < PAGE_SIZE + length:
+            raise ValueError(f"Frame file {path} is truncated")
+        self.shape  = (height, width)
+        self.length = length
+        self.buffer = memoryview(self._map)[PAGE_SIZE:PAGE_SIZE + length]
+        self._dtype = payload_dtype(order)
+        self.tables = {}  # layout -> SegmentTable (ver segment_cache.py)
+        self._users   = 0      # envíos en curso que usan la vista
+        self._retired = False  # ya no está en el store: se cierra al quedar libre
+        self._closed  = False
+        self._state   = threading.Lock()
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, key):
+        return self.buffer[key]
+
+    def matrix(self):
+        """The frame as a read-only ndarray backed by the mmap."""
+        return np.frombuffer(self.buffer, dtype=self._dtype).reshape(self.shape)
+
+    def send_range(self, conn, offset, length):
+        """Sends payload[offset:offset+length], via sendfile on real sockets."""
+        with self:
+            if isinstance(conn, socket.socket):
+                conn.sendfile(self._file, PAGE_SIZE + offset, length)
+            else:
+                conn.sendall(self.buffer[offset:offset + length])
+
+    def acquire(self):
+        with self._state:
+            if self._closed:
+                raise ValueError(f"Frame view {self.path} is closed")
+            self._users += 1
+        return self
+
+    def release(self):
+        with self._state:
+            self._users -= 1
+            idle = self._retired and self._users == 0
+        if idle:
+            self._close()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def close(self):
+        """Closes the view now, or when the last send holding it releases it."""
+        with self._state:
+            self._retired = True
+            idle = self._users == 0
+        if idle:
+            self._close()
+
+    def _close(self):
+        with self._state:
+            if self._closed:
+                return
+            self._closed = True
+        self.buffer.release()
+        try:
+            self._map.close()
+        except BufferError:
+            # Aún hay vistas vivas (un envío en curso): el GC lo cerrará
+            return
+        self._file.close()
+
+
+class FrameStore:
+    def __init__(self, root=FRAMES_DIR):
+        self.root   = os.path.abspath(root)
+        self._views = {}  # name -> (version, FrameView)
+        self._lock  = threading.Lock()
+
+    def _path(self, name, version):
+        return os.path.join(self.root, f"{_safe(name)}.{_safe(version).replace('.', '_')}.frame")
+
+    def open(self, name, version):
+        """Returns the FrameView for (name, version) or None if not stored."""
+        with self._lock:
+            cached = self._views.get(name)
+            if cached and cached[0] == version:
+                return cached[1]
+            path = self._path(name, version)
+            if not os.path.exists(path):
+                return None
+            return self._swap(name, version, FrameView(path))
+
+    def put(self, name, version, matrix):
+        """Writes a matrix as a page-aligned frame file and returns its view."""
+        os.makedirs(self.root, exist_ok=True)
+        blob   = encode_frame(matrix)
+        header = blob[:HEADER_SIZE]
+        length = len(blob) - HEADER_SIZE
+        path   = self._path(name, version)
+        tmp    = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(header + b"\0" * (PAGE_SIZE - HEADER_SIZE))
+            f.write(memoryview(blob)[HEADER_SIZE:])
+            f.write(b"\0" * _pad(length))
+        os.replace(tmp, path)
+        with self._lock:
+            self._remove_stale(name, path)
+            return self._swap(name, version, FrameView(path))
+
+    def invalidate(self, name):
+        with self._lock:
+            cached = self._views.pop(name, None)
+            if cached:
+                cached[1].close()
+            self._remove_stale(name, None)
+
+    def _swap(self, name, version, view):
+        old = self._views.get(name)
+        self._views[name] = (version, view)
+        if old and old[1] is not view:
+            old[1].close()
+        return view
+
+    def _remove_stale(self, name, keep):
+        """Deletes older frame files of `name` and their segment manifests."""
+        if not os.path.isdir(self.root):
+            return
+        pattern = re.compile(re.escape(_safe(name)) + r"\.[^.]+\.frame(\..*)?$")
+        for entry in os.listdir(self.root):
+            path = os.path.join(self.root, entry)
+            if pattern.match(entry) and (keep is None or not path.startswith(keep)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def frame_bytes(matrix):
+    """Zero-copy byte view of an in-memory matrix (e.g. a rendered text frame)."""
+    return memoryview(np.ascontiguousarray(matrix)).cast("B")
+
+
+def payload_view(data):
+    """Byte memoryview over a FrameView or any bytes-like payload."""
+    if isinstance(data, FrameView):
+        return data.buffer
+    return memoryview(data)
+
+
+def holding(data):
+    """Context manager keeping a FrameView open for a whole send (no-op for other payloads)."""
+    if isinstance(data, FrameView):
+        return data
+    return contextlib.nullcontext(data)
+
+
+def send_range(conn, data, offset, length):
+    """Sends data[offset:offset+length] without materialising a copy of the slice."""
+    if isinstance(data, FrameView):
+        data.send_range(conn, offset, length)
+    else:
+        conn.sendall(memoryview(data)[offset:offset + length])
+
+
+FRAME_STORE = FrameStore()
@@ -1,68 +1,75 @@
 import os
+import sys
 from PIL import Image
 import numpy as np
 
-def rgb888_to_rgb565(image_array):
-    """
-    Convert an image (a NumPy array of shape (height, width, 3)) from RGB888 
-    to RGB565 (without swapping bytes).
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-    The conversion reduces:
-      - Red from 8 bits to 5 bits (>> 3)
-      - Green from 8 bits to 6 bits (>> 2)
-      - Blue from 8 bits to 5 bits (>> 3)
-      
-    Then it packs the values into a single 16-bit integer (RGB565).
-    
-    Note: The resulting 16-bit value is stored in native order, i.e. the high byte
-    comes first and the low byte second. This is what the ESP32 client code expects.
-    """
-    # Convert each channel to 16-bit integers to ensure proper shifting
-    r = image_array[:, :, 0].astype(np.uint16) >> 3  # 5 bits for red
-    g = image_array[:, :, 1].astype(np.uint16) >> 2  # 6 bits for green
-    b = image_array[:, :, 2].astype(np.uint16) >> 3  # 5 bits for blue
-    
-    # Pack the bits into a single 16-bit number (RGB565 format)
-    rgb565 = (r << 11) | (g << 5) | b
-    return rgb565
+from scripts_tcp.frame_format import write_frame_file
+from scripts_tcp.rgb565 import rgb888_to_rgb565
+
+# quality -> (draft oversampling, final resample filter)
+#   exact: full-resolution decode + LANCZOS (the original path)
+#   high:  JPEG decoded at the DCT scale >= 2x the target, then LANCZOS
+#   fast:  JPEG decoded at the DCT scale >= the target, then BILINEAR
+QUALITY_MODES = {
+    "exact": (None, Image.LANCZOS),
+    "high":  (2, Image.LANCZOS),
+    "fast":  (1, Image.BILINEAR),
+}
 
-def process_image(input_path, output_folder, output_filename="image_matrix_namex.py"):
+def load_image_rgb(input_path, size=(320, 640), quality="high"):
     """
-    Processes the image: opens it, converts to RGB, resizes to 320x640,
-    converts the pixel data to RGB565 format (without byte swap),
-    and saves the resulting matrix as a Python file containing a variable
-    named 'image_matrix'.
+    Opens an image and returns it as an RGB uint8 array resized to `size`
+    (width x height). For JPEG input the decoder is put in draft mode so
+    that 12+ MP photos are decoded at 1/2, 1/4 or 1/8 scale instead of
+    full resolution; `quality` trades speed for fidelity (see QUALITY_MODES).
     """
-    # Open and convert the image to RGB
+    if quality not in QUALITY_MODES:
+        raise ValueError(f"Unknown quality '{quality}', use one of {sorted(QUALITY_MODES)}")
+    oversample, resample = QUALITY_MODES[quality]
+
     with Image.open(input_path) as img:
+        if oversample and img.format == "JPEG":
+            img.draft("RGB", (size[0] * oversample, size[1] * oversample))
         img = img.convert("RGB")
         # Resize the image to 320x640 (width x height)
-        img = img.resize((320, 640), Image.LANCZOS)
+        img = img.resize(size, resample)
         # Convert the image to a NumPy array
-        img_array = np.array(img, dtype=np.uint8)
+        return np.array(img, dtype=np.uint8)
+
+def image_to_rgb565(input_path, size=(320, 640), quality="high", dither=False, gamma=1.0):
+    """
+    Opens an image, converts it to RGB, resizes it to `size` (width x height)
+    and returns the RGB565 matrix (without byte swap). `dither` and `gamma`
+    are passed to the converter in rgb565.py.
+    """
+    img_array = load_image_rgb(input_path, size, quality)
     
     # Convert the image from RGB888 to RGB565
-    matrix = rgb888_to_rgb565(img_array)
-    
-    # Convert the matrix to a list of lists for storage
-    matrix_list = matrix.tolist()
-    
-    # Create the content to write to the output file
-    content = "# Image matrix in RGB565 format (native byte order)\n"
-    content += "image_matrix = " + repr(matrix_list) + "\n"
+    return rgb888_to_rgb565(img_array, dither=dither, gamma=gamma)
+
+def process_image(input_path, output_folder, output_filename="image_matrix_namex.bin", quality="high"):
+    """
+    Processes the image: opens it, converts to RGB, resizes to 320x640,
+    converts the pixel data to RGB565 format (without byte swap),
+    and saves the resulting matrix as a binary frame file (see frame_format.py)
+    ready to be stored in the `images.image_data` column.
+    """
+    matrix = image_to_rgb565(input_path, quality=quality)
     
     # Ensure the output folder exists
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
     
+    # Write the header + raw RGB565 payload (little-endian, as sent to the panels)
     file_path = os.path.join(output_folder, output_filename)
-    with open(file_path, "w") as f:
-        f.write(content)
+    write_frame_file(file_path, matrix)
     
     print(f"File saved at: {file_path}")
 
 if __name__ == "__main__":
     # Update these paths to your environment
     input_path = "/home/iot/Desktop/intento1/img1.jpg"  # Path to your input image
-    output_folder = "/home/iot/Desktop/PAE/intento1/matrixes"         # Output folder for the Python file
+    output_folder = "/home/iot/Desktop/PAE/intento1/matrixes"         # Output folder for the frame file
     process_image(input_path, output_folder)
\ No newline at end of file
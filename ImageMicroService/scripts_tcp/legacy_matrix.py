@@ -0,0 +1,159 @@
+"""
+Safe parser for the legacy `image_matrix = [[...], ...]` format.
+
+Before frame_format.py, images were stored as the text of a Python module
+that defines `image_matrix`: the *.py files in matrixes/ and the old
+`image_data` BLOBs. They used to be loaded with `exec`, which runs whatever
+the BLOB contains and builds ~200K Python ints (plus the AST) per image.
+
+This parser never evaluates anything. It reads the text in CHUNK_SIZE pieces,
+cuts it at row boundaries (`]`) and converts each row with np.fromstring, so
+memory stays at about one chunk plus the uint16 result even for rows of
+several megabytes. Only two shapes are accepted:
+
+    image_matrix = [[19052, 16972, ...], [...], ...]
+    image_matrix = [[63488 for _ in range(320)] for _ in range(640)]
+
+plus blank lines and `#` comments before the assignment. Anything else
+raises ValueError.
+"""
+import io
+import re
+import codecs
+import numpy as np
+
+CHUNK_SIZE    = 64 * 1024
+MAX_ROW_CHARS = 1024 * 1024  # una fila de 65536 píxeles cabe de sobra
+
+_ASSIGN      = re.compile(r"image_matrix\s*=\s*")
+_ROW_CHARS   = re.compile(r"[^0-9,\s]")
+_COMPREHENSION = re.compile(
+    r"\[\s*\[\s*(\d+)\s+for\s+\w+\s+in\s+range\(\s*(\d+)\s*\)\s*\]"
+    r"\s+for\s+\w+\s+in\s+range\(\s*(\d+)\s*\)\s*\]\s*$"
+)
+
+
+def _text_chunks(source, chunk_size):
+    """Yields str chunks from bytes, str or a (binary or text) file object."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif isinstance(source, str):
+        source = io.StringIO(source)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        yield decoder.decode(chunk) if isinstance(chunk, (bytes, bytearray)) else chunk
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def _skip_header(chunks):
+    """Consumes comments up to `image_matrix =`; returns (body start, chunk iterator)."""
+    buf = ""
+    for chunk in chunks:
+        buf += chunk
+        while True:
+            stripped = buf.lstrip()
+            if stripped.startswith("#"):
+                end = stripped.find("\n")
+                if end < 0:
+                    break  # comentario incompleto, falta texto
+                buf = stripped[end + 1:]
+                continue
+            match = _ASSIGN.match(stripped)
+            if match:
+                return stripped[match.end():], chunks
+            if len(stripped) >= len("image_matrix = "):
+                raise ValueError("El texto no define la variable 'image_matrix'")
+            break
+        if len(buf) > MAX_ROW_CHARS:
+            raise ValueError("Cabecera del image_matrix demasiado larga")
+    raise ValueError("El texto no define la variable 'image_matrix'")
+
+
+def _parse_row(text, first):
+    text = text.lstrip()
+    if first:
+        if not text.startswith("["):
+            raise ValueError("image_matrix debe ser una lista de filas")
+        text = text[1:].lstrip()
+    elif text.startswith(","):
+        text = text[1:].lstrip()
+    else:
+        raise ValueError("Falta ',' entre filas del image_matrix")
+    if not text.startswith("["):
+        raise ValueError("Cada fila del image_matrix debe ser una lista")
+    text = text[1:]
+    if _ROW_CHARS.search(text):
+        raise ValueError("Valor no numérico en el image_matrix")
+    row = np.fromstring(text, dtype=np.int64, sep=",") if text.strip() else np.empty(0, np.int64)
+    if row.size and (row.min() < 0 or row.max() > 0xFFFF):
+        raise ValueError("Píxel fuera del rango RGB565 (0..65535)")
+    return row.astype(np.uint16)
+
+
+def iter_rows(source, chunk_size=CHUNK_SIZE):
+    """Yields the rows of a legacy matrix as uint16 arrays, reading it in chunks."""
+    chunks = _text_chunks(source, chunk_size)
+    buf, chunks = _skip_header(chunks)
+
+    # Forma con list comprehension (colores sólidos): el texto es corto
+    if re.match(r"\[\s*\[\s*\d+\s+for\b", buf):
+        for chunk in chunks:
+            buf += chunk
+            if len(buf) > 4096:
+                break
+        match = _COMPREHENSION.match(buf.strip())
+        if not match:
+            raise ValueError("List comprehension no soportada en image_matrix")
+        value, width, height = (int(g) for g in match.groups())
+        if value > 0xFFFF:
+            raise ValueError("Píxel fuera del rango RGB565 (0..65535)")
+        row = np.full(width, value, dtype=np.uint16)
+        for _ in range(height):
+            yield row
+        return
+
+    first, closed, pending = True, False, ""
+    for chunk in _prepend(buf, chunks):
+        if closed:
+            if chunk.strip():
+                raise ValueError("Texto sobrante después del image_matrix")
+            continue
+        pending += chunk
+        *pieces, pending = pending.split("]")
+        for piece in pieces:
+            if closed:
+                raise ValueError("Texto sobrante después del image_matrix")
+            if not first and not piece.strip():
+                closed = True  # corchete de cierre de la lista exterior
+                continue
+            yield _parse_row(piece, first)
+            first = False
+        if closed and pending.strip():
+            raise ValueError("Texto sobrante después del image_matrix")
+        if len(pending) > MAX_ROW_CHARS:
+            raise ValueError("Fila del image_matrix demasiado larga")
+    if not closed:
+        raise ValueError("image_matrix incompleto")
+
+
+def _prepend(head, chunks):
+    yield head
+    yield from chunks
+
+
+def parse_legacy_matrix(source, chunk_size=CHUNK_SIZE):
+    """Parses a legacy matrix (bytes, str or file object) into a (height, width) uint16 array."""
+    rows = []
+    for row in iter_rows(source, chunk_size):
+        if rows and row.size != rows[0].size:
+            raise ValueError("Las filas del image_matrix tienen longitudes distintas")
+        rows.append(row)
+    if not rows:
+        raise ValueError("image_matrix vacío")
+    return np.vstack(rows)
+
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+One-shot migration of legacy `image_matrix = [[...]]` images to binary frames.
+
+    python3 scripts_tcp/migrate_legacy.py [--db PATH] [--batch 16] [--no-files]
+
+1) Database: every `image_matrix` blob in `image_blobs` is read in
+   chunks straight from SQLite (Connection.blobopen), parsed by
+   legacy_matrix.py (never exec'd) and re-stored as a frame under its new
+   content hash; the `images` rows that pointed at the old blob are
+   repointed. Conversions are written BATCH_SIZE at a time, one transaction
+   per batch.
+2) Files: each matrixes/*.py gets a frame file next to it (`name.bin`).
+
+The tool can be stopped at any point and run again: committed batches are
+frames already and are skipped, as are .bin files newer than their .py.
+"""
+import os
+import sys
+import glob
+import time
+import sqlite3
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts_tcp.legacy_matrix import parse_legacy_matrix, CHUNK_SIZE
+from scripts_tcp.frame_format import MAGIC, FRAME_EXT, encode_frame
+from scripts_tcp import blob_store
+from scripts_tcp.blob_store import DB_PATH
+
+BATCH_SIZE   = 16
+MATRIXES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "matrixes")
+
+
+class Throughput:
+    """Items and input bytes processed since the start of a phase."""
+
+    def __init__(self, label):
+        self.label  = label
+        self.items  = 0
+        self.bytes  = 0
+        self.failed = 0
+        self.t0     = time.perf_counter()
+
+    def add(self, nbytes):
+        self.items += 1
+        self.bytes += nbytes
+
+    def report(self):
+        secs = max(time.perf_counter() - self.t0, 1e-9)
+        print(f"[M] {self.label}: {self.items} converted in {secs:.2f}s → "
+              f"{self.items / secs:.1f}/s, {self.bytes / secs / 1e6:.1f} MB/s of legacy text"
+              + (f" ({self.failed} failed)" if self.failed else ""))
+
+
+def legacy_blobs(conn):
+    """(rowid, hash, size) of the `image_matrix` blobs (not frames, PNGs, ...)."""
+    return conn.execute(
+        "SELECT rowid, hash, size FROM image_blobs "
+        "WHERE substr(data, 1, 4) != ? AND instr(substr(data, 1, 4096), ?) > 0 ORDER BY rowid",
+        (MAGIC, b"image_matrix")
+    ).fetchall()
+
+
+def replace_blob(conn, old_hash, frame):
+    """Stores `frame` and moves every reference of `old_hash` onto it."""
+    new_hash = blob_store.content_hash(frame)
+    refs = conn.execute("SELECT refcount FROM image_blobs WHERE hash = ?", (old_hash,)).fetchone()[0]
+    conn.execute("INSERT OR IGNORE INTO image_blobs (hash, data, size, refcount) VALUES (?, ?, ?, 0)",
+                 (new_hash, frame, len(frame)))
+    conn.execute("UPDATE image_blobs SET refcount = refcount + ? WHERE hash = ?", (refs, new_hash))
+    conn.execute("UPDATE images SET blob_hash = ? WHERE blob_hash = ?", (new_hash, old_hash))
+    conn.execute("DELETE FROM image_blobs WHERE hash = ?", (old_hash,))
+    return new_hash
+
+
+def migrate_db(db_path=DB_PATH, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE):
+    conn = sqlite3.connect(db_path)
+    stats = Throughput("database")
+    try:
+        blob_store.migrate(conn)  # image_data en línea → image_blobs
+        pending = legacy_blobs(conn)
+        print(f"[M] {len(pending)} legacy blobs in {os.path.abspath(db_path)}")
+        batch = []
+        for rowid, old_hash, size in pending:
+            try:
+                with conn.blobopen("image_blobs", "data", rowid, readonly=True) as blob:
+                    frame = encode_frame(parse_legacy_matrix(blob, chunk_size))
+            except ValueError as e:
+                print(f"[M] Skipping blob {old_hash[:12]}: {e}")
+                stats.failed += 1
+                continue
+            batch.append((old_hash, frame))
+            stats.add(size)
+            if len(batch) >= batch_size:
+                _write_batch(conn, batch)
+        _write_batch(conn, batch)
+    finally:
+        conn.close()
+    stats.report()
+    return stats
+
+
+def _write_batch(conn, batch):
+    if not batch:
+        return
+    with conn:
+        for old_hash, frame in batch:
+            replace_blob(conn, old_hash, frame)
+    print(f"[M] Committed {len(batch)} frames")
+    batch.clear()
+
+
+def migrate_files(matrixes_dir=MATRIXES_DIR, out_dir=None, chunk_size=CHUNK_SIZE):
+    out_dir = out_dir or matrixes_dir
+    os.makedirs(out_dir, exist_ok=True)
+    stats = Throughput("matrix files")
+    for src in sorted(glob.glob(os.path.join(matrixes_dir, "*.py"))):
+        name = os.path.splitext(os.path.basename(src))[0]
+        dst  = os.path.join(out_dir, name + FRAME_EXT)
+        if os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(src):
+            continue
+        try:
+            with open(src, "rb") as f:
+                frame = encode_frame(parse_legacy_matrix(f, chunk_size))
+        except ValueError as e:
+            print(f"[M] Skipping {src}: {e}")
+            stats.failed += 1
+            continue
+        tmp = dst + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(frame)
+        os.replace(tmp, dst)
+        stats.add(os.path.getsize(src))
+    stats.report()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert legacy image_matrix images to binary frames.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database (default: controller/instance)")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="Frames per transaction")
+    parser.add_argument("--chunk-kb", type=int, default=CHUNK_SIZE // 1024, help="Read size while parsing")
+    parser.add_argument("--matrixes", default=MATRIXES_DIR, help="Folder with legacy *.py matrices")
+    parser.add_argument("--out", default=None, help="Where to write the .bin frames (default: --matrixes)")
+    parser.add_argument("--no-db", action="store_true", help="Skip the database")
+    parser.add_argument("--no-files", action="store_true", help="Skip the matrix files")
+    args = parser.parse_args(argv)
+
+    chunk = args.chunk_kb * 1024
+    failed = 0
+    if not args.no_db:
+        failed += migrate_db(args.db, args.batch, chunk).failed
+    if not args.no_files:
+        failed += migrate_files(args.matrixes, args.out, chunk).failed
+    return 0 if not failed else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
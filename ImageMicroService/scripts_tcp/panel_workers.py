@@ -0,0 +1,117 @@
+"""
+Long-lived sender thread per panel socket.
+
+send_segmented / send_full used to start a new threading.Thread per panel on
+every send and every retry round. Now each socket gets one PanelWorker the
+first time something is sent to it; the worker runs segment jobs from its
+own queue, in order, until the socket is retired (reconnect, prune, TEXT off).
+
+    future = PANEL_WORKERS.submit(conn, addr, handle_segment_direct, conn, addr, ...)
+    PANEL_WORKERS.wait([future, ...])
+    PANEL_WORKERS.stats()   # queue depth and service time per panel
+"""
+import time
+import queue
+import threading
+from concurrent.futures import Future, wait as wait_futures
+
+
+class PanelWorker:
+    def __init__(self, conn, addr):
+        self.conn       = conn
+        self.addr       = addr
+        self.jobs       = 0
+        self.busy_secs  = 0.0
+        self.last_secs  = 0.0
+        self.max_secs   = 0.0
+        self.wait_secs  = 0.0   # tiempo total en cola antes de empezar
+        self._queue     = queue.Queue()
+        self._thread    = threading.Thread(target=self._loop, name=f"wise-panel-{addr[0]}", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, args):
+        future = Future()
+        self._queue.put((fn, args, future, time.perf_counter()))
+        return future
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def stop(self):
+        self._queue.put(None)
+
+    def stats(self):
+        return {
+            "addr": f"{self.addr[0]}:{self.addr[1]}",
+            "queue_depth": self.depth(),
+            "jobs": self.jobs,
+            "service_ms_avg": round(self.busy_secs / self.jobs * 1000, 2) if self.jobs else 0.0,
+            "service_ms_last": round(self.last_secs * 1000, 2),
+            "service_ms_max": round(self.max_secs * 1000, 2),
+            "queue_wait_ms_avg": round(self.wait_secs / self.jobs * 1000, 2) if self.jobs else 0.0,
+        }
+
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            fn, args, future, queued = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            t0 = time.perf_counter()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                secs = time.perf_counter() - t0
+                self.jobs      += 1
+                self.busy_secs += secs
+                self.last_secs  = secs
+                self.max_secs   = max(self.max_secs, secs)
+                self.wait_secs += t0 - queued
+
+
+class PanelWorkers:
+    def __init__(self):
+        self._workers = {}   # socket -> PanelWorker
+        self._lock    = threading.Lock()
+
+    def submit(self, conn, addr, fn, *args):
+        """Queues fn(*args) on the sender thread of `conn`; returns a Future."""
+        with self._lock:
+            worker = self._workers.get(conn)
+            if worker is None:
+                worker = self._workers[conn] = PanelWorker(conn, addr)
+        return worker.submit(fn, args)
+
+    @staticmethod
+    def wait(futures):
+        """Blocks until every job finished (errors are already logged by the jobs)."""
+        wait_futures(futures)
+
+    def retire(self, conn):
+        """Stops the worker of a socket that is being closed or replaced."""
+        with self._lock:
+            worker = self._workers.pop(conn, None)
+        if worker is not None:
+            worker.stop()
+
+    def retire_all(self):
+        with self._lock:
+            workers, self._workers = list(self._workers.values()), {}
+        for worker in workers:
+            worker.stop()
+
+    def count(self):
+        return len(self._workers)
+
+    def stats(self):
+        with self._lock:
+            workers = list(self._workers.values())
+        return [w.stats() for w in workers]
+
+
+# Un hilo emisor por socket de panel, compartido por send_segmented y send_full
+PANEL_WORKERS = PanelWorkers()
@@ -0,0 +1,138 @@
+"""
+RGB888 -> RGB565 conversion shared by image.py, batch ingestion and the text
+renderer.
+
+Plain conversion reads each pixel's bytes through two overlapping 16-bit
+views of the interleaved RGB buffer (R|G<<8 and G|B<<8) and packs them with
+in-place shifts into one preallocated output buffer: no per-channel
+`astype` copies and no temporaries. With gamma correction or the optional
+4x4 ordered (Bayer) dither, each channel instead goes through a precomputed
+256-entry table (16 of them when dithering) that already holds its
+quantised value shifted into place, OR-ed into the same buffer. Dithering
+replaces the plain truncation that bands gradients.
+
+Byte order: the ESP32 panels copy the received segment into a `uint16_t`
+framebuffer, and since the ESP32 is little-endian the low byte of every
+pixel must come first. That is `byteorder="little"` (the default, and what
+`mat.tobytes()` always produced on the server). `"big"` gives the swapped
+layout some SPI displays expect when the buffer is pushed out untouched.
+"""
+import threading
+from functools import lru_cache
+import numpy as np
+
+BYTE_ORDERS = {"little": np.dtype("<u2"), "big": np.dtype(">u2")}
+
+# Umbrales de la matriz de Bayer 4x4, normalizados a [0, 1)
+BAYER_4X4 = np.array([[ 0,  8,  2, 10],
+                      [12,  4, 14,  6],
+                      [ 3, 11,  1,  9],
+                      [15,  7, 13,  5]], dtype=np.float64) / 16.0
+
+_CHANNELS = ((11, 3), (5, 2), (0, 3))  # (shift in RGB565, bits dropped) for R, G, B
+_scratch  = threading.local()
+
+
+def _quantize(gamma, dropped, threshold=0.0):
+    v = np.arange(256, dtype=np.float64)
+    if gamma != 1.0:
+        v = 255.0 * (v / 255.0) ** gamma
+    levels = (1 << (8 - dropped)) - 1
+    q = np.floor(v / (1 << dropped) + threshold) if threshold else np.floor(v) // (1 << dropped)
+    return np.clip(q, 0, levels).astype(np.uint16)
+
+
+@lru_cache(maxsize=None)
+def channel_luts(gamma=1.0, byteorder="little"):
+    """(R, G, B) tables mapping an 8-bit value to its bits of the RGB565 word."""
+    dtype = BYTE_ORDERS[byteorder]
+    return tuple((_quantize(gamma, dropped) << shift).astype(dtype)
+                 for shift, dropped in _CHANNELS)
+
+
+@lru_cache(maxsize=None)
+def dither_luts(gamma=1.0, byteorder="little"):
+    """Per channel, a flat (16 * 256) table: one 256-entry LUT per Bayer cell."""
+    dtype = BYTE_ORDERS[byteorder]
+    luts = []
+    for shift, dropped in _CHANNELS:
+        table = [(_quantize(gamma, dropped, t) << shift) for t in BAYER_4X4.ravel()]
+        luts.append(np.concatenate(table).astype(dtype))
+    return tuple(luts)
+
+
+@lru_cache(maxsize=8)
+def _bayer_offsets(height, width):
+    cell = (np.arange(16, dtype=np.uint16).reshape(4, 4) * 256)
+    reps = (-(-height // 4), -(-width // 4))
+    return np.ascontiguousarray(np.tile(cell, reps)[:height, :width])
+
+
+def _scratch_buffer(name, shape, dtype):
+    buf = getattr(_scratch, name, None)
+    if buf is None or buf.shape != shape or buf.dtype != dtype:
+        buf = np.empty(shape, dtype=dtype)
+        setattr(_scratch, name, buf)
+    return buf
+
+
+def _pack_shifts(image_array, out):
+    height, width = image_array.shape[:2]
+    rgb = np.ascontiguousarray(image_array, dtype=np.uint8)
+    row = width * 3
+    # Vistas de 16 bits sin copia: rg = R | G << 8, gb = G | B << 8
+    rg = np.ndarray((height, width), dtype="<u2", buffer=rgb, offset=0, strides=(row, 3))
+    gb = np.ndarray((height, width), dtype="<u2", buffer=rgb, offset=1, strides=(row, 3))
+
+    native = out if out.dtype == BYTE_ORDERS["little"] else \
+        _scratch_buffer("native", (height, width), BYTE_ORDERS["little"])
+    tmp = _scratch_buffer("pixels", (height, width), BYTE_ORDERS["little"])
+    np.left_shift(rg, 8, out=native)           # R en los bits 15..8
+    np.bitwise_and(native, 0xF800, out=native)
+    np.right_shift(rg, 5, out=tmp)             # G en los bits 10..3
+    np.bitwise_and(tmp, 0x07E0, out=tmp)
+    np.bitwise_or(native, tmp, out=native)
+    np.right_shift(gb, 11, out=tmp)            # B >> 3
+    np.bitwise_or(native, tmp, out=native)
+    if native is not out:
+        np.copyto(out, native)
+    return out
+
+
+def rgb888_to_rgb565(image_array, out=None, dither=False, gamma=1.0, byteorder="little"):
+    """
+    Convert an image (a NumPy array of shape (height, width, 3)) from RGB888
+    to RGB565.
+
+    Without dither and with gamma 1.0 the result is bit-identical to the
+    classic `(r >> 3) << 11 | (g >> 2) << 5 | b >> 3`. `out` may be a
+    preallocated (height, width) array of the byte order's dtype.
+    """
+    height, width = image_array.shape[:2]
+    dtype = BYTE_ORDERS[byteorder]
+    if out is None:
+        out = np.empty((height, width), dtype=dtype)
+    elif out.shape != (height, width) or out.dtype != dtype:
+        raise ValueError(f"`out` must be a {(height, width)} array of {dtype}")
+
+    if not dither and gamma == 1.0:
+        return _pack_shifts(image_array, out)
+
+    tmp = _scratch_buffer("pixels", (height, width), dtype)
+    if dither:
+        luts = dither_luts(gamma, byteorder)
+        idx  = _scratch_buffer("index", (height, width), np.uint16)
+        offsets = _bayer_offsets(height, width)
+        for c, lut in enumerate(luts):
+            np.add(offsets, image_array[:, :, c], out=idx)
+            np.take(lut, idx, out=out if c == 0 else tmp)
+            if c:
+                np.bitwise_or(out, tmp, out=out)
+    else:
+        lut_r, lut_g, lut_b = channel_luts(gamma, byteorder)
+        np.take(lut_r, image_array[:, :, 0], out=out)
+        np.take(lut_g, image_array[:, :, 1], out=tmp)
+        np.bitwise_or(out, tmp, out=out)
+        np.take(lut_b, image_array[:, :, 2], out=tmp)
+        np.bitwise_or(out, tmp, out=out)
+    return out
@@ -0,0 +1,87 @@
+"""
+Per-panel segment tables for the stored frames.
+
+A segment table is the list of (offset, length, crc32) byte ranges that each
+panel of the wall receives for one frame. Tables are computed when an image is
+ingested, written next to the frame file as `<frame>.<layout>.json` and keyed
+by the layout version (number of panels + payload size), so LOAD/SHOW only
+have to look them up and write each range to its socket.
+"""
+import os
+import json
+import zlib
+
+from scripts_tcp.frame_store import FrameView, payload_view
+
+
+def calculate_segments(data_len, parts=10):
+    base = data_len // parts
+    rem  = data_len % parts
+    segs = []
+    off  = 0
+    for i in range(parts):
+        ln = base + (1 if i < rem else 0)
+        segs.append((off, ln))
+        off += ln
+    return segs
+
+
+def layout_version(parts, data_len):
+    return f"L{parts}x{data_len}"
+
+
+class SegmentTable:
+    def __init__(self, layout, segments):
+        self.layout   = layout
+        self.segments = segments  # [(offset, length, crc32), ...]
+
+    @property
+    def ranges(self):
+        return [(off, ln) for off, ln, _ in self.segments]
+
+    def to_json(self):
+        return {"layout": self.layout, "segments": self.segments}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data["layout"], [tuple(seg) for seg in data["segments"]])
+
+
+def build_segment_table(data, parts):
+    """Splits `data` in `parts` ranges and checksums each one."""
+    buf  = payload_view(data)
+    segs = [(off, ln, zlib.crc32(buf[off:off + ln])) for off, ln in calculate_segments(len(buf), parts)]
+    return SegmentTable(layout_version(parts, len(buf)), segs)
+
+
+def segment_table_for(view, parts):
+    """
+    Returns the segment table of a FrameView for `parts` panels: from memory,
+    from its JSON manifest on disk or freshly computed and persisted. Frame
+    files are immutable per version, so a manifest never goes stale.
+    """
+    layout = layout_version(parts, len(view))
+    table  = view.tables.get(layout)
+    if table is not None:
+        return table
+
+    path = f"{view.path}.{layout}.json"
+    if os.path.exists(path):
+        with open(path) as f:
+            table = SegmentTable.from_json(json.load(f))
+    else:
+        table = build_segment_table(view, parts)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(table.to_json(), f)
+        os.replace(tmp, path)
+
+    view.tables[layout] = table
+    return table
+
+
+def segments_for(data, parts):
+    """(offset, length) ranges to send `data` to `parts` panels."""
+    if isinstance(data, FrameView):
+        return segment_table_for(data, parts).ranges
+    return calculate_segments(len(data), parts)
@@ -0,0 +1,75 @@
+"""
+Bounded cache of rendered text frames.
+
+Messages such as "turn on" or the welcome strings are rendered once per
+(text, font, size, width, height, colours) and then served from memory (an
+LRU FrameCache with its own byte budget). With persistence enabled the frames
+are also written under controller/instance/text_frames in the frame format,
+so they survive restarts.
+"""
+import os
+import hashlib
+
+from scripts_tcp.frame_cache import FrameCache
+from scripts_tcp.frame_format import write_frame_file, read_frame_file
+from scripts_tcp.text_renderer import TEXT_RENDERER
+
+BASE_DIR         = os.path.dirname(os.path.abspath(__file__))
+TEXT_FRAMES_DIR  = os.path.join(BASE_DIR, "../controller/instance/text_frames")
+TEXT_CACHE_BYTES = int(os.getenv("WISE_TEXT_CACHE_MB", "4")) * 1024 * 1024
+TEXT_CACHE_PERSIST = os.getenv("WISE_TEXT_CACHE_PERSIST", "false").lower() == "true"
+
+
+class TextFrameCache:
+    def __init__(self, renderer=TEXT_RENDERER, max_bytes=TEXT_CACHE_BYTES,
+                 persist_dir=None, max_files=256):
+        self.renderer    = renderer
+        self.frames      = FrameCache(max_bytes)
+        self.persist_dir = persist_dir
+        self.max_files   = max_files
+
+    def key(self, text, width=None, height=None):
+        r = self.renderer
+        return (text, r.font_path, r.font_size, width or r.width, height or r.height,
+                r.background, r.fill)
+
+    def render(self, text, width=None, height=None):
+        """Returns the RGB565 frame for `text`, rendering it only on a miss."""
+        key = self.key(text, width, height)
+        mat = self.frames.get(key, None)
+        if mat is not None:
+            return mat
+
+        path = self._path(key)
+        if path and os.path.exists(path):
+            mat = read_frame_file(path)
+            os.utime(path)  # el disco también se poda por uso más antiguo
+        else:
+            mat = self.renderer.render(text, width, height)
+            if path:
+                self._persist(path, mat)
+        return self.frames.put(key, None, mat)
+
+    def stats(self):
+        return self.frames.stats()
+
+    def _path(self, key):
+        if not self.persist_dir:
+            return None
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.persist_dir, f"text_{digest}.bin")
+
+    def _persist(self, path, mat):
+        os.makedirs(self.persist_dir, exist_ok=True)
+        write_frame_file(path, mat)
+        files = [os.path.join(self.persist_dir, f) for f in os.listdir(self.persist_dir)]
+        if len(files) > self.max_files:
+            files.sort(key=os.path.getmtime)
+            for old in files[:len(files) - self.max_files]:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+
+TEXT_FRAME_CACHE = TextFrameCache(persist_dir=TEXT_FRAMES_DIR if TEXT_CACHE_PERSIST else None)
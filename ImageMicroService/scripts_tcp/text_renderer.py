@@ -0,0 +1,140 @@
+"""
+In-process text renderer for the `TEXT <message>` command.
+
+A single TextRenderer lives as long as the server: TrueType fonts are loaded
+once per size and kept, and `render` returns the RGB565 ndarray that goes
+straight to `send_segmented`, without spawning a Python process or going
+through the database.
+
+Layout never asks PIL to measure whole strings: each (font, size) has a
+GlyphMetrics table of per-character advance widths filled on first use, line
+widths are sums over that table and the font size is found by binary search.
+"""
+import threading
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from scripts_tcp.rgb565 import rgb888_to_rgb565
+
+DEFAULT_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+
+
+class GlyphMetrics:
+    """Advance widths of the characters of one font at one size."""
+
+    def __init__(self, font):
+        self.font     = font
+        self.advances = {}
+        self.line_height = font.getbbox("Ag")[3] + 2
+
+    def advance(self, char):
+        width = self.advances.get(char)
+        if width is None:
+            width = self.advances[char] = self.font.getlength(char)
+        return width
+
+    def width(self, text):
+        return sum(self.advance(c) for c in text)
+
+
+class TextRenderer:
+    def __init__(self, font_path=DEFAULT_FONT, width=320, height=64, font_size=32,
+                 background="white", fill="black"):
+        self.font_path  = font_path
+        self.width      = width
+        self.height     = height
+        self.font_size  = font_size
+        self.background = background
+        self.fill       = fill
+        self._fonts     = {}
+        self._metrics   = {}
+        self._lock      = threading.Lock()
+
+    def font(self, size):
+        """Returns the font at `size`, loading it only the first time."""
+        with self._lock:
+            font = self._fonts.get(size)
+            if font is None:
+                try:
+                    font = ImageFont.truetype(self.font_path, size)
+                except IOError:
+                    font = ImageFont.load_default()
+                self._fonts[size] = font
+            return font
+
+    def metrics(self, size):
+        """GlyphMetrics for the font at `size`, shared by all renders."""
+        with self._lock:
+            metrics = self._metrics.get(size)
+        if metrics is None:
+            metrics = GlyphMetrics(self.font(size))
+            with self._lock:
+                metrics = self._metrics.setdefault(size, metrics)
+        return metrics
+
+    def wrap_text(self, text, metrics, max_width):
+        """Divide el texto en múltiples líneas si es necesario."""
+        space = metrics.advance(" ")
+        lines = []
+        current_line, current_width = "", 0.0
+        for word in text.split():
+            word_width = metrics.width(word)
+            test_width = current_width + (space if current_line else 0.0) + word_width
+            if test_width <= max_width:
+                current_line = current_line + (" " if current_line else "") + word
+                current_width = test_width
+            else:
+                if current_line:
+                    lines.append(current_line)
+                current_line, current_width = word, word_width
+        if current_line:
+            lines.append(current_line)
+        return lines
+
+    def fit_font_size(self, text, width):
+        """
+        Largest size in font_size, font_size-2, ... (down to 10) at which the
+        whole text on one line is at most 1.2 times the width; binary search
+        over the same candidates the old 2-point shrinking loop visited.
+        """
+        candidates = [self.font_size]
+        while candidates[-1] > 10:
+            candidates.append(candidates[-1] - 2)
+        limit = width * 1.2
+        lo, hi = 0, len(candidates) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.metrics(candidates[mid]).width(text) <= limit:
+                hi = mid
+            else:
+                lo = mid + 1
+        return candidates[lo]
+
+    def render_image(self, text, width=None, height=None):
+        """Draws `text` centred on a new RGB PIL image."""
+        width  = width or self.width
+        height = height or self.height
+        img  = Image.new("RGB", (width, height), self.background)
+        draw = ImageDraw.Draw(img)
+
+        metrics = self.metrics(self.fit_font_size(text, width))
+        lines   = self.wrap_text(text, metrics, width)
+
+        line_height = metrics.line_height
+        total_text_height = line_height * len(lines)
+        y = (height - total_text_height) // 2 if total_text_height < height else 0
+
+        for line in lines:
+            x = int(width - metrics.width(line)) // 2
+            draw.text((x, y), line, font=metrics.font, fill=self.fill)
+            y += line_height
+        return img
+
+    def render(self, text, width=None, height=None):
+        """Renders `text` and returns the (height, width) RGB565 matrix."""
+        img = self.render_image(text, width, height)
+        return rgb888_to_rgb565(np.asarray(img, dtype=np.uint8))
+
+
+# Instancia de larga duración usada por el servidor TCP
+TEXT_RENDERER = TextRenderer()
@@ -0,0 +1,122 @@
+"""
+Sliding-window chunked transfer of one large message (framed panels only).
+
+A panel that announces `WINDOW:<n>` (and optionally `CHUNK:<bytes>`) next to
+FRAMING:1 gets every message bigger than one chunk (SEGMENT, SEGMENT_Z,
+DELTA, LOAD_IMAGE...) cut into numbered chunks. Each chunk is a DATA frame
+whose seq is the transfer id:
+
+    CHUNK:{xfer}:{index}:{count}:{total}\\n<chunk bytes>
+
+The chunks concatenated are the usual header line + body, so once the panel
+has them all it handles the message exactly as if it came in one piece. At
+most `window` chunks are unacknowledged at a time. The panel answers with
+SACK frames (seq = xfer):
+
+    <u32 cumulative: every chunk below it received><bitmap of later chunks>
+
+Only missing chunks are sent again: after CHUNK_RTO without a SACK for them,
+or at once when FAST_RETRANSMIT later chunks were already SACKed. A flaky
+panel therefore costs a few chunk resends, not the 10 s ACK timeout plus a
+full resend of the segment.
+
+WindowTransfer only keeps the state; wire.py (threads) and async_server.py
+(asyncio) do the socket work.
+"""
+import os
+import struct
+
+CHUNK_SIZE      = int(os.getenv("WISE_CHUNK_KB", "4")) * 1024
+CHUNK_RTO       = int(os.getenv("WISE_CHUNK_RTO_MS", "300")) / 1000.0
+DEFAULT_WINDOW  = 8
+FAST_RETRANSMIT = 3
+
+_SACK = struct.Struct("<I")
+
+
+def encode_sack(cumulative, received=()):
+    """SACK payload (what a panel sends); `received` are chunk indices above `cumulative`."""
+    bits = bytearray((max(received, default=cumulative) - cumulative + 7) // 8)
+    for i in received:
+        if i > cumulative:
+            j = i - cumulative - 1
+            bits[j // 8] |= 1 << (j % 8)
+    return _SACK.pack(cumulative) + bytes(bits)
+
+
+def decode_sack(payload):
+    """(cumulative, set of chunk indices received above it)."""
+    cumulative, = _SACK.unpack_from(payload)
+    received = {cumulative + 1 + j * 8 + b
+                for j, byte in enumerate(payload[_SACK.size:]) for b in range(8) if byte >> b & 1}
+    return cumulative, received
+
+
+class WindowTransfer:
+    def __init__(self, xfer, header, body, chunk_size=CHUNK_SIZE, window=DEFAULT_WINDOW, rto=CHUNK_RTO):
+        self.xfer        = xfer
+        self.header      = bytes(header)
+        self.body        = memoryview(body).cast("B") if len(body) else memoryview(b"")
+        self.total       = len(self.header) + len(self.body)
+        self.chunk_size  = chunk_size
+        self.count       = -(-self.total // chunk_size)
+        self.window      = max(window, 1)
+        self.rto         = rto
+        self.acked       = set()
+        self.sent        = 0
+        self.retransmits = 0
+        self._sent_at    = {}     # chunk en vuelo -> último envío
+        self._lost       = set()
+        self._fast       = set()
+        self._next       = 0      # primer chunk nunca enviado
+
+    @property
+    def done(self):
+        return len(self.acked) == self.count
+
+    def chunk(self, i):
+        """(CHUNK header line, chunk bytes) of chunk `i`."""
+        start, end = i * self.chunk_size, min((i + 1) * self.chunk_size, self.total)
+        line = f"CHUNK:{self.xfer}:{i}:{self.count}:{self.total}\n".encode()
+        hlen = len(self.header)
+        if start >= hlen:
+            return line, self.body[start - hlen:end - hlen]
+        # El primer chunk lleva la línea de cabecera del mensaje original
+        return line, self.header[start:end] + bytes(self.body[:max(end - hlen, 0)])
+
+    def due(self, now):
+        """Chunks to send now (retransmissions first); marks them as sent."""
+        out = [i for i, t in sorted(self._sent_at.items()) if i in self._lost or now - t >= self.rto]
+        self.retransmits += len(out)
+        in_flight = len(self._sent_at)
+        while self._next < self.count and in_flight < self.window:
+            out.append(self._next)
+            self._next += 1
+            in_flight += 1
+        for i in out:
+            self._sent_at[i] = now
+            self._lost.discard(i)
+        self.sent += len(out)
+        return out
+
+    def on_sack(self, payload):
+        cumulative, received = decode_sack(payload)
+        newly = (set(range(min(cumulative, self.count))) | {i for i in received if i < self.count}) - self.acked
+        self.acked |= newly
+        for i in newly:
+            self._sent_at.pop(i, None)
+        for i in self._sent_at:
+            # Hueco con FAST_RETRANSMIT chunks posteriores ya recibidos: se da por
+            # perdido (una sola vez por chunk; luego solo cuenta el RTO)
+            if i not in self._fast and sum(r > i for r in received) >= FAST_RETRANSMIT:
+                self._lost.add(i)
+                self._fast.add(i)
+        return bool(newly)
+
+    def next_timeout(self, now):
+        """Seconds until the oldest in-flight chunk should be resent."""
+        if self._lost:
+            return 0.0
+        if not self._sent_at:
+            return self.rto
+        return max(min(self._sent_at.values()) + self.rto - now, 0.0)
@@ -0,0 +1,293 @@
+"""
+Framing of the panel protocol.
+
+Legacy panels speak text: ASCII header lines (`SEGMENT:{offset}:{length}\\n`,
+`READY\\n`, ...) followed by raw payloads, and reply with lines such as
+`ACK`. Replies are now read through a per-socket buffer, so a coalesced
+`ACK\\nGO\\n` gives two replies and a split `AC` / `K\\n` gives one.
+
+Panels that add `FRAMING:1` to their ENCODINGS reply (see codec.py) are told
+`FRAMING:1\\n` and from then on every message, both ways, is a version-1 frame:
+
+    magic   b"WF"  2 bytes
+    version u8     1
+    type    u8     CMD, DATA, ACK, NAK, GO, TEXT or SACK
+    seq     u32    server messages are numbered per panel; ACK/NAK/GO echo it
+    length  u32    payload length
+    crc32   u32    zlib.crc32 of the first 12 header bytes + payload
+    payload        CMD/DATA: the legacy header line (+ body); TEXT: reply lines
+
+An ACK only counts for the message it names, so a late ACK of an earlier
+attempt is skipped instead of being taken for the retry's, and a NAK (bad
+CRC on the panel) answers right away instead of waiting for the timeout.
+Framed panels that also announce WINDOW get large messages as a chunked
+sliding-window transfer (window.py); send_message / wait_ack hide the
+difference from the callers.
+
+    seq = send_message(conn, b"SEGMENT:0:4096\\n", data, 0, 4096)
+    wait_ack(conn, seq, 10.0)        # "ACK", "NAK" or raises socket.timeout
+"""
+import time
+import zlib
+import struct
+import socket
+import weakref
+import threading
+from collections import deque, namedtuple
+
+from scripts_tcp.frame_store import payload_view, send_range
+from scripts_tcp.window import CHUNK_SIZE, WindowTransfer
+
+MAGIC   = b"WF"
+VERSION = 1
+HEADER  = struct.Struct("<2sBBIII")
+MAX_PAYLOAD = 8 * 1024 * 1024
+
+CMD, DATA, ACK, NAK, GO, TEXT, SACK = 1, 2, 3, 4, 5, 6, 7
+REPLY_NAMES = {ACK: "ACK", NAK: "NAK", GO: "GO"}
+
+# Respuestas cortas que el firmware antiguo envía a veces sin '\n'
+REPLY_TOKENS = ("ACK", "GO")
+
+Frame = namedtuple("Frame", "type seq payload")
+
+
+def _crc(prefix, *parts):
+    crc = zlib.crc32(prefix)
+    for part in parts:
+        crc = zlib.crc32(part, crc)
+    return crc
+
+
+def frame_header(ftype, seq, *parts):
+    """16-byte header of a frame whose payload is the concatenation of `parts`."""
+    length = sum(len(p) for p in parts)
+    prefix = HEADER.pack(MAGIC, VERSION, ftype, seq, length, 0)[:12]
+    return prefix + struct.pack("<I", _crc(prefix, *parts))
+
+
+def encode_frame(ftype, seq, payload=b""):
+    return frame_header(ftype, seq, payload) + bytes(payload)
+
+
+class FrameParser:
+    """
+    Streaming parser: feed() any chunk, get the complete frames back. Bytes
+    that are not a valid frame (bad magic, version, length or CRC) are
+    skipped one at a time until the next header; `errors` counts them.
+    """
+
+    def __init__(self):
+        self.errors = 0
+        self._buf   = bytearray()
+
+    def feed(self, data):
+        buf, frames = self._buf, []
+        buf += data
+        while len(buf) >= HEADER.size:
+            magic, version, ftype, seq, length, crc = HEADER.unpack_from(buf)
+            if magic != MAGIC or version != VERSION or length > MAX_PAYLOAD:
+                self._resync(buf)
+                continue
+            end = HEADER.size + length
+            if len(buf) < end:
+                break
+            payload = bytes(buf[HEADER.size:end])
+            if _crc(bytes(buf[:12]), payload) != crc:
+                self._resync(buf)
+                continue
+            frames.append(Frame(ftype, seq, payload))
+            del buf[:end]
+        return frames
+
+    def _resync(self, buf):
+        self.errors += 1
+        nxt = buf.find(MAGIC, 1)
+        del buf[:nxt if nxt > 0 else max(len(buf) - 1, 1)]
+
+
+class PanelLink:
+    """Per-socket protocol state: framing on/off, next seq and buffered replies."""
+
+    def __init__(self):
+        self.framed  = False
+        self.window  = 0              # chunks en vuelo; 0 = sin ventana
+        self.chunk_size = CHUNK_SIZE
+        self.parser  = FrameParser()
+        self._seq    = 0
+        self._buffer = b""
+        self._replies = deque()   # (texto, seq)
+        self.late_go = False      # no dio GO a tiempo: su GO tardío se descarta
+
+    def next_seq(self):
+        self._seq = (self._seq + 1) & 0xFFFFFFFF
+        return self._seq
+
+    def feed(self, chunk):
+        if self.framed:
+            for frame in self.parser.feed(chunk):
+                self._frame(frame)
+            return
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split(b"\n")
+        for line in lines:
+            self._text(line, None)
+        if self._buffer.strip().decode(errors="ignore") in REPLY_TOKENS:
+            self._text(self._buffer, None)
+            self._buffer = b""
+
+    def pop(self):
+        return self._replies.popleft() if self._replies else None
+
+    def end_barrier(self, answered):
+        """
+        After a READY/GO barrier: drops GOs still buffered and, if the panel's
+        GO did not make it in time, the one it may still send, so a legacy
+        wait_ack never takes a stale GO for the next segment's reply.
+        """
+        self._replies = deque(r for r in self._replies if r[0] != "GO")
+        self.late_go  = not answered
+
+    def _push(self, text, seq):
+        if text == "GO" and self.late_go:
+            self.late_go = False
+            return
+        self._replies.append((text, seq))
+
+    def _frame(self, frame):
+        if frame.type in REPLY_NAMES:
+            self._push(REPLY_NAMES[frame.type], frame.seq)
+        elif frame.type == SACK:
+            self._push("SACK:" + frame.payload.hex(), frame.seq)
+        elif frame.type == TEXT:
+            for line in frame.payload.split(b"\n"):
+                self._text(line, frame.seq)
+
+    def _text(self, line, seq):
+        text = line.decode(errors="ignore").strip()
+        # Respuesta a ENCODINGS? que llegó después del timeout: no es la de ningún envío
+        if text and not text.startswith("ENCODINGS:"):
+            self._push(text, seq)
+
+
+_LINKS      = weakref.WeakKeyDictionary()
+_LINKS_LOCK = threading.Lock()
+
+
+def link_for(conn):
+    with _LINKS_LOCK:
+        link = _LINKS.get(conn)
+        if link is None:
+            link = _LINKS[conn] = PanelLink()
+        return link
+
+
+def enable_framing(conn, window=0, chunk_size=CHUNK_SIZE):
+    """Switches a panel that announced FRAMING:1 to binary frames (and windowed transfers)."""
+    conn.sendall(f"FRAMING:{VERSION}\n".encode())
+    link = link_for(conn)
+    link.framed, link.window, link.chunk_size = True, window, chunk_size
+
+
+def is_framed(conn):
+    return link_for(conn).framed
+
+
+def message_parts(link, header, body=b""):
+    """(frame header or b"", seq or None) for a message on `link`."""
+    if not link.framed:
+        return b"", None
+    seq = link.next_seq()
+    return frame_header(DATA if len(body) else CMD, seq, header, body), seq
+
+
+def start_transfer(link, header, body=b""):
+    """WindowTransfer for a message too big for one chunk, None otherwise."""
+    if not (link.framed and link.window) or len(header) + len(body) <= link.chunk_size:
+        return None
+    return WindowTransfer(link.next_seq(), header, body, link.chunk_size, link.window)
+
+
+def send_message(conn, header, data=None, offset=0, length=None):
+    """
+    Sends a header line plus optionally data[offset:offset+length] (bytes or a
+    FrameView, still without copies). Returns the frame seq, None for legacy
+    panels, or the WindowTransfer that wait_ack() will complete.
+    """
+    if data is not None and length is None:
+        length = len(data) - offset
+    body = payload_view(data)[offset:offset + length] if data is not None and length else b""
+    link = link_for(conn)
+    transfer = start_transfer(link, header, body)
+    if transfer is not None:
+        _pump(conn, transfer)
+        return transfer
+    prefix, seq = message_parts(link, header, body)
+    conn.sendall(prefix + header)
+    if len(body):
+        send_range(conn, data, offset, length)
+    return seq
+
+
+def read_reply(conn, timeout):
+    """Next (text, seq) reply of the panel; raises socket.timeout after `timeout` s."""
+    link     = link_for(conn)
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            reply = link.pop()
+            if reply is not None:
+                return reply
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout("no reply")
+            conn.settimeout(remaining)
+            chunk = conn.recv(4096)
+            if not chunk:
+                raise ConnectionError("panel closed the connection")
+            link.feed(chunk)
+    finally:
+        try:
+            conn.settimeout(None)
+        except OSError:
+            pass
+
+
+def _pump(conn, transfer):
+    for i in transfer.due(time.monotonic()):
+        line, body = transfer.chunk(i)
+        conn.sendall(frame_header(DATA, transfer.xfer, line, body) + line)
+        conn.sendall(body)
+
+
+def finish_transfer(conn, transfer, timeout):
+    """Sends and resends chunks until the panel SACKed them all; "ACK" or socket.timeout."""
+    deadline = time.monotonic() + timeout
+    while not transfer.done:
+        now = time.monotonic()
+        if now >= deadline:
+            raise socket.timeout(f"{len(transfer.acked)}/{transfer.count} chunks acknowledged")
+        _pump(conn, transfer)
+        try:
+            text, rseq = read_reply(conn, min(max(transfer.next_timeout(now), 0.001), deadline - now))
+        except socket.timeout:
+            continue
+        if rseq == transfer.xfer and text.startswith("SACK:"):
+            transfer.on_sack(bytes.fromhex(text[5:]))
+    if transfer.retransmits:
+        print(f"[S] Transfer {transfer.xfer}: {transfer.count} chunks, {transfer.retransmits} resent")
+    return "ACK"
+
+
+def wait_ack(conn, seq, timeout):
+    """
+    Reply to message `seq`: "ACK" or "NAK" on framed panels (replies to other
+    messages are skipped); on legacy panels simply the next reply line.
+    """
+    if isinstance(seq, WindowTransfer):
+        return finish_transfer(conn, seq, timeout)
+    deadline = time.monotonic() + timeout
+    while True:
+        text, rseq = read_reply(conn, max(deadline - time.monotonic(), 0))
+        if seq is None or (text in ("ACK", "NAK") and rseq == seq):
+            return text
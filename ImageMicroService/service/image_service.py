@@ -1,99 +1,180 @@
-from models.models import User, Image
+from models.models import User, Image, acquire_blob, release_blob
 from extensions import db
-from scripts_tcp.Server_Code1 import main
-from controller.shared_state import clients
-import time
+from scripts_tcp.Server_Code1 import ingest_image
+from scripts_tcp.frame_cache import FRAME_CACHE
+from scripts_tcp.frame_store import FRAME_STORE
+from scripts_tcp.brightness import SOFT_BRIGHTNESS, BRIGHTNESS_VARIANTS_CACHE, step_level
+from scripts_tcp.image import image_to_rgb565
+from scripts_tcp.frame_format import encode_frame
+from controller.shared_state import dispatcher
+from service.jobs import PANEL_JOBS
+import os
+import tempfile
+
+UPLOAD_CHUNK  = 256 * 1024
+WELCOME_DELAY = 30  # segundos entre el texto de bienvenida y la imagen del usuario
 
 class ImageService:
     def __init__(self):
         self.current_image = None  # Imagen actual (objeto Image)
 
+    def panel_job(self, kind, *steps):
+        """
+        Queues panel commands on PANEL_JOBS and returns the Job; each step
+        is handed to the panel dispatcher (where bursts get coalesced) and
+        the job follows its Future. A step is a command string, or
+        (delay_seconds, command) to run that long after the previous step
+        instead of sleeping.
+        """
+        plan = []
+        for step in steps:
+            delay, command = step if isinstance(step, tuple) else (0, step)
+            plan.append((delay, dispatcher.submit, (command,)))
+        return PANEL_JOBS.submit_steps(kind, plan)
+
     def create_user(self, username, email):
-        """Creates a new user in the database."""
+        """Creates a new user in the database. Returns (message, job or None)."""
         if User.query.filter_by(username=username).first():
+            job = None
             if(username == "Marcel"):
-                main(clients, inputString=f"TEXT {"Benvingut Marcel :)"}")
-                time.sleep(30)
-                main(clients, inputString=f"SHOW {"image_matrix_marcel.py"}")
+                job = self.panel_job("welcome", f"TEXT {"Benvingut Marcel :)"}",
+                                     (WELCOME_DELAY, f"SHOW {"image_matrix_marcel.py"}"))
             elif(username == "Julia"):
-                main(clients, inputString=f"TEXT {"Eyyyy what's up :0"}")
-                time.sleep(30)
-                main(clients, inputString=f"SHOW {"image_matrix_julia.py"}")
-            return "User already exists"
+                job = self.panel_job("welcome", f"TEXT {"Eyyyy what's up :0"}",
+                                     (WELCOME_DELAY, f"SHOW {"image_matrix_julia.py"}"))
+            return "User already exists", job
         if User.query.filter_by(email=email).first():
-            return "Email already in use"
+            return "Email already in use", None
 
         new_user = User(username=username, email=email)
         db.session.add(new_user)
         db.session.commit()
-        main(clients, inputString=f"TEXT {"Benvingut a la familia {username} :D"}")
-        return "User created successfully"
+        job = self.panel_job("welcome", f"TEXT Benvingut a la familia {username} :D")
+        return "User created successfully", job
 
     def save_image(self, image_path, user_id, image_name, brightness_level=1.0):
         """Saves an image to the database."""
         with open(image_path, 'rb') as file:
             image_binary = file.read()
 
+        self._store_image(image_binary, user_id, image_name, brightness_level)
+        return f"Image '{image_name}' saved successfully"
+
+    def spool_upload(self, stream, chunk_size=UPLOAD_CHUNK):
+        """Copies an upload stream to a temp file chunk by chunk; returns its path."""
+        fd, path = tempfile.mkstemp(prefix="wise_upload_")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+        except Exception:
+            os.remove(path)
+            raise
+        return path
+
+    def save_upload(self, upload_path, user_id, image_name, brightness_level=1.0, quality="high"):
+        """
+        Job body for /upload: decodes the spooled file, converts it to an
+        RGB565 frame and stores it. The temp file is always removed.
+        """
+        try:
+            frame = encode_frame(image_to_rgb565(upload_path, quality=quality))
+        finally:
+            os.remove(upload_path)
+        image = self._store_image(frame, user_id, image_name, brightness_level)
+        return {"image_id": image.id, "image_name": image_name, "blob_hash": image.blob_hash}
+
+    def _store_image(self, data, user_id, image_name, brightness_level):
+        # Un fichero ya subido (con este u otro nombre) reutiliza su blob
+        blob = acquire_blob(data)
         new_image = Image(
             user_id=user_id,
             image_name=image_name,
             brightness_level=brightness_level,
-            image_data=image_binary
+            blob_hash=blob.hash
         )
         db.session.add(new_image)
         db.session.commit()
-        return f"Image '{image_name}' saved successfully"
+        self._invalidate_frames(image_name)
+        try:
+            ingest_image(image_name)
+        except Exception as e:
+            # Imágenes que no son frames (p. ej. PNG) se guardan igualmente
+            print(f"[S] Could not precompute segments for '{image_name}': {e}")
+        return new_image
+
+    def delete_image(self, image_name):
+        """Deletes every image called `image_name`, freeing blobs no other image uses."""
+        images = Image.query.filter_by(image_name=image_name).all()
+        if not images:
+            return "Image not found"
+        for image in images:
+            release_blob(image.blob_hash)
+            db.session.delete(image)
+        db.session.commit()
+        self._invalidate_frames(image_name)
+        return f"Image '{image_name}' deleted successfully"
+
+    def _invalidate_frames(self, image_name):
+        FRAME_CACHE.invalidate(image_name)
+        FRAME_STORE.invalidate(image_name)
+        BRIGHTNESS_VARIANTS_CACHE.invalidate(image_name)
 
     def adjust_brightness(self, image_id, adjustment):
-        """Adjusts the brightness of an image."""
+        """Adjusts the brightness of an image. Returns (message, job or None)."""
         """image = Image.query.get(image_id)"""
         image = Image.query.filter_by(id=image_id).first()
-        """ajustar els atributs per el main"""
-        if adjustment == "increase brightness":
-            main(clients, inputString = "INCREASE")
+        if image is None:
+            return "Image not found", None
+        steps = {"increase brightness": 1, "decrease brightness": -1}.get(adjustment, 0)
+        image.brightness_level = step_level(image.brightness_level, steps)
+        db.session.commit()
+        job = None
+        if SOFT_BRIGHTNESS:
+            # Paneles sin dimming: se envía el frame ya atenuado
+            job = self.panel_job("brightness", f"BRIGHTNESS {image.image_name} {image.brightness_level}")
+        elif adjustment == "increase brightness":
+            job = self.panel_job("brightness", "INCREASE")
         elif adjustment == "decrease brightness":
-            main(clients, inputString = "DECREASE")
+            job = self.panel_job("brightness", "DECREASE")
 
-        db.session.commit()
-        return f"Brightness adjusted to {image}"
+        return f"Brightness adjusted to {image}", job
 
     def change_image(self, image_name):
-        """Changes the current image."""
+        """Changes the current image. Returns (message, job or None)."""
         image = image_name
         if image == None:
-            return "Image not found"
-        main(clients, inputString=f"SHOW {image_name}")
-        return f"Image changed to {image_name}"
+            return "Image not found", None
+        job = self.panel_job("change-image", f"SHOW {image_name}")
+        return f"Image changed to {image_name}", job
     
     def gesture_adjust(self, command):
+        """Queues the panel command for a gesture. Returns (message, job or None)."""
         print(f"Gesture command received: {command}")
         if(command == "finger up"):
-            main(clients, inputString = "INCREASE")
             print("Brightness increased")
-            return "Brightness increased"
+            return "Brightness increased", self.panel_job("gesture", "INCREASE")
         elif(command == "finger down"):
-            main(clients, inputString = "DECREASE")
             print("Brightness decreased")
-            return "Brightness decreased"
+            return "Brightness decreased", self.panel_job("gesture", "DECREASE")
         elif(command == "fist"):
-            main(clients, inputString =f"SHOW {"image_matrix_purple.py"}")
             print("Fist command received")
-            return "Fist command received"
+            return "Fist command received", self.panel_job("gesture", f"SHOW {"image_matrix_purple.py"}")
         elif(command == "palm"):
-            main(clients, inputString =f"SHOW {"image_matrix_yellow.py"}")
             print("Palm command received")
-            return "Palm command received"
-        return "Nice command!"
+            return "Palm command received", self.panel_job("gesture", f"SHOW {"image_matrix_yellow.py"}")
+        return "Nice command!", None
     
     def control_screen(self, command):
-        """Controls the screen state based on the text provided."""
+        """Controls the screen state based on the text provided. Returns (message, job or None)."""
         if command == "turn on":
-            main(clients, inputString=f"TEXT {command}")
             print("(screen ON)")
-            return "Screen turned ON"
+            return "Screen turned ON", self.panel_job("screen", f"TEXT {command}")
         elif command == "turn off":
-            main(clients, inputString=f"TEXT {command}")
             print("(screen OFF)")
-            return "Screen turned OFF"
+            return "Screen turned OFF", self.panel_job("screen", f"TEXT {command}")
         else:
-            return "Error: Invalid text value. Use 'ON' or 'OFF'."
+            return "Error: Invalid text value. Use 'ON' or 'OFF'.", None
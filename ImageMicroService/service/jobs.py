@@ -0,0 +1,165 @@
+"""
+Background jobs for work that must not run on the Flask request thread.
+
+`JOBS.submit(kind, fn, *args)` returns a Job immediately; `fn` runs on a
+small thread pool inside the same Flask app context as the request that
+submitted it, and its return value (or error) is kept on the Job for
+`GET /api/image/jobs/<id>`. Only the last JOB_HISTORY finished jobs are
+remembered.
+
+`submit_steps(kind, [(delay, fn, args), ...])` runs several steps in order,
+each `delay` seconds after the previous one finished. The wait is a timer,
+not a sleeping worker. A step may return a concurrent Future (e.g. a command
+queued on the panel dispatcher): the job then continues when it resolves,
+again without holding a worker. PANEL_JOBS has a single worker so panel
+commands reach the dispatcher in the order they were requested.
+"""
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from flask import current_app, has_app_context
+
+JOB_WORKERS = int(os.getenv("WISE_JOB_WORKERS", "2"))
+JOB_HISTORY = 256
+
+QUEUED, SCHEDULED, RUNNING, DONE, FAILED = "queued", "scheduled", "running", "done", "failed"
+
+
+class Job:
+    def __init__(self, kind):
+        self.id       = uuid.uuid4().hex
+        self.kind     = kind
+        self.status   = QUEUED
+        self.result   = None
+        self.error    = None
+        self.created  = time.time()
+        self.started  = None
+        self.finished = None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class JobQueue:
+    def __init__(self, workers=JOB_WORKERS, history=JOB_HISTORY):
+        self.history   = history
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wise-job")
+        self._jobs     = OrderedDict()  # id -> Job, en orden de creación
+        self._lock     = threading.Lock()
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """Queues `fn(*args, **kwargs)` and returns its Job right away."""
+        job = self._register(Job(kind))
+        app = current_app._get_current_object() if has_app_context() else None
+        self._executor.submit(self._run, job, app, fn, args, kwargs)
+        return job
+
+    def submit_steps(self, kind, steps):
+        """
+        Queues a sequence of (delay_seconds, fn, args) steps; the Job result
+        is the list of step results. A failing step stops the sequence.
+        """
+        job = self._register(Job(kind))
+        job.result = []
+        app = current_app._get_current_object() if has_app_context() else None
+        self._next_step(job, app, list(steps))
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _register(self, job):
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        return job
+
+    def _run(self, job, app, fn, args, kwargs):
+        job.status, job.started = RUNNING, time.time()
+        try:
+            job.result = _call(app, fn, args, kwargs)
+            job.status = DONE
+        except Exception as e:
+            print(f"[S] Job {job.kind} {job.id} failed: {e}")
+            job.error, job.status = str(e), FAILED
+        finally:
+            job.finished = time.time()
+
+    def _next_step(self, job, app, steps):
+        delay = steps[0][0]
+        if delay > 0:
+            job.status = SCHEDULED
+            timer = threading.Timer(delay, self._executor.submit, (self._run_step, job, app, steps))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._executor.submit(self._run_step, job, app, steps)
+
+    def _run_step(self, job, app, steps):
+        _, fn, args = steps[0]
+        job.status  = RUNNING
+        job.started = job.started or time.time()
+        try:
+            result = _call(app, fn, args, {})
+        except Exception as e:
+            self._step_done(job, app, steps, error=e)
+            return
+        if isinstance(result, Future):
+            result.add_done_callback(lambda future: self._future_done(job, app, steps, future))
+        else:
+            self._step_done(job, app, steps, result)
+
+    def _future_done(self, job, app, steps, future):
+        error = future.exception()
+        self._step_done(job, app, steps, None if error else future.result(), error)
+
+    def _step_done(self, job, app, steps, result=None, error=None):
+        if error is not None:
+            print(f"[S] Job {job.kind} {job.id} failed: {error}")
+            job.error, job.status, job.finished = str(error), FAILED, time.time()
+            return
+        job.result.append(result)
+        if len(steps) > 1:
+            self._next_step(job, app, steps[1:])
+        else:
+            job.status, job.finished = DONE, time.time()
+
+    def _prune(self):
+        finished = [j.id for j in self._jobs.values() if j.status in (DONE, FAILED)]
+        for job_id in finished[:max(len(finished) - self.history, 0)]:
+            del self._jobs[job_id]
+
+
+def _call(app, fn, args, kwargs):
+    if app is None:
+        return fn(*args, **kwargs)
+    with app.app_context():
+        return fn(*args, **kwargs)
+
+
+# Cola compartida por las rutas REST (conversiones, etc.)
+JOBS = JobQueue()
+# Órdenes a los paneles: un único worker, en orden de llegada
+PANEL_JOBS = JobQueue(workers=1)
+
+
+def get_job(job_id):
+    """Looks a job id up in every queue."""
+    for queue in (JOBS, PANEL_JOBS):
+        job = queue.get(job_id)
+        if job is not None:
+            return job
+    return None
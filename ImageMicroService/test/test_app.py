@@ -1,5 +1,6 @@
 import sys
 import os
+import io
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from controller.app import app
@@ -18,4 +19,18 @@ def test_command_valid():
     print("Status Code:", response.status_code)
     print("Response JSON:", response.get_json())
     assert response.status_code == 200
-    assert "result" in response.get_json()
\ No newline at end of file
+    assert "result" in response.get_json()
+
+def test_upload_rejects_form_encoded_raw_body():
+    client = app.test_client()
+    response = client.post('/api/image/upload?user_id=1&image_name=x', data=b"\x89PNG...",
+                           content_type='application/x-www-form-urlencoded')
+    assert response.status_code == 400
+
+def test_upload_rejects_empty_file():
+    client = app.test_client()
+    response = client.post('/api/image/upload?user_id=1&image_name=x',
+                           data={'file': (io.BytesIO(b""), 'x.png')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Uploaded file is empty"}
@@ -0,0 +1,152 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import socket
+import asyncio
+import threading
+import pytest
+
+import scripts_tcp.async_server as async_server
+from scripts_tcp.async_server import AsyncWall
+
+ORDER = {20: 0, 21: 1, 22: 2}
+
+class FakePanel(threading.Thread):
+    """Minimal ESP32: ACKs segments/loads, answers READY with GO and LIST_IMAGES."""
+
+    def __init__(self, port, last_octet, images=(), silent=False):
+        super().__init__(daemon=True)
+        self.sock = socket.socket()
+        self.sock.bind((f"127.0.0.{last_octet}", 0))
+        self.sock.connect(("127.0.0.1", port))
+        self.fp = self.sock.makefile("rb")
+        self.images, self.silent = images, silent
+        self.commands, self.payloads = [], []
+        self.start()
+
+    def run(self):
+        try:
+            for raw in self.fp:
+                line = raw.decode().strip()
+                self.commands.append(line)
+                if line.startswith(("SEGMENT:", "LOAD_IMAGE:")):
+                    self.payloads.append(self.fp.read(int(line.rsplit(":", 1)[1])))
+                if self.silent:
+                    continue
+                if line == "ENCODINGS?":
+                    self.sock.sendall(b"ENCODINGS:\n")
+                elif line.startswith(("SEGMENT:", "LOAD_IMAGE:")):
+                    self.sock.sendall(b"ACK\n")
+                elif line == "READY":
+                    self.sock.sendall(b"GO")  # sin '\n', como el recv() del firmware
+                elif line == "LIST_IMAGES":
+                    self.sock.sendall(("IMAGES:\n" + "".join(n + "\n" for n in self.images) + "END_IMAGES\n").encode())
+        except OSError:
+            pass
+
+def _wall(n=3):
+    wall = AsyncWall(host="127.0.0.1", port=0, num_clients=n, segment_order=ORDER).start()
+    return wall
+
+def _run(wall, coro):
+    return asyncio.run_coroutine_threadsafe(coro, wall._loop).result(10)
+
+def _wait_panels(wall, n):
+    deadline = time.time() + 2
+    while wall.count() < n and time.time() < deadline:
+        time.sleep(0.01)
+    assert wall.count() == n
+
+def test_segmented_send_ready_go_on_one_loop():
+    wall = _wall()
+    panels = [FakePanel(wall.port, 20 + i) for i in range(3)]
+    _wait_panels(wall, 3)
+    threads_before = threading.active_count()
+
+    data = bytes(range(256)) * 12
+    _run(wall, wall.send_segmented(data, delta=False))
+    assert threading.active_count() == threads_before  # sin hilos por panel
+    assert b"".join(p.payloads[0] for p in panels) == data
+    for p in panels:
+        assert p.commands[-3:] == ["READY", "SHOW_TEMP", "CLEAR_BUFFER"]
+    wall.stop()
+
+def test_list_and_show_keep_command_surface():
+    wall = _wall()
+    [FakePanel(wall.port, 20, ["a", "b"]), FakePanel(wall.port, 21, ["b", "c"]), FakePanel(wall.port, 22, ["b"])]
+    _wait_panels(wall, 3)
+    assert wall.call("LIST", timeout=10) == {"b"}
+    assert wall.call("SHOW b", timeout=10) is None
+    wall.stop()
+
+def test_silent_panel_only_delays_itself(monkeypatch):
+    monkeypatch.setattr(async_server, "ACK_TIMEOUT", 0.2)
+    monkeypatch.setattr(async_server, "GO_TIMEOUT", 0.2)
+    monkeypatch.setattr(async_server, "NEGOTIATE_TIMEOUT", 0.1)
+    wall = _wall()
+    good = [FakePanel(wall.port, 20), FakePanel(wall.port, 21)]
+    FakePanel(wall.port, 22, silent=True)
+    _wait_panels(wall, 3)
+
+    t0 = time.time()
+    _run(wall, wall.send_segmented(bytes(3000), delta=False))
+    # 3 intentos de ACK + GO, cada uno limitado por su timeout
+    assert time.time() - t0 < 2
+    assert all(len(p.payloads) == 1 for p in good)
+    wall.stop()
+
+def test_reconnect_replaces_old_panel():
+    wall = _wall()
+    FakePanel(wall.port, 20)
+    _wait_panels(wall, 1)
+    FakePanel(wall.port, 20)
+    time.sleep(0.2)
+    assert wall.count() == 1
+    wall.stop()
+
+def test_serve_then_call_uses_the_same_loop():
+    # Como controller/app.py: serve() en su hilo y las órdenes desde el dispatcher
+    wall = AsyncWall(host="127.0.0.1", port=0, num_clients=1, segment_order=ORDER)
+    server = threading.Thread(target=wall.serve, daemon=True)
+    server.start()
+    wall._ready.wait(2)
+    thread = wall._thread
+    FakePanel(wall.port, 20, ["a"])
+    _wait_panels(wall, 1)
+    assert wall.call("LIST", timeout=3) == {"a"}
+    assert wall._thread is thread
+    wall.stop()
+    server.join(2)
+    assert not server.is_alive()
+
+def test_start_reports_bind_errors():
+    wall = _wall(1)
+    other = AsyncWall(host="127.0.0.1", port=wall.port, num_clients=1, segment_order=ORDER)
+    with pytest.raises(OSError):
+        other.start()
+    wall.stop()
+
+def test_ready_go_ignores_unindexed_panels(monkeypatch):
+    monkeypatch.setattr(async_server, "GO_TIMEOUT", 2.0)
+    wall = _wall()
+    [FakePanel(wall.port, 20 + i) for i in range(3)]
+    FakePanel(wall.port, 50, silent=True)   # sin índice de segmento
+    _wait_panels(wall, 4)
+
+    t0 = time.time()
+    assert _run(wall, wall.ready_go()) == {0, 1, 2}
+    assert time.time() - t0 < 1.0
+    wall.stop()
+
+def test_late_go_is_dropped_before_next_send(monkeypatch):
+    monkeypatch.setattr(async_server, "GO_TIMEOUT", 0.2)
+    wall = _wall(1)
+    FakePanel(wall.port, 20, silent=True)
+    _wait_panels(wall, 1)
+    panel = wall.panels[0]
+    assert _run(wall, wall.ready_go()) == set()
+    panel.link.feed(b"GO\nACK\n")   # GO tardío + ACK del siguiente envío
+    assert _run(wall, panel.wait_ack(None, 1.0)) == "ACK"
+    wall.stop()
@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import socket
+import threading
+
+from scripts_tcp import wire
+from scripts_tcp.barrier import ready_go_barrier, BARRIER_STATS
+
+def _panels(n):
+    pairs = [socket.socketpair() for _ in range(n)]
+    clients = [(srv, (f"10.0.0.{20 + i}", 5000)) for i, (srv, _) in enumerate(pairs)]
+    return clients, [esp for _, esp in pairs]
+
+def index_of(addr):
+    return int(addr[0].split('.')[-1]) - 20
+
+def test_returns_when_last_go_arrives():
+    clients, esps = _panels(3)
+    for i, esp in enumerate(esps):
+        threading.Timer(0.05 * (i + 1), esp.sendall, (b"GO\n",)).start()
+    t0 = time.monotonic()
+    assert ready_go_barrier(clients, index_of, range(3), timeout=5) == {0, 1, 2}
+    assert time.monotonic() - t0 < 0.5
+    last = BARRIER_STATS.stats()["last"]
+    assert last["missing"] == [] and 140 <= last["go_ms"]["2"] < 500
+
+def test_silent_panel_does_not_delay_the_others():
+    clients, esps = _panels(3)
+    esps[0].sendall(b"GO\n")
+    esps[2].sendall(b"GO\n")
+    t0 = time.monotonic()
+    assert ready_go_barrier(clients, index_of, range(3), timeout=0.3) == {0, 2}
+    assert 0.3 <= time.monotonic() - t0 < 1.0
+    last = BARRIER_STATS.stats()["last"]
+    assert last["missing"] == [1] and last["go_ms"]["0"] < 100
+
+def test_go_coalesced_with_ack_is_not_lost():
+    clients, esps = _panels(1)
+    conn = clients[0][0]
+    esps[0].sendall(b"ACK\nGO\n")
+    assert wire.wait_ack(conn, None, 1.0) == "ACK"   # el GO queda en el buffer
+    assert ready_go_barrier(clients, index_of, range(1), timeout=0.5) == {0}
+
+def test_late_go_is_not_taken_for_the_next_ack():
+    clients, esps = _panels(2)
+    esps[0].sendall(b"GO\n")
+    assert ready_go_barrier(clients, index_of, range(2), timeout=0.1) == {0}
+    # El GO del panel 1 llega tarde, justo antes del ACK del siguiente segmento
+    esps[1].sendall(b"GO\nACK\n")
+    assert wire.wait_ack(clients[1][0], None, 1.0) == "ACK"
+    assert wire.link_for(clients[1][0]).pop() is None
@@ -0,0 +1,31 @@
+import sys
+import os
+import sqlite3
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+
+from scripts_tcp import batch_ingest
+from scripts_tcp.frame_format import is_frame
+
+def test_ingest_two_files_into_temp_db(tmp_path, monkeypatch):
+    for i, colour in enumerate([(255, 0, 0), (0, 0, 255)]):
+        Image.new("RGB", (40, 20), colour).save(tmp_path / f"{i}.png")
+    (tmp_path / "broken.png").write_bytes(b"not an image")
+    db = str(tmp_path / "images.db")
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE images (id INTEGER PRIMARY KEY, user_id INTEGER, image_name VARCHAR(120), "
+                 "brightness_level FLOAT, image_data BLOB)")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(batch_ingest, "PENDING_PER_WORKER", 1)
+    stored, failed, _ = batch_ingest.ingest(batch_ingest.collect_inputs([str(tmp_path)]), db_path=db, workers=1)
+    assert (stored, failed) == (2, ["broken.png"])
+
+    conn = sqlite3.connect(db)
+    rows = conn.execute("SELECT i.image_name, b.data FROM images i JOIN image_blobs b ON b.hash = i.blob_hash "
+                        "ORDER BY i.image_name").fetchall()
+    conn.close()
+    assert [name for name, _ in rows] == ["0.png", "1.png"]
+    assert all(is_frame(data) for _, data in rows)
@@ -0,0 +1,63 @@
+import sys
+import os
+import sqlite3
+import threading
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+from extensions import db
+from models.models import ImageBlob, acquire_blob
+from scripts_tcp import blob_store
+
+def make_db():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE images (id INTEGER PRIMARY KEY, user_id INTEGER, image_name VARCHAR(120), "
+                  "brightness_level FLOAT, image_data BLOB)")
+    conn.executemany("INSERT INTO images (user_id, image_name, image_data) VALUES (1, ?, ?)",
+                     [("a", b"same"), ("b", b"same"), ("c", b"other")])
+    return conn
+
+def test_migrate_stores_each_content_once():
+    conn = make_db()
+    assert blob_store.migrate(conn) == 3
+    assert blob_store.migrate(conn) == 0
+    blobs = dict(conn.execute("SELECT data, refcount FROM image_blobs"))
+    assert blobs == {b"same": 2, b"other": 1}
+    assert conn.execute("SELECT COUNT(*) FROM images WHERE image_data IS NOT NULL").fetchone()[0] == 0
+
+def test_release_deletes_unreferenced_blob():
+    conn = make_db()
+    blob_store.migrate(conn)
+    digest = blob_store.content_hash(b"same")
+    blob_store.release_blob(conn, digest)
+    assert conn.execute("SELECT refcount FROM image_blobs WHERE hash = ?", (digest,)).fetchone()[0] == 1
+    blob_store.release_blob(conn, digest)
+    assert conn.execute("SELECT COUNT(*) FROM image_blobs WHERE hash = ?", (digest,)).fetchone()[0] == 0
+
+def test_parallel_uploads_of_same_content_share_one_blob(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'blobs.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+
+    start, errors = threading.Barrier(2), []
+    def upload():
+        with app.app_context():
+            try:
+                start.wait()
+                acquire_blob(b"same picture")
+                db.session.commit()
+            except Exception as e:
+                errors.append(e)
+    threads = [threading.Thread(target=upload) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    with app.app_context():
+        blob = db.session.get(ImageBlob, blob_store.content_hash(b"same picture"))
+        assert blob.refcount == 2
@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from scripts_tcp.brightness import apply_brightness, BrightnessVariants, step_level
+
+def test_lut_scales_each_channel():
+    white = np.array([[0xFFFF, 0xF800]], dtype=np.uint16)
+    half  = apply_brightness(white, 0.5)
+    assert half[0, 0] == (16 << 11) | (32 << 5) | 16
+    assert half[0, 1] == 16 << 11
+    assert apply_brightness(white, 1.0) is white
+    assert step_level(1.0, 1) == 1.0 and step_level(0.1, -1) == 0.1
+
+def test_variants_keep_most_used_levels():
+    mat   = np.arange(640 * 320, dtype=np.uint32).astype(np.uint16).reshape(640, 320)
+    cache = BrightnessVariants(per_image=2)
+    for level in (0.5, 0.5, 0.6, 0.7, 0.7, 0.7):
+        cache.get("img", "v1", mat, level)
+    assert sorted(cache._images["img"]["frames"]) == [0.5, 0.7]
+    first = cache.get("img", "v1", mat, 0.7)
+    assert cache.get("img", "v1", mat, 0.7) is first
+    # Una versión nueva de la imagen descarta las variantes
+    cache.get("img", "v2", mat, 0.7)
+    assert list(cache._images["img"]["frames"]) == [0.7]
+
+def test_step_on_image_missing_from_db_is_logged(monkeypatch, capsys):
+    from scripts_tcp import Server_Code1
+    def missing(name):
+        raise ValueError(f"Image '{name}' not found")
+    monkeypatch.setattr(Server_Code1, "SOFT_BRIGHTNESS", True)
+    monkeypatch.setattr(Server_Code1, "current_brightness", missing)
+    monkeypatch.setitem(Server_Code1.CURRENT_IMAGE, "name", "gone")
+    monkeypatch.setitem(Server_Code1.CURRENT_IMAGE, "level", None)
+    Server_Code1.main([], "INCREASE 2")
+    assert "Brightness error" in capsys.readouterr().out
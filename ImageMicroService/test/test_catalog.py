@@ -0,0 +1,85 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import socket
+import threading
+
+import scripts_tcp.Server_Code1 as server
+from scripts_tcp.catalog import PanelCatalog, PANEL_CATALOG
+from scripts_tcp.panel_workers import PANEL_WORKERS
+
+def test_catalog_known_and_unknown_panels():
+    cat = PanelCatalog()
+    cat.add("10.0.0.20", "a")                    # desconocido: se ignora
+    assert cat.has("10.0.0.20", "a") is None
+    cat.replace("10.0.0.20", {"a", "b"})
+    cat.replace("10.0.0.21", {"b"})
+    cat.add("10.0.0.21", "c")
+    assert cat.common(["10.0.0.20", "10.0.0.21"]) == {"b"}
+    assert cat.common(["10.0.0.20", "10.0.0.22"]) is None
+    assert cat.lacking(["10.0.0.20", "10.0.0.21", "10.0.0.22"], "c") == ["10.0.0.20"]
+    cat.forget("10.0.0.21")
+    assert cat.has("10.0.0.21", "b") is None
+
+def _panels(images, delay=0.2):
+    clients, seen = [], []
+    for i, names in enumerate(images):
+        srv, esp = socket.socketpair()
+        addr = (f"10.0.0.{20 + i}", 5000)
+        clients.append((srv, addr))
+        def run(esp=esp, names=names):
+            for raw in esp.makefile("rb"):
+                line = raw.decode().strip()
+                seen.append(line)
+                if line == "LIST_IMAGES":
+                    time.sleep(delay)
+                    esp.sendall(("IMAGES:\n" + "".join(n + "\n" for n in names) + "END_IMAGES\n").encode())
+        threading.Thread(target=run, daemon=True).start()
+    return clients, seen
+
+def test_list_is_concurrent_then_served_from_memory():
+    PANEL_CATALOG.clear()
+    clients, seen = _panels([["a", "b"], ["b"], ["b", "c"], ["b"]])
+    t0 = time.monotonic()
+    assert server.list_images_from_all_clients(clients) == {"b"}
+    assert time.monotonic() - t0 < 0.6           # en serie serían ≥ 0.8 s
+    assert PANEL_CATALOG.to_dict()["10.0.0.22"] == ["b", "c"]
+
+    t0 = time.monotonic()
+    assert server.list_images_from_all_clients(clients) == {"b"}
+    assert time.monotonic() - t0 < 0.05
+    assert seen.count("LIST_IMAGES") == 4
+    for conn, _ in clients:
+        PANEL_WORKERS.retire(conn)
+
+def test_load_ack_updates_catalog_and_show_loads_missing(monkeypatch):
+    PANEL_CATALOG.clear()
+    PANEL_CATALOG.replace("10.0.0.20", set())
+    PANEL_CATALOG.replace("10.0.0.21", {"x"})
+    srv, esp = socket.socketpair()
+    esp.sendall(b"ACK\n")
+    server.handle_full_load_segment(srv, ("10.0.0.20", 1), 0, "x", 0, 4, bytes(4))
+    assert PANEL_CATALOG.has("10.0.0.20", "x") is True
+
+    loads, shows = [], []
+    monkeypatch.setattr(server, "prepare_load", lambda name: b"frame")
+    monkeypatch.setattr(server, "send_full", lambda clients, name, data: loads.append([a[0] for _, a in clients]))
+    monkeypatch.setattr(server, "broadcast", lambda clients, cmd: shows.append(cmd))
+    clients = [(None, ("10.0.0.20", 1)), (None, ("10.0.0.21", 1)), (None, ("10.0.0.22", 1))]
+    server.show_image(clients, "y")
+    assert loads == [["10.0.0.20", "10.0.0.21"]] and shows == ["SHOW_IMAGE:y"]
+    server.show_image(clients, "x")
+    assert len(loads) == 1
+
+def test_text_off_forgets_the_panels():
+    PANEL_CATALOG.clear()
+    srv, esp = socket.socketpair()
+    clients = [(srv, ("10.0.0.20", 5000))]
+    PANEL_CATALOG.replace("10.0.0.20", {"a"})
+
+    server.main(clients, "TEXT turn off")
+    assert PANEL_CATALOG.has("10.0.0.20", "a") is None
+    assert PANEL_CATALOG.to_dict() == {}
+    esp.close()
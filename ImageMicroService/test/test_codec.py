@@ -0,0 +1,52 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import socket
+import numpy as np
+import pytest
+
+from scripts_tcp import codec
+from scripts_tcp.codec import encode_rle, encode_palette, encode_segment, RAW, RLE, PAL
+
+def decode_rle(payload):
+    runs = np.frombuffer(payload, dtype=[("count", "<u2"), ("pixel", "<u2")])
+    return np.repeat(runs["pixel"], runs["count"]).astype("<u2").tobytes()
+
+def decode_palette(payload):
+    n = int(np.frombuffer(payload[:2], dtype="<u2")[0])
+    palette = np.frombuffer(payload[2:2 + 2 * n], dtype="<u2")
+    indices = np.frombuffer(payload[2 + 2 * n:], dtype=np.uint8)
+    return palette[indices].astype("<u2").tobytes()
+
+def test_rle_roundtrip_splits_long_runs():
+    # Un segmento de color sólido más largo que 65535 píxeles
+    seg = np.full(70000, 63488, dtype="<u2").tobytes()
+    payload = encode_rle(seg)
+    assert len(payload) == 8
+    assert decode_rle(payload) == seg
+
+def test_palette_roundtrip():
+    seg = np.random.default_rng(0).integers(0, 12, 5000).astype("<u2").tobytes()
+    assert decode_palette(encode_palette(seg)) == seg
+
+def test_encode_segment_picks_smallest():
+    solid = np.full(20480, 31, dtype="<u2").tobytes()
+    assert encode_segment(solid, {RLE, PAL})[0] == RLE
+    few = np.random.default_rng(1).integers(0, 4, 20480).astype("<u2").tobytes()
+    assert encode_segment(few, {RLE, PAL})[0] == PAL
+    noise = np.random.default_rng(2).integers(0, 65535, 20480).astype("<u2").tobytes()
+    enc, payload, _ = encode_segment(noise, {RLE, PAL})
+    assert enc == RAW and payload == noise
+    assert encode_segment(solid, set())[0] == RAW
+
+def test_negotiation_is_opt_in(monkeypatch):
+    server, panel = socket.socketpair()
+    panel.setblocking(False)
+    monkeypatch.setattr(codec, "NEGOTIATE", False)
+    assert codec.negotiate_encodings(server, ("10.0.0.20", 1)) == set()
+    with pytest.raises(BlockingIOError):
+        panel.recv(64)            # no se ha enviado ENCODINGS?
+    assert codec.encodings_for(server) == set()
+    server.close()
+    panel.close()
@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import socket
+import numpy as np
+
+from scripts_tcp.delta import DELTA_TRACKER, diff_runs, encode_delta, RUN_HEADER
+from scripts_tcp.Server_Code1 import handle_segment_direct
+
+def test_diff_runs_merges_consecutive_rows():
+    old = np.zeros((64, 320), dtype=np.uint16)
+    new = old.copy()
+    new[3, 0] = 1
+    new[4, 319] = 1
+    new[10, 7] = 1
+    runs = diff_runs(old.tobytes(), new.tobytes(), block=640)
+    assert runs == [(3 * 640, 2 * 640), (10 * 640, 640)]
+
+def test_encode_delta_payload_applies_on_old_segment():
+    old = bytes(1000)
+    new = bytearray(old)
+    new[650:660] = b"\x01" * 10
+    new = bytes(new)
+    runs = diff_runs(old, new, block=640)
+    header, payload = encode_delta(0, len(new), runs, new)
+    assert header == f"DELTA:0:1000:1:{len(payload)}\n".encode()
+
+    # Lo que haría el panel: aplicar cada run sobre el segmento anterior
+    patched = bytearray(old)
+    pos = 0
+    while pos < len(payload):
+        rel, ln = RUN_HEADER.unpack_from(payload, pos)
+        pos += RUN_HEADER.size
+        patched[rel:rel + ln] = payload[pos:pos + ln]
+        pos += ln
+    assert bytes(patched) == new
+
+def test_identical_segments_have_no_runs():
+    data = os.urandom(4096)
+    assert diff_runs(data, data) == []
+
+def test_tracker_only_copies_segments_when_delta_is_on():
+    data = os.urandom(2000)
+    for delta in (False, True):
+        DELTA_TRACKER.clear()
+        server, panel = socket.socketpair()
+        panel.sendall(b"ACK\n")
+        handle_segment_direct(server, ("127.0.0.20", 1), 0, 0, 1000, data, delta)
+        assert (DELTA_TRACKER.previous(0, server, 0, 1000) is not None) == delta
+        server.close()
+        panel.close()
+    DELTA_TRACKER.clear()
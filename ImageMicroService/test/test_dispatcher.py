@@ -0,0 +1,98 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import socket
+import threading
+
+import scripts_tcp.Server_Code1 as server
+from scripts_tcp.dispatcher import PanelDispatcher
+
+def test_commands_never_overlap(monkeypatch):
+    running, seen = [], []
+    def fake_main(clients, inputString):
+        running.append(inputString)
+        assert len(running) == 1, "two commands on the sockets at once"
+        time.sleep(0.01)
+        seen.append(inputString)
+        running.remove(inputString)
+        return inputString
+    monkeypatch.setattr(server, "main", fake_main)
+
+    dispatcher = PanelDispatcher([])
+    futures = []
+    threads = [threading.Thread(target=lambda i=i: futures.append(dispatcher.submit(f"LOAD img{i}")))
+               for i in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert sorted(f.result(timeout=2) for f in futures) == sorted(seen)
+    assert len(seen) == 8
+    dispatcher.stop()
+
+def test_reconnect_replaces_old_connection(monkeypatch):
+    monkeypatch.setattr("scripts_tcp.dispatcher.negotiate_encodings", lambda conn, addr: set())
+    dispatcher = PanelDispatcher([])
+    a, _ = socket.socketpair()
+    b, _ = socket.socketpair()
+    assert dispatcher.add_client(a, ("10.0.0.20", 1)).result(timeout=2) == 1
+    assert dispatcher.add_client(b, ("10.0.0.20", 2)).result(timeout=2) == 1
+    assert dispatcher.clients == [(b, ("10.0.0.20", 2))] and a.fileno() == -1
+    dispatcher.close_all().result(timeout=2)
+    assert dispatcher.count() == 0
+    dispatcher.stop()
+
+def test_bursts_are_coalesced(monkeypatch):
+    gate, sent = threading.Event(), []
+    def fake_main(clients, inputString):
+        gate.wait(2)
+        sent.append(inputString)
+        return inputString
+    monkeypatch.setattr(server, "main", fake_main)
+
+    dispatcher = PanelDispatcher([], min_intervals={})
+    first = dispatcher.submit("LIST")  # ocupa el dispatcher mientras llega la ráfaga
+    time.sleep(0.05)
+    ups   = [dispatcher.submit(c) for c in ("INCREASE", "INCREASE", "DECREASE", "INCREASE")]
+    shows = [dispatcher.submit(f"SHOW img{i}") for i in range(3)]
+    undo  = [dispatcher.submit("INCREASE"), dispatcher.submit("DECREASE")]
+    gate.set()
+    assert undo[1].result(timeout=2) is None
+    assert shows[0].result(timeout=2) == "SHOW img2"
+    assert ups[0].result(timeout=2) == "INCREASE 2"
+    assert first.result() == "LIST"
+    assert sent == ["LIST", "INCREASE 2", "SHOW img2"]
+    dispatcher.stop()
+
+def test_cancelling_pair_at_head_of_queue(monkeypatch):
+    gate, sent = threading.Event(), []
+    def fake_main(clients, inputString):
+        gate.wait(2)
+        sent.append(inputString)
+        return inputString
+    monkeypatch.setattr(server, "main", fake_main)
+
+    dispatcher = PanelDispatcher([], min_intervals={})
+    busy = dispatcher.submit("LIST")
+    time.sleep(0.05)
+    undo = [dispatcher.submit("INCREASE"), dispatcher.submit("DECREASE")]
+    show = dispatcher.submit("SHOW x")
+    gate.set()
+    assert show.result(timeout=2) == "SHOW x"
+    assert [f.result(timeout=2) for f in undo] == [None, None]
+    assert busy.result() == "LIST"
+    assert sent == ["LIST", "SHOW x"]
+    assert dispatcher.stats()["coalesced"] == 1
+    assert dispatcher.call("SHOW y", timeout=2) == "SHOW y"  # el hilo sigue vivo
+    dispatcher.stop()
+
+def test_min_interval_debounces_class(monkeypatch):
+    sent = []
+    monkeypatch.setattr(server, "main", lambda clients, inputString: sent.append((time.monotonic(), inputString)))
+    dispatcher = PanelDispatcher([], min_intervals={"show": 0.2})
+    dispatcher.call("SHOW a", timeout=2)
+    futures = [dispatcher.submit(f"SHOW {n}") for n in "bcd"]
+    futures[-1].result(timeout=2)
+    assert [c for _, c in sent] == ["SHOW a", "SHOW d"]
+    assert sent[1][0] - sent[0][0] >= 0.19
+    dispatcher.stop()
@@ -0,0 +1,30 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+
+from scripts_tcp.frame_format import encode_frame, decode_frame, is_frame, HEADER_SIZE
+
+def test_roundtrip_little_endian():
+    mat = np.arange(640 * 320, dtype=np.uint32).astype(np.uint16).reshape(640, 320)
+    blob = encode_frame(mat)
+    assert is_frame(blob)
+    assert len(blob) == HEADER_SIZE + mat.nbytes
+    out = decode_frame(blob)
+    assert out.shape == (640, 320)
+    assert np.array_equal(out, mat)
+    # El payload es exactamente lo que se envía a los paneles
+    assert out.tobytes() == mat.astype("<u2").tobytes()
+
+def test_roundtrip_big_endian():
+    mat = np.full((64, 320), 63488, dtype=np.uint16)
+    out = decode_frame(encode_frame(mat, byteorder="big"))
+    assert np.array_equal(out, mat)
+    assert out.tobytes()[:2] == b"\xf8\x00"
+
+def test_legacy_blob_is_not_frame():
+    assert not is_frame(b"image_matrix = [[63488 for _ in range(320)] for _ in range(640)]")
+    with pytest.raises(ValueError):
+        decode_frame(b"WFRM" + b"\x00" * 4)
@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import socket
+import numpy as np
+import pytest
+
+from scripts_tcp.frame_store import FrameStore, holding, send_range
+
+def _matrix():
+    return np.arange(64 * 32, dtype=np.uint16).reshape(32, 64)
+
+def test_invalidate_waits_for_in_flight_send(tmp_path):
+    store = FrameStore(str(tmp_path))
+    view  = store.put("a", "1", _matrix())
+    with holding(view):
+        store.invalidate("a")
+        # El envío en curso sigue pudiendo leer y usar sendfile
+        server, panel = socket.socketpair()
+        send_range(server, view, 0, 128)
+        assert panel.recv(128) == _matrix().tobytes()[:128]
+        assert bytes(view[:4]) == _matrix().tobytes()[:4]
+        server.close()
+        panel.close()
+    with pytest.raises(ValueError):
+        view.acquire()
+
+def test_replaced_view_closes_once_released(tmp_path):
+    store = FrameStore(str(tmp_path))
+    old   = store.put("a", "1", _matrix())
+    old.acquire()
+    new = store.put("a", "2", _matrix() + 1)
+    assert new is not old and len(old[:16]) == 16
+    old.release()
+    with pytest.raises(ValueError):
+        old.acquire()
+    store.invalidate("a")
@@ -0,0 +1,30 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+
+from service.jobs import JobQueue, DONE, FAILED, SCHEDULED
+
+def wait(job, timeout=2.0):
+    deadline = time.time() + timeout
+    while job.status not in (DONE, FAILED) and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+def test_steps_run_in_order_after_their_delay():
+    queue = JobQueue(workers=1)
+    calls = []
+    job = queue.submit_steps("welcome", [(0, calls.append, ("TEXT",)), (0.2, calls.append, ("SHOW",))])
+    time.sleep(0.1)
+    assert calls == ["TEXT"] and job.status == SCHEDULED
+    assert wait(job).status == DONE and calls == ["TEXT", "SHOW"]
+    assert job.finished - job.started >= 0.2
+    assert queue.get(job.id) is job
+
+def test_failed_step_stops_the_sequence():
+    queue = JobQueue(workers=1)
+    calls = []
+    job = queue.submit_steps("x", [(0, int, ("nope",)), (0, calls.append, ("never",))])
+    assert wait(job).status == FAILED and "nope" in job.error
+    assert calls == []
@@ -0,0 +1,30 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+import pytest
+import numpy as np
+
+from scripts_tcp.legacy_matrix import parse_legacy_matrix
+
+def test_rows_split_across_chunks():
+    rows = np.arange(12, dtype=np.uint16).reshape(3, 4) * 5000
+    text = "# Image matrix in RGB565 format\nimage_matrix = " + str(rows.tolist()) + "\n"
+    mat  = parse_legacy_matrix(io.BytesIO(text.encode()), chunk_size=7)
+    assert np.array_equal(mat, rows)
+
+def test_solid_colour_comprehension():
+    text = "# Red → 63488\nimage_matrix = [[63488 for _ in range(320)] for _ in range(640)]\n"
+    mat  = parse_legacy_matrix(text.encode())
+    assert mat.shape == (640, 320) and (mat == 63488).all()
+
+@pytest.mark.parametrize("text", [
+    "image_matrix = __import__('os').system('echo hi')",
+    "image_matrix = [[1, 2], [3]]",
+    "image_matrix = [[1, 2]]\nimport os",
+    "image_matrix = [[1, 70000]]",
+])
+def test_rejects_anything_but_literals(text):
+    with pytest.raises(ValueError):
+        parse_legacy_matrix(text)
@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import socket
+import threading
+
+import scripts_tcp.Server_Code1 as server
+from scripts_tcp.panel_workers import PanelWorkers, PANEL_WORKERS
+
+def test_one_thread_per_socket_in_order():
+    workers = PanelWorkers()
+    a, _ = socket.socketpair()
+    seen = []
+    def job(i):
+        seen.append((i, threading.current_thread().name))
+        time.sleep(0.01)
+        return i
+    futures = [workers.submit(a, ("10.0.0.20", 1), job, i) for i in range(5)]
+    workers.wait(futures)
+    assert [f.result() for f in futures] == list(range(5))
+    assert [i for i, _ in seen] == list(range(5))
+    assert {name for _, name in seen} == {"wise-panel-10.0.0.20"}
+
+    stats = workers.stats()[0]
+    assert stats["jobs"] == 5 and stats["queue_depth"] == 0
+    assert stats["service_ms_avg"] >= 10 and stats["queue_wait_ms_avg"] > 0
+    workers.retire(a)
+    assert workers.count() == 0
+
+def test_send_full_reuses_panel_threads():
+    panels = []
+    for i in range(3):
+        srv, esp = socket.socketpair()
+        panels.append(((srv, (f"10.0.0.{20 + i}", 5000)), esp))
+
+    def esp32(sock):
+        fp = sock.makefile("rb")
+        for raw in fp:
+            fp.read(int(raw.decode().strip().rsplit(":", 1)[1]))
+            sock.sendall(b"ACK")
+    for _, esp in panels:
+        threading.Thread(target=esp32, args=(esp,), daemon=True).start()
+
+    clients = [cli for cli, _ in panels]
+    server.send_full(clients, "img", bytes(3000))
+    threads_after_first = threading.active_count()
+    server.send_full(clients, "img", bytes(3000))
+    assert threading.active_count() == threads_after_first
+    stats = {s["addr"]: s for s in PANEL_WORKERS.stats()}
+    assert all(stats[f"10.0.0.{20 + i}:5000"]["jobs"] == 2 for i in range(3))
+    for conn, _ in clients:
+        PANEL_WORKERS.retire(conn)
+
+def test_text_off_retires_workers_and_closes_sockets():
+    srv, esp = socket.socketpair()
+    clients = [(srv, ("10.0.0.20", 5000))]
+    PANEL_WORKERS.submit(srv, clients[0][1], lambda: None).result(1)
+    assert PANEL_WORKERS.count() == 1
+
+    server.main(clients, "TEXT turn off")
+    assert clients == [] and PANEL_WORKERS.count() == 0
+    assert srv.fileno() == -1
+    esp.close()
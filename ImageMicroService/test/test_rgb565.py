@@ -0,0 +1,34 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from scripts_tcp.rgb565 import rgb888_to_rgb565
+
+FRAME = np.random.default_rng(0).integers(0, 256, (640, 320, 3), dtype=np.uint8)
+
+def legacy(a):
+    r = a[:, :, 0].astype(np.uint16) >> 3
+    g = a[:, :, 1].astype(np.uint16) >> 2
+    b = a[:, :, 2].astype(np.uint16) >> 3
+    return (r << 11) | (g << 5) | b
+
+def test_plain_conversion_matches_shifts():
+    assert np.array_equal(rgb888_to_rgb565(FRAME), legacy(FRAME))
+    out = np.empty((640, 320), dtype="<u2")
+    assert rgb888_to_rgb565(FRAME, out=out) is out
+    assert np.array_equal(out, legacy(FRAME))
+
+def test_big_endian_swaps_bytes():
+    big = rgb888_to_rgb565(FRAME, byteorder="big")
+    assert big.tobytes() == legacy(FRAME).astype(">u2").tobytes()
+
+def test_dither_keeps_mean_of_gradient():
+    # Un degradado suave: el dither debe acercar la media al valor real
+    ramp = np.repeat(np.linspace(0, 255, 320)[None, :, None], 64, axis=0)
+    ramp = np.repeat(ramp, 3, axis=2).astype(np.uint8)
+    red  = lambda m: ((m >> 11) & 0x1F).astype(np.float64)
+    plain, dith = rgb888_to_rgb565(ramp), rgb888_to_rgb565(ramp, dither=True)
+    target = np.minimum(ramp[:, :, 0] / 8.0, 31)
+    assert abs(red(dith).mean() - target.mean()) < abs(red(plain).mean() - target.mean())
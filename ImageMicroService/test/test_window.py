@@ -0,0 +1,73 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import socket
+import threading
+
+from scripts_tcp import wire
+from scripts_tcp.wire import FrameParser, encode_frame, send_message, wait_ack, SACK
+from scripts_tcp.window import WindowTransfer, encode_sack, decode_sack
+
+def _reassemble(transfer):
+    return b"".join(bytes(b) for _, b in (transfer.chunk(i) for i in range(transfer.count)))
+
+def test_sack_roundtrip():
+    assert decode_sack(encode_sack(3, {5, 12})) == (3, {5, 12})
+    assert decode_sack(encode_sack(7)) == (7, set())
+
+def test_window_limits_in_flight_and_slides():
+    body = bytes(range(256)) * 40
+    t = WindowTransfer(1, b"SEGMENT:0:10240\n", body, chunk_size=1024, window=4, rto=10)
+    assert t.count == 11 and _reassemble(t) == b"SEGMENT:0:10240\n" + body
+    assert t.due(0.0) == [0, 1, 2, 3]
+    assert t.due(0.1) == []
+    t.on_sack(encode_sack(2))
+    assert t.due(0.2) == [4, 5]
+
+def test_only_missing_chunks_are_resent():
+    t = WindowTransfer(1, b"H\n", bytes(8000), chunk_size=1000, window=8, rto=0.5)
+    t.due(0.0)
+    t.on_sack(encode_sack(2, {3, 4, 5, 6, 7}))   # falta el 2
+    assert t.next_timeout(0.1) == 0.0
+    assert t.due(0.1) == [2, 8]                  # retransmisión rápida + uno nuevo
+    assert t.retransmits == 1
+    t.on_sack(encode_sack(9))
+    assert t.done
+
+def test_lossy_panel_costs_one_chunk_not_a_timeout():
+    server, panel = socket.socketpair()
+    link = wire.link_for(server)
+    link.framed, link.window, link.chunk_size = True, 4, 1024
+    body = os.urandom(20 * 1024)
+    got, dropped = {}, []
+
+    def esp32():
+        parser = FrameParser()
+        while True:
+            data = panel.recv(65536)
+            if not data:
+                return
+            for frame in parser.feed(data):
+                line, chunk = frame.payload.split(b"\n", 1)
+                _, xfer, idx, count, _ = line.decode().split(":")
+                idx, count = int(idx), int(count)
+                if idx == 5 and not dropped:
+                    dropped.append(idx)  # se pierde una vez
+                    continue
+                got[idx] = chunk
+                cum = 0
+                while cum in got:
+                    cum += 1
+                panel.sendall(encode_frame(SACK, int(xfer), encode_sack(cum, set(got))))
+    threading.Thread(target=esp32, daemon=True).start()
+
+    t0 = time.time()
+    transfer = send_message(server, b"SEGMENT:0:20480\n", body)
+    assert wait_ack(server, transfer, 10.0) == "ACK"
+    assert time.time() - t0 < 1.0
+    assert transfer.retransmits == 1
+    assert b"".join(got[i] for i in range(transfer.count)) == b"SEGMENT:0:20480\n" + body
+    server.close()
+    panel.close()
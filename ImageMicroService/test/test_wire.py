@@ -0,0 +1,73 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import socket
+import threading
+
+import pytest
+
+from scripts_tcp import wire
+from scripts_tcp.wire import (FrameParser, PanelLink, encode_frame, send_message, wait_ack, read_reply,
+                              ACK, NAK, GO, TEXT, DATA, CMD, HEADER)
+from scripts_tcp.codec import parse_capabilities
+
+def test_parser_handles_any_split():
+    stream = encode_frame(DATA, 7, b"SEGMENT:0:4\n" + b"\x01\x02\x03\x04") + encode_frame(ACK, 8)
+    parser, frames = FrameParser(), []
+    for i in range(len(stream)):
+        frames += parser.feed(stream[i:i + 1])
+    assert [(f.type, f.seq) for f in frames] == [(DATA, 7), (ACK, 8)]
+    assert frames[0].payload.endswith(b"\x01\x02\x03\x04") and parser.errors == 0
+
+def test_parser_skips_garbage_and_bad_crc():
+    bad = bytearray(encode_frame(ACK, 1, b"x"))
+    bad[-1] ^= 0xFF
+    parser = FrameParser()
+    frames = parser.feed(b"noise" + bytes(bad) + encode_frame(GO, 2))
+    assert [(f.type, f.seq) for f in frames] == [(GO, 2)]
+    assert parser.errors > 0
+
+def test_legacy_replies_coalesced_or_split():
+    link = PanelLink()
+    link.feed(b"ACK\nGO\n")
+    assert link.pop() == ("ACK", None) and link.pop() == ("GO", None)
+    link.feed(b"AC")
+    assert link.pop() is None
+    link.feed(b"K")
+    assert link.pop() == ("ACK", None)
+    link.feed(b"\nIMAGES:\na\nEND_IMAGES\n")
+    assert [link.pop()[0] for _ in range(3)] == ["IMAGES:", "a", "END_IMAGES"]
+
+def test_capabilities():
+    caps = parse_capabilities("ENCODINGS:RLE,PAL;FRAMING:1;WINDOW:8")
+    assert caps == {"ENCODINGS": {"RLE", "PAL"}, "FRAMING": 1, "WINDOW": 8, "CHUNK": 0}
+    assert parse_capabilities("ENCODINGS:RLE")["FRAMING"] == 0
+
+def test_ack_must_match_seq():
+    server, panel = socket.socketpair()
+    wire.link_for(server).framed = True
+    data = bytes(range(200))
+    seq = send_message(server, b"SEGMENT:0:200\n", data, 0, 200)
+
+    frame = FrameParser().feed(panel.recv(HEADER.size + 214))[0]
+    assert frame.seq == seq and frame.payload == b"SEGMENT:0:200\n" + data
+    # ACK tardío de un intento anterior, luego el bueno
+    panel.sendall(encode_frame(ACK, seq - 1) + encode_frame(ACK, seq))
+    assert wait_ack(server, seq, 1.0) == "ACK"
+
+    seq = send_message(server, b"READY\n")
+    assert FrameParser().feed(panel.recv(64))[0].type == CMD
+    panel.sendall(encode_frame(NAK, seq))
+    assert wait_ack(server, seq, 1.0) == "NAK"
+
+    panel.sendall(encode_frame(TEXT, 0, b"IMAGES:\nb\nEND_IMAGES\n"))
+    assert [read_reply(server, 1.0)[0] for _ in range(3)] == ["IMAGES:", "b", "END_IMAGES"]
+    with pytest.raises(socket.timeout):
+        wait_ack(server, seq, 0.05)
+
+def test_late_encodings_reply_is_not_an_ack():
+    link = PanelLink()
+    link.feed(b"ENCODINGS:RLE\nACK\n")
+    assert link.pop() == ("ACK", None)
+    assert link.pop() is None